@@ -7,40 +7,15 @@ import pandas as pd
 from typing import List, Dict, Any, Optional, Tuple
 from functools import lru_cache
 
-
-def classify_document(doc: Dict[str, Any]) -> str:
-    """
-    Classify a document as 'income' or 'cost'
-    
-    Args:
-        doc: Document dictionary
-        
-    Returns:
-        'income' or 'cost'
-    """
-    doc_type = str(
-        doc.get("documentType")
-        or doc.get("documenttype")
-        or doc.get("documentKind")
-        or doc.get("documentkind")
-        or ""
-    ).lower()
-    
-    amount = doc.get("totalGross", 0) or doc.get("totalNet", 0) or 0
-    
-    if any(keyword in doc_type for keyword in [
-        "ausgangsrechnung", "outgoinginvoice", "ausgang",
-        "invoice", "rechnung", "sales", "revenue"
-    ]):
-        return "income"
-    
-    if any(keyword in doc_type for keyword in [
-        "eingangsrechnung", "incominginvoice", "eingang",
-        "expense", "cost", "purchase"
-    ]):
-        return "cost"
-    
-    return "income" if amount < 0 else "cost"
+from utils.document_classification import (  # noqa: F401  (classify_document re-exported)
+    classify_document,
+    classify_documents,
+    document_types,
+)
+from utils.cost_center_pnl import CostCenterPnL
+from utils.document_frame import get_document_frame
+from utils.document_index import get_document_index
+from utils.document_store import keeps_derived
 
 
 @lru_cache(maxsize=128)
@@ -129,13 +104,18 @@ def filter_documents(
     """
     Filter documents based on various criteria
     
+    Lists whose index is kept (held by the shared document store, or the
+    session's own list) are filtered through their DocumentIndex, so repeated
+    calls are a few vectorized mask operations. Other (one-off) lists are
+    filtered directly, without building an index.
+    
     Args:
         docs: List of documents to filter
         company: Company name filter
         stage: Stage filter
         payment: Payment state filter
         supplier: Supplier name filter
-        currency: Currency filter
+        currency: Currency code filter
         flow: Flow filter
         date_from: Start date (ISO format)
         date_to: End date (ISO format)
@@ -145,94 +125,82 @@ def filter_documents(
     Returns:
         Filtered list of documents
     """
+    if keeps_derived(docs):
+        return get_document_index(docs).filter(
+            company=company,
+            stage=stage,
+            payment=payment,
+            supplier=supplier,
+            currency=currency,
+            flow=flow,
+            date_from=date_from,
+            date_to=date_to,
+            min_abs_value=min_value,
+            cost_centers=cost_centers,
+        )
+
     filtered = docs
-    
-    if company and company != "All":
-        filtered = [d for d in filtered if d.get("companyName") == company]
-    
-    if stage and stage != "All":
-        filtered = [d for d in filtered if d.get("currentStage") == stage]
-    
-    if payment and payment != "All":
-        filtered = [d for d in filtered if d.get("paymentState") == payment]
-    
-    if supplier and supplier != "All":
-        filtered = [d for d in filtered if d.get("supplierName") == supplier]
-    
-    if currency and currency != "All":
-        filtered = [d for d in filtered if d.get("currency") == currency]
-    
-    if flow and flow != "All":
-        filtered = [d for d in filtered if d.get("flowName") == flow]
-    
+    facets = {
+        "companyName": company,
+        "currentStage": stage,
+        "paymentState": payment,
+        "supplierName": supplier,
+        "currencyCode": currency,
+        "flowName": flow,
+    }
+    for field, value in facets.items():
+        if value and value != "All":
+            filtered = [d for d in filtered if str(d.get(field)) == str(value)]
+
+    # Compare calendar days, as the index does; documents without a date drop out
     if date_from:
-        filtered = [d for d in filtered if d.get("invoiceDate", "") >= date_from]
-    
+        first_day = str(date_from)[:10]
+        filtered = [d for d in filtered if d.get("invoiceDate") and str(d["invoiceDate"])[:10] >= first_day]
     if date_to:
-        filtered = [d for d in filtered if d.get("invoiceDate", "") <= date_to]
-    
+        last_day = str(date_to)[:10]
+        filtered = [d for d in filtered if d.get("invoiceDate") and str(d["invoiceDate"])[:10] <= last_day]
+
     if min_value is not None and min_value > 0:
-        filtered = [d for d in filtered if abs(d.get("totalGross", 0)) >= min_value]
-    
-    if cost_centers and len(cost_centers) > 0:
-        filtered = [d for d in filtered if _has_matching_cost_center(d, cost_centers)]
-    
+        filtered = [d for d in filtered if abs(d.get("totalGross") or 0) >= min_value]
+
+    if cost_centers:
+        wanted = {str(cc) for cc in cost_centers}
+        filtered = [d for d in filtered if _has_matching_cost_center(d, wanted)]
+
     return filtered
 
 
-def _has_matching_cost_center(doc: Dict[str, Any], cost_centers: List[str]) -> bool:
-    """Check if document has matching cost center"""
+def _has_matching_cost_center(doc: Dict[str, Any], cost_centers: set) -> bool:
+    """Check if document has a receipt split in one of the cost centers"""
     splits = doc.get("receiptSplits") or doc.get("documentReceiptSplits") or []
-    for split in splits:
-        cc = str(split.get("costCenter", "")).strip()
-        if cc in cost_centers:
-            return True
-    return False
+    return any(str(split.get("costCenter", "")).strip() in cost_centers for split in splits)
 
 
 def enrich_document_types(
     docs: List[Dict[str, Any]],
-    client,
-    cache_key: str = "analytics_doc_type_cache"
+    client
 ) -> List[Dict[str, Any]]:
     """
     Enrich documents with document type information
     
+    Types come from the shared document-detail store, so only documents that
+    are new or whose stageTimestamp changed are fetched.
+    
     Args:
         docs: List of documents
         client: API client instance
-        cache_key: Session state key for type cache
         
     Returns:
         Documents with enriched type information
     """
-    import streamlit as st
+    from utils.document_details import DOCUMENT_TYPE_FIELDS, get_detail_store, stage_timestamps
     
-    if cache_key not in st.session_state:
-        st.session_state[cache_key] = {}
-    
-    type_cache = st.session_state[cache_key]
-    
-    doc_ids = [int(d.get("documentId", 0)) for d in docs if d.get("documentId")]
-    unique_ids = list(set(doc_ids))
-    
-    missing_ids = [doc_id for doc_id in unique_ids if doc_id not in type_cache]
-    
-    if missing_ids:
-        for doc_id in missing_ids:
-            try:
-                detail = client.get_document(int(doc_id))
-                if detail:
-                    doc_type = (
-                        detail.get("documentType")
-                        or detail.get("documentKind")
-                        or ""
-                    )
-                    type_cache[doc_id] = doc_type
-                else:
-                    type_cache[doc_id] = ""
-            except Exception:
-                type_cache[doc_id] = ""
+    type_cache = get_detail_store().get_field(
+        client,
+        [d.get("documentId") for d in docs if d.get("documentId")],
+        DOCUMENT_TYPE_FIELDS,
+        stage_timestamps=stage_timestamps(docs),
+    )
     
     enriched = []
     for doc in docs:
@@ -259,41 +227,30 @@ def get_cost_center_stats(
     Returns:
         Dictionary mapping cost center to stats (income, cost, margin)
     """
-    cc_stats = {}
-    
-    for doc in docs:
-        category = classify_document(doc)
-        amount = abs(doc.get(amount_col, 0))
-        
+    frame = get_document_frame(docs)
+    gross, net = frame.get("totalGross"), frame.get("totalNet")
+    amounts = gross if net is None else net if gross is None else gross.where(gross.fillna(0) != 0, net)
+    categories = classify_documents(document_types(frame), amounts)
+    
+    # One row per split (documents without splits count as UNASSIGNED)
+    cost_centers, split_amounts, positions = [], [], []
+    for position, doc in enumerate(docs):
         splits = doc.get("receiptSplits") or doc.get("documentReceiptSplits") or []
-        
         if not splits:
-            cc = "UNASSIGNED"
-            if cc not in cc_stats:
-                cc_stats[cc] = {"income": 0, "cost": 0, "margin": 0}
-            
-            if category == "income":
-                cc_stats[cc]["income"] += amount
-            else:
-                cc_stats[cc]["cost"] += amount
-        else:
-            for split in splits:
-                cc = str(split.get("costCenter", "UNASSIGNED")).strip()
-                if not cc or cc == "None":
-                    cc = "UNASSIGNED"
-                
-                if cc not in cc_stats:
-                    cc_stats[cc] = {"income": 0, "cost": 0, "margin": 0}
-                
-                split_amount = abs(split.get("netAmount", 0) or split.get("grossAmount", 0) or 0)
-                
-                if category == "income":
-                    cc_stats[cc]["income"] += split_amount
-                else:
-                    cc_stats[cc]["cost"] += split_amount
-    
-    for cc in cc_stats:
-        cc_stats[cc]["margin"] = cc_stats[cc]["income"] - cc_stats[cc]["cost"]
-    
-    return cc_stats
+            cost_centers.append("UNASSIGNED")
+            split_amounts.append(doc.get(amount_col, 0) or 0)
+            positions.append(position)
+            continue
+        for split in splits:
+            cc = str(split.get("costCenter", "UNASSIGNED")).strip()
+            cost_centers.append(cc if cc and cc != "None" else "UNASSIGNED")
+            split_amounts.append(split.get("netAmount", 0) or split.get("grossAmount", 0) or 0)
+            positions.append(position)
+    
+    rows = pd.DataFrame({
+        "costCenter": cost_centers,
+        "amount": split_amounts,
+        "__category": categories.take(positions).to_numpy() if positions else [],
+    })
+    return CostCenterPnL(rows, "amount", "costCenter").cost_center_stats()
 
@@ -25,7 +25,6 @@ import plotly.express as px
 import plotly.graph_objects as go
 import openpyxl
 from io import BytesIO
-import requests
 import os
 import time
 from styles import (
@@ -61,34 +60,22 @@ from pages_modules.all_documents import render_all_documents_page
 from pages_modules.single_document import render_single_document_page
 from pages_modules.data_comparison import render_data_comparison_page
 from utils.dataverse_client import DataverseClient
+from utils.document_store import load_documents
+from utils.local_mirror import LocalMirror, MirrorSyncWorker, describe_age, mirror_enabled
 
 
 
-@st.cache_data(ttl=86400)
-def get_pln_eur_rate(date_str):
-    """
-    Get PLN to EUR exchange rate for a specific date using European Central Bank API.
-    Falls back to 4.23 if API fails.
-
-    Args:
-        date_str: Date string in format YYYY-MM-DD
-
-    Returns:
-        float: Exchange rate (PLN per 1 EUR)
-    """
-    try:
-        url = f"https://api.frankfurter.app/{date_str}?from=EUR&to=PLN"
-        response = requests.get(url, timeout=5)
+@st.cache_resource(show_spinner=False)
+def get_local_mirror():
+    """Process-wide local SQLite mirror, or None unless ENPROM_LOCAL_MIRROR is set"""
+    return LocalMirror() if mirror_enabled() else None
 
-        if response.status_code == 200:
-            data = response.json()
-            rate = data.get("rates", {}).get("PLN")
-            if rate:
-                return float(rate)
 
-        return 4.23
-    except Exception as e:
-        return 4.23
+@st.cache_resource(show_spinner=False)
+def start_mirror_sync(api_key):
+    """Start one background mirror sync worker per API key"""
+    worker_client = FlowwerAPIClient(api_key=api_key, mirror=get_local_mirror())
+    return MirrorSyncWorker(worker_client).start()
 
 
 def to_excel(df: pd.DataFrame) -> bytes:
@@ -799,7 +786,7 @@ if "correct_api_key" not in st.session_state:
     ) or os.environ.get("FLOWWER_API_KEY")
 
 if "client" not in st.session_state:
-    st.session_state.client = FlowwerAPIClient(api_key=None)
+    st.session_state.client = FlowwerAPIClient(api_key=None, mirror=get_local_mirror())
 
 if "dv_client" not in st.session_state:
     dv_secrets = st.secrets.get("dataverse", st.secrets)
@@ -1307,6 +1294,18 @@ if not st.session_state.client.api_key:
     st.stop()
 
 
+if st.session_state.client.mirror is not None:
+    start_mirror_sync(st.session_state.client.api_key)
+    mirror_synced_at = st.session_state.client.mirror_synced_at()
+    # Open with the mirrored list instead of an empty page when it is fresh
+    if (
+        not st.session_state.documents
+        and mirror_synced_at
+        and time.time() - mirror_synced_at <= st.session_state.client.mirror_max_age
+    ):
+        st.session_state.documents = load_documents(st.session_state.client)
+
+
 with st.sidebar:
     st.image(
         "https://enprom.com/wp-content/uploads/2020/12/logo-poziomy.svg",
@@ -1382,6 +1381,11 @@ with st.sidebar:
             unsafe_allow_html=True,
         )
 
+        if st.session_state.client.mirror is not None:
+            st.caption(
+                f"Local mirror synced {describe_age(st.session_state.client.mirror_synced_at())}"
+            )
+
         st.markdown("---")
 
     if "current_page" not in st.session_state or st.session_state.current_page is None:
@@ -1621,7 +1625,6 @@ elif page == "🧪 " + t("pages.test"):
         get_page_header_indigo,
         get_action_bar_styles,
         to_excel,
-        get_pln_eur_rate,
         IN_PRODUCTION,
     )
 
@@ -4,11 +4,106 @@ A Python client for interacting with the Flowwer REST API
 """
 
 import requests
-from typing import Optional, Dict, List, Any
-from datetime import datetime, date
+from typing import Optional, Dict, List, Any, Callable, Iterable, Iterator, Union
+from datetime import datetime, date, timezone
+import itertools
 import json
+import time
 import concurrent.futures
 
+from utils.http_transport import TransportConfig, create_session
+from utils.http_resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    TokenBucket,
+)
+from utils.json_stream import iter_json_array
+from utils.local_mirror import LocalMirror
+from utils.month_cache import MonthPartitionCache
+from utils.report_tables import NormalizedReport, make_split_filter
+from utils.single_flight import SingleFlight, shared_flights
+from utils.storage import scope_key
+
+
+def parse_receipt_splits(splits: Any) -> Optional[List[Dict]]:
+    """
+    Normalize a receipt splits payload into a list of split dictionaries
+
+    The receiptsplits endpoint has returned JSON strings, wrapped dicts and
+    plain lists over time, so every client funnels the payload through here.
+
+    Args:
+        splits: Decoded JSON body of the receiptsplits endpoint
+
+    Returns:
+        List of split dictionaries or None if the payload is unusable
+    """
+    if isinstance(splits, str):
+        try:
+            splits = json.loads(splits)
+        except (json.JSONDecodeError, ValueError):
+            print(f"Warning: Receipt splits endpoint returned unexpected string: {splits}")
+            return None
+
+    if isinstance(splits, dict):
+        if "documentReceiptSplits" in splits:
+            splits = splits["documentReceiptSplits"]
+        elif "splits" in splits:
+            splits = splits["splits"]
+        elif "data" in splits:
+            splits = splits["data"]
+        elif "receiptSplits" in splits:
+            splits = splits["receiptSplits"]
+        else:
+            print(
+                f"Warning: Receipt splits response is a dict without expected keys: {list(splits.keys())}"
+            )
+            return None
+
+    if not isinstance(splits, list):
+        print(f"Warning: Receipt splits response is not a list: {type(splits)}")
+        return None
+
+    return splits
+
+
+def parse_find_documents(data: Any) -> List[Dict[str, Any]]:
+    """Normalize a Find API payload into a list of documents."""
+    # API returns {"documents": [...]} or a raw list depending on impl
+    if isinstance(data, dict) and "documents" in data:
+        return data.get("documents", [])
+    if isinstance(data, list):
+        return data
+    return []
+
+
+def document_id(document: Dict[str, Any]) -> Optional[int]:
+    """Integer ID of a document dictionary, or None if it has none."""
+    raw_id = document.get("documentId", document.get("id"))
+    try:
+        return int(raw_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def document_timestamp(document: Dict[str, Any]) -> Optional[datetime]:
+    """Latest of stageTimestamp and creationTimestampUtc as a naive UTC datetime."""
+    latest = None
+    for field in ("stageTimestamp", "creationTimestampUtc"):
+        value = document.get(field)
+        if not value:
+            continue
+        try:
+            parsed = datetime.fromisoformat(str(value))
+        except ValueError:
+            continue
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        if latest is None or parsed > latest:
+            latest = parsed
+    return latest
+
 
 class FlowwerAPIClient:
     """Main client for interacting with Flowwer API"""
@@ -17,6 +112,16 @@ class FlowwerAPIClient:
         self,
         base_url: str = "https://enprom-gmbh.flowwer.de",
         api_key: Optional[str] = None,
+        max_workers: int = 20,
+        transport: Optional[TransportConfig] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        month_cache: Optional[MonthPartitionCache] = None,
+        use_month_cache: bool = True,
+        single_flight: Optional[SingleFlight] = None,
+        mirror: Optional[LocalMirror] = None,
+        mirror_max_age: float = 1800.0,
     ):
         """
         Initialize the Flowwer API client
@@ -24,15 +129,116 @@ class FlowwerAPIClient:
         Args:
             base_url: The base URL for the Flowwer instance
             api_key: The API key for authentication (default: pre-configured key)
+            max_workers: Size of the shared worker pool used by batch calls
+            transport: Connection pool and timeout settings
+                       (default: pool sized to max_workers)
+            retry_policy: Retry/backoff rules for transient failures
+            rate_limiter: Token bucket shared by every request of this client
+            circuit_breaker: Breaker that fails fast while the API is down
+            month_cache: Disk cache for closed Find API months
+            use_month_cache: Set False to always fetch months live
+            single_flight: Coalescer for identical concurrent GETs
+                           (default: shared by every client in the process)
+            mirror: Optional local SQLite mirror; live results are written to
+                    it and reads are served from it while fresh
+            mirror_max_age: Seconds a mirrored result may be served
         """
         self.base_url = base_url
         self.api_key = api_key
-        self.session = requests.Session()
+        self.max_workers = max(1, max_workers)
+        self.transport = transport or TransportConfig.for_concurrency(self.max_workers)
+        self.session = create_session(self.transport)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter or TokenBucket()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.month_cache = (
+            (month_cache or MonthPartitionCache()) if use_month_cache else None
+        )
+        self.single_flight = single_flight or shared_flights
+        self.mirror = mirror
+        self.mirror_max_age = mirror_max_age
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
 
         # Set API key in headers if provided
         if self.api_key:
             self.session.headers.update({"X-FLOWWER-ApiKey": self.api_key})
 
+    def _request(self, method: str, url: str, **kwargs):
+        """
+        Internal: send a request, coalescing identical concurrent GETs
+
+        Buffered GETs with the same URL, params and API key that overlap in
+        time (across threads, pages and sessions) share one network request.
+        The response body is already read, so each caller's .json() still
+        returns its own independent objects.
+        """
+        if method.upper() != "GET" or kwargs.get("stream") or kwargs.get("headers"):
+            return self._send_with_retries(method, url, **kwargs)
+
+        params = kwargs.get("params") or {}
+        key = (
+            self.cache_scope(),
+            url,
+            tuple(sorted((str(k), str(v)) for k, v in params.items())),
+        )
+        return self.single_flight.do(
+            key, lambda: self._send_with_retries(method, url, **kwargs)
+        )
+
+    def _send_with_retries(self, method: str, url: str, **kwargs):
+        """
+        Internal: send a request through the rate limiter, breaker and retry policy
+
+        Transient failures (429, 5xx, connection errors, timeouts) are retried
+        with jittered exponential backoff, honouring Retry-After. Other request
+        errors are raised at once but still count as breaker failures. After
+        the last attempt the final response is returned, or the final
+        exception raised, so callers keep their existing status-code handling.
+        """
+        attempt = 0
+        while True:
+            if not self.circuit_breaker.allow():
+                raise CircuitOpenError(
+                    f"Flowwer API circuit is open after repeated failures; skipped {url}"
+                )
+            self.rate_limiter.acquire()
+
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.circuit_breaker.record_failure()
+                if not self.retry_policy.should_retry_error(method, attempt):
+                    raise
+                delay = self.retry_policy.compute_delay(attempt)
+                print(f"Request to {url} failed, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except Exception:
+                # Not retried, but it must still end a half-open trial
+                self.circuit_breaker.record_failure()
+                raise
+
+            status = response.status_code
+            if status >= 500:
+                self.circuit_breaker.record_failure()
+            elif status == 429:
+                # Throttling is not an outage, so 429 neither opens nor closes the circuit
+                self.circuit_breaker.record_throttled()
+            else:
+                self.circuit_breaker.record_success()
+
+            if not self.retry_policy.should_retry_status(method, status, attempt):
+                return response
+
+            delay = self.retry_policy.compute_delay(
+                attempt, response.headers.get("Retry-After")
+            )
+            print(f"Request to {url} returned {status}, retrying in {delay:.1f}s")
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
     def verify_api_key(self, api_key: Optional[str] = None) -> tuple[bool, str]:
         """
         Verify if an API key is valid by making a lightweight API call
@@ -110,7 +316,9 @@ class FlowwerAPIClient:
         try:
             # Attempt 1: Headers (per Postman guide)
             resp = requests.post(
-                url, headers={"username": username, "password": password}
+                url,
+                headers={"username": username, "password": password},
+                timeout=self.transport.timeout,
             )
             if resp.status_code == 200:
                 self.api_key = resp.text.strip('"')
@@ -122,6 +330,7 @@ class FlowwerAPIClient:
                 url,
                 json={"username": username, "password": password},
                 headers={"Content-Type": "application/json"},
+                timeout=self.transport.timeout,
             )
             if resp.status_code == 200:
                 self.api_key = resp.text.strip('"')
@@ -133,6 +342,7 @@ class FlowwerAPIClient:
                 url,
                 data={"username": username, "password": password},
                 headers={"Content-Type": "application/x-www-form-urlencoded"},
+                timeout=self.transport.timeout,
             )
             if resp.status_code == 200:
                 self.api_key = resp.text.strip('"')
@@ -151,7 +361,10 @@ class FlowwerAPIClient:
             return False
 
     def get_all_documents(
-        self, include_processed: bool = False, include_deleted: bool = False
+        self,
+        include_processed: bool = False,
+        include_deleted: bool = False,
+        use_mirror: bool = True,
     ) -> Optional[List[Dict]]:
         """
         Get all documents
@@ -159,6 +372,7 @@ class FlowwerAPIClient:
         Args:
             include_processed: Include processed documents
             include_deleted: Include deleted documents
+            use_mirror: Serve from the local mirror if it is fresh enough
 
         Returns:
             List of document dictionaries or None if failed
@@ -167,27 +381,85 @@ class FlowwerAPIClient:
             print("No API key set. Please set api_key or call authenticate().")
             return None
 
+        if use_mirror and self.mirror is not None:
+            mirrored = self.mirror.load_documents(
+                self.cache_scope(), include_processed, include_deleted
+            )
+            if mirrored is not None and time.time() - mirrored[1] <= self.mirror_max_age:
+                print(f"Retrieved {len(mirrored[0])} documents from local mirror")
+                return mirrored[0]
+
+        try:
+            documents = list(
+                self.iter_all_documents(
+                    include_processed=include_processed,
+                    include_deleted=include_deleted,
+                )
+            )
+            print(f"Retrieved {len(documents)} documents")
+            if self.mirror is not None:
+                self.mirror.save_documents(
+                    self.cache_scope(), include_processed, include_deleted, documents
+                )
+            return documents
+
+        except Exception as e:
+            print(f"Error getting documents: {e}")
+            return None
+
+    def iter_all_documents(
+        self,
+        include_processed: bool = False,
+        include_deleted: bool = False,
+        fields: Optional[Iterable[str]] = None,
+        chunk_size: int = 65536,
+    ) -> Iterator[Dict]:
+        """
+        Stream all documents one at a time
+
+        The response body is parsed incrementally, so the raw bytes, the
+        decoded text and the full list are never in memory together.
+
+        Args:
+            include_processed: Include processed documents
+            include_deleted: Include deleted documents
+            fields: Optional field names to keep (projection); other keys are
+                    dropped and missing ones stay missing
+            chunk_size: Bytes read from the socket per step
+
+        Yields:
+            Document dictionaries
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+            ValueError: If the response is not valid JSON
+        """
+        if not self.api_key:
+            raise ValueError("No API key set. Please set api_key or call authenticate().")
+
         url = f"{self.base_url}/api/v1/documents/all"
         params = {
             "includeProcessed": include_processed,
             "includeDeleted": include_deleted,
         }
+        keep = list(fields) if fields is not None else None
 
+        response = self._request("GET", url, params=params, stream=True)
         try:
-            response = self.session.get(url, params=params)
-
-            if response.status_code == 200:
-                documents = response.json()
-                print(f"Retrieved {len(documents)} documents")
-                return documents
-            else:
+            if response.status_code != 200:
                 print(f"Failed to get documents: {response.status_code}")
                 print(f"Response: {response.text}")
-                return None
+                raise requests.exceptions.HTTPError(
+                    f"Failed to get documents: {response.status_code}",
+                    response=response,
+                )
 
-        except Exception as e:
-            print(f"Error getting documents: {e}")
-            return None
+            for document in iter_json_array(response.iter_content(chunk_size)):
+                if keep is not None and isinstance(document, dict):
+                    document = {k: document[k] for k in keep if k in document}
+                yield document
+        finally:
+            response.close()
 
     def get_document(self, document_id: int) -> Optional[Dict]:
         """
@@ -203,23 +475,355 @@ class FlowwerAPIClient:
             print("No API key set. Please set api_key or call authenticate().")
             return None
 
+        document, error = self._fetch_document(document_id)
+        if error:
+            # Only print errors, not successful retrievals
+            print(error)
+        return document
+
+    def get_documents(
+        self,
+        document_ids: Iterable[Any],
+        progress_callback: Optional[Any] = None,
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Get details of many documents using the shared worker pool
+
+        Duplicate and empty ids are dropped before any request is made, and at
+        most ``max_workers`` requests run at the same time.
+
+        Args:
+            document_ids: Document IDs to fetch (ints, numeric strings or floats)
+            progress_callback: Optional callback accepting (percentage: float, text: str)
+
+        Returns:
+            Dict keyed by integer document ID. Each value is a dict with
+            "document" (detail dictionary or None) and "error" (message or None)
+        """
+        results = self._fetch_many(
+            self._fetch_document, document_ids, progress_callback, "documents"
+        )
+        return {
+            doc_id: {"document": value, "error": error}
+            for doc_id, (value, error) in results.items()
+        }
+
+    def get_receipt_splits_many(
+        self,
+        document_ids: Iterable[Any],
+        progress_callback: Optional[Any] = None,
+    ) -> Dict[int, Optional[List[Dict]]]:
+        """
+        Get receipt splits of many documents using the shared worker pool
+
+        Args:
+            document_ids: Document IDs (ints, numeric strings or floats)
+            progress_callback: Optional callback accepting (percentage: float, text: str)
+
+        Returns:
+            Dict keyed by integer document ID with the split list, or None for
+            documents whose splits could not be fetched
+        """
+        results = self._fetch_many(
+            self._fetch_receipt_splits, document_ids, progress_callback, "receipt splits"
+        )
+        return {doc_id: value for doc_id, (value, _error) in results.items()}
+
+    def _fetch_many(
+        self,
+        fetch: Callable[[int], tuple],
+        document_ids: Iterable[Any],
+        progress_callback: Optional[Any],
+        label: str,
+    ) -> Dict[int, tuple]:
+        """
+        Internal: run ``fetch`` (returning (value, error)) once per unique
+        document ID on the shared worker pool
+        """
+        unique_ids: List[int] = []
+        seen: set[int] = set()
+        for raw_id in document_ids:
+            try:
+                doc_id = int(raw_id)
+            except (TypeError, ValueError):
+                continue
+            if doc_id not in seen:
+                seen.add(doc_id)
+                unique_ids.append(doc_id)
+
+        if not unique_ids:
+            return {}
+
+        if not self.api_key:
+            print("No API key set. Please set api_key or call authenticate().")
+            return {doc_id: (None, "No API key set") for doc_id in unique_ids}
+
+        results: Dict[int, tuple] = {}
+        total = len(unique_ids)
+
+        executor = self._get_executor()
+        future_to_id = {executor.submit(fetch, doc_id): doc_id for doc_id in unique_ids}
+
+        for future in concurrent.futures.as_completed(future_to_id):
+            doc_id = future_to_id[future]
+            try:
+                results[doc_id] = future.result()
+            except Exception as exc:
+                results[doc_id] = (None, f"Error getting {label} for document {doc_id}: {exc}")
+
+            if progress_callback:
+                done = len(results)
+                progress_callback(done / total, f"Fetched {done}/{total} {label}")
+
+        failed = sum(1 for _value, error in results.values() if error)
+        if failed:
+            print(f"Failed to get {failed} of {total} {label}")
+        return results
+
+    def _fetch_document(self, document_id: int) -> tuple[Optional[Dict], Optional[str]]:
+        """Internal: fetch one document detail, returning (document, error)."""
         url = f"{self.base_url}/api/v1/documents/{document_id}"
 
         try:
-            response = self.session.get(url)
+            response = self._request("GET", url)
 
             if response.status_code == 200:
-                document = response.json()
-                return document
-            else:
-                # Only print errors, not successful retrievals
-                print(f"Failed to get document {document_id}: {response.status_code}")
-                return None
+                return response.json(), None
+            return None, f"Failed to get document {document_id}: {response.status_code}"
 
         except Exception as e:
-            print(f"Error getting document {document_id}: {e}")
+            return None, f"Error getting document {document_id}: {e}"
+
+    def sync_documents(
+        self,
+        snapshot: List[Dict],
+        since: Optional[datetime] = None,
+        include_processed: bool = False,
+        include_deleted: bool = False,
+        window_months: int = 2,
+        progress_callback: Optional[Any] = None,
+    ) -> Optional["DocumentSync"]:
+        """
+        Bring a previously loaded document list up to date
+
+        Instead of downloading /documents/all again, the CreationDate-Months
+        paths of the recent window are read live from the Find API. Only
+        documents that are new, whose stageTimestamp/creationTimestampUtc
+        moved forward, or that vanished from a window month are fetched in
+        detail and merged. Documents created before the window are not
+        revisited, so callers should still do a full load now and then.
+
+        Args:
+            snapshot: Documents from the last full or incremental load
+            since: When the snapshot was taken; the window reaches back to its month
+            include_processed: Whether the snapshot includes processed documents
+            include_deleted: Whether the snapshot includes deleted documents
+            window_months: Minimum number of recent months to check
+            progress_callback: Optional callback accepting (percentage: float, text: str)
+
+        Returns:
+            DocumentSync with the merged list and the added, changed and removed
+            IDs, or None if the recent months could not be read
+        """
+        if not self.api_key:
+            print("No API key set. Please set api_key or call authenticate().")
             return None
 
+        today = date.today()
+        months = max(1, window_months)
+        if since is not None:
+            months = max(
+                months,
+                (today.year - since.year) * 12 + (today.month - since.month) + 1,
+            )
+        paths = self._recent_month_paths(months)
+        window = set(paths)
+
+        executor = self._get_executor()
+        future_to_path = {
+            executor.submit(self._find_documents_with_receipt_splits, path, False): path
+            for path in paths
+        }
+        recent: Dict[int, Dict[str, Any]] = {}
+        failed_paths = []
+        for future in concurrent.futures.as_completed(future_to_path):
+            try:
+                docs = future.result()
+            except Exception as exc:
+                print(f"Path {future_to_path[future]} generated an exception: {exc}")
+                docs = None
+            if docs is None:
+                failed_paths.append(future_to_path[future])
+                continue
+            for doc in docs:
+                doc_id = document_id(doc)
+                if doc_id is not None:
+                    recent[doc_id] = doc
+
+        if failed_paths:
+            # Without every window month, vanished documents cannot be told apart
+            print(f"Incremental sync aborted, failed month(s): {sorted(failed_paths)}")
+            return None
+
+        known = {}
+        for doc in snapshot:
+            doc_id = document_id(doc)
+            if doc_id is not None:
+                known[doc_id] = doc
+
+        candidates = []
+        for doc_id, doc in recent.items():
+            old = known.get(doc_id)
+            if old is None:
+                # Documents the listing would leave out (e.g. processed ones
+                # when include_processed is off) are never in the snapshot;
+                # skip them rather than probing them on every sync
+                if self._matches_listing(doc, include_processed, include_deleted):
+                    candidates.append(doc_id)
+                continue
+            new_ts, old_ts = document_timestamp(doc), document_timestamp(old)
+            if new_ts is not None and (old_ts is None or new_ts > old_ts):
+                candidates.append(doc_id)
+        for doc_id, doc in known.items():
+            if doc_id not in recent and self._creation_month_path(doc) in window:
+                candidates.append(doc_id)
+
+        sync = DocumentSync(snapshot, paths)
+        total = len(candidates)
+        future_to_id = {
+            executor.submit(self._probe_document, doc_id): doc_id
+            for doc_id in candidates
+        }
+        updates: Dict[int, Optional[Dict[str, Any]]] = {}
+        for done, future in enumerate(
+            concurrent.futures.as_completed(future_to_id), start=1
+        ):
+            doc_id = future_to_id[future]
+            if progress_callback:
+                progress_callback(done / total, f"Checked {done}/{total} documents")
+            try:
+                status, document = future.result()
+            except Exception as exc:
+                print(f"Error getting document {doc_id}: {exc}")
+                status, document = None, None
+
+            if status == 200 and document is not None:
+                visible = self._matches_listing(document, include_processed, include_deleted)
+            elif status == 404:
+                visible = False
+            else:
+                sync.failed.append(doc_id)
+                continue
+
+            if not visible:
+                if doc_id in known:
+                    sync.removed.append(doc_id)
+                    updates[doc_id] = None
+            elif doc_id not in known:
+                sync.added.append(doc_id)
+                updates[doc_id] = document
+            elif document_timestamp(document) != document_timestamp(known[doc_id]):
+                sync.changed.append(doc_id)
+                updates[doc_id] = document
+
+        if updates:
+            merged = []
+            for doc in snapshot:
+                doc_id = document_id(doc)
+                if doc_id in updates:
+                    if updates[doc_id] is not None:
+                        merged.append(updates[doc_id])
+                else:
+                    merged.append(doc)
+            merged.extend(updates[doc_id] for doc_id in sorted(sync.added))
+            sync.documents = merged
+
+        if self.mirror is not None:
+            if sync.has_changes:
+                self.mirror.save_documents(
+                    self.cache_scope(),
+                    include_processed,
+                    include_deleted,
+                    sync.documents,
+                    full=False,
+                )
+            else:
+                self.mirror.touch_documents(
+                    self.cache_scope(), include_processed, include_deleted
+                )
+
+        print(f"Incremental sync over {len(paths)} month(s): {sync.summary()}")
+        return sync
+
+    def mirror_synced_at(
+        self, include_processed: bool = False, include_deleted: bool = False
+    ) -> Optional[float]:
+        """
+        Epoch seconds of the last mirror sync of a document list
+
+        Returns:
+            Timestamp or None if there is no mirror or nothing was mirrored yet
+        """
+        if self.mirror is None or not self.api_key:
+            return None
+        return self.mirror.last_synced(
+            self.cache_scope(), include_processed, include_deleted
+        )
+
+    def _probe_document(self, document_id: int) -> tuple[Optional[int], Optional[Dict]]:
+        """Internal: fetch one document detail, returning (status code, document)."""
+        url = f"{self.base_url}/api/v1/documents/{document_id}"
+        response = self._request("GET", url)
+        if response.status_code == 200:
+            return 200, response.json()
+        return response.status_code, None
+
+    @staticmethod
+    def _creation_month_path(document: Dict[str, Any]) -> Optional[str]:
+        """
+        Internal: CreationDate-Months path of a document
+
+        creationTimestampUtc is converted to local time first, so the month
+        matches the local month paths built by _recent_month_paths().
+        """
+        value = document.get("creationTimestampUtc")
+        if not value:
+            return None
+        try:
+            created = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if created.tzinfo is None:
+            created = created.replace(tzinfo=timezone.utc)
+        return FlowwerAPIClient._month_path(created.astimezone().date())
+
+    @staticmethod
+    def _matches_listing(
+        document: Dict[str, Any], include_processed: bool, include_deleted: bool
+    ) -> bool:
+        """Internal: True if /documents/all with these flags would list the document."""
+        stage = document.get("currentStage")
+        if stage == "Processed" and not include_processed:
+            return False
+        if (stage == "Deleted" or document.get("isDeleted")) and not include_deleted:
+            return False
+        return True
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """Internal: lazily create the worker pool shared by batch calls."""
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="flowwer"
+            )
+        return self._executor
+
+    def close(self) -> None:
+        """Shut down the shared worker pool and close the HTTP session"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self.session.close()
+
     def get_companies_with_flows(self) -> Optional[List[Dict]]:
         """
         Get all active companies with valid flows
@@ -234,7 +838,7 @@ class FlowwerAPIClient:
         url = f"{self.base_url}/api/v1/companies/activeflows/reduced"
 
         try:
-            response = self.session.get(url)
+            response = self._request("GET", url)
 
             # Debug: print request headers
             print(f"🔍 Debug - Request URL: {url}")
@@ -276,7 +880,7 @@ class FlowwerAPIClient:
         params = {"uniqueId": unique_id}
 
         try:
-            response = self.session.get(url, params=params, stream=True)
+            response = self._request("GET", url, params=params, stream=True)
 
             if response.status_code == 200:
                 with open(output_path, "wb") as f:
@@ -330,8 +934,8 @@ class FlowwerAPIClient:
                 file_content = f.read()
 
             headers = {"Content-Type": "application/octet-stream"}
-            response = self.session.post(
-                url, params=params, data=file_content, headers=headers
+            response = self._request(
+                "POST", url, params=params, data=file_content, headers=headers
             )
 
             if response.status_code == 200:
@@ -365,56 +969,29 @@ class FlowwerAPIClient:
             print("No API key set. Please set api_key or call authenticate().")
             return None
 
+        splits, error = self._fetch_receipt_splits(document_id)
+        if error:
+            print(error)
+        elif splits is not None:
+            print(f"Retrieved {len(splits)} receipt split(s) for document {document_id}")
+        return splits
+
+    def _fetch_receipt_splits(self, document_id: int) -> tuple[Optional[List[Dict]], Optional[str]]:
+        """Internal: fetch the receipt splits of one document, returning (splits, error)."""
         url = f"{self.base_url}/api/v1/documents/{document_id}/receiptsplits"
 
         try:
-            response = self.session.get(url)
+            response = self._request("GET", url)
 
             if response.status_code == 200:
-                splits = response.json()
-
-                if isinstance(splits, str):
-                    try:
-                        splits = json.loads(splits)
-                    except (json.JSONDecodeError, ValueError):
-                        print(
-                            f"Warning: Receipt splits endpoint returned unexpected string: {splits}"
-                        )
-                        return None
-
-                if isinstance(splits, dict):
-                    if "documentReceiptSplits" in splits:
-                        splits = splits["documentReceiptSplits"]
-                    elif "splits" in splits:
-                        splits = splits["splits"]
-                    elif "data" in splits:
-                        splits = splits["data"]
-                    elif "receiptSplits" in splits:
-                        splits = splits["receiptSplits"]
-                    else:
-                        print(
-                            f"Warning: Receipt splits response is a dict without expected keys: {list(splits.keys())}"
-                        )
-                        return None
-
-                if not isinstance(splits, list):
-                    print(
-                        f"Warning: Receipt splits response is not a list: {type(splits)}"
-                    )
-                    return None
-
-                print(
-                    f"Retrieved {len(splits)} receipt split(s) for document {document_id}"
-                )
-                return splits
-            else:
-                print(f"Failed to get receipt splits: {response.status_code}")
-                print(f"Response: {response.text}")
-                return None
+                return parse_receipt_splits(response.json()), None
+            return None, (
+                f"Failed to get receipt splits: {response.status_code}\n"
+                f"Response: {response.text}"
+            )
 
         except Exception as e:
-            print(f"Error getting receipt splits: {e}")
-            return None
+            return None, f"Error getting receipt splits: {e}"
 
     def approve_document(
         self, document_id: int, at_stage: str, nominees: Optional[List[str]] = None
@@ -443,7 +1020,7 @@ class FlowwerAPIClient:
 
         try:
             headers = {"Content-Type": "application/json"}
-            response = self.session.post(url, json=payload, headers=headers)
+            response = self._request("POST", url, json=payload, headers=headers)
 
             if response.status_code == 200:
                 print(f"Document {document_id} approved at {at_stage}")
@@ -457,14 +1034,70 @@ class FlowwerAPIClient:
             print(f"Error approving document: {e}")
             return False
 
+    def scan_months(
+        self,
+        months_back: int = 6,
+        min_date: Optional[str] = None,
+        max_date: Optional[str] = None,
+        progress_callback: Optional[Any] = None,
+    ) -> Optional["MonthScan"]:
+        """
+        Fetch every CreationDate-Months path once and derive all month-based data
+
+        A single pass fills cost centers, accounts, supplier and company
+        dimensions and the split rows of the receipt splitting report, so pages
+        that need several of them do not scan the same months repeatedly.
+
+        Args:
+            months_back: Months to look back when no explicit range is given
+            min_date: Optional start date (ISO string)
+            max_date: Optional end date (ISO string)
+            progress_callback: Optional callback accepting (percentage: float, text: str)
+
+        Returns:
+            MonthScan with the collected data or None if failed
+        """
+        if not self.api_key:
+            print("No API key set. Please set api_key or call authenticate().")
+            return None
+
+        if min_date and max_date:
+            paths = self._build_month_paths(min_date, max_date)
+        else:
+            paths = self._recent_month_paths(months_back)
+
+        scan = MonthScan(paths)
+        if not paths:
+            return scan
+
+        for path, docs, error in self._iter_months(paths):
+            if docs is None:
+                print(error)
+                scan.failed_paths.append(path)
+                scan.errors[path] = error
+            else:
+                scan.add_month(path, docs)
+
+            if progress_callback:
+                done = len(scan.completed_paths) + len(scan.failed_paths)
+                progress_callback(
+                    done / len(paths), f"Processed {done}/{len(paths)} months"
+                )
+
+        if scan.failed_paths:
+            print(f"Failed to load {len(scan.failed_paths)} month(s): {sorted(scan.failed_paths)}")
+        return scan
+
     def get_receipt_splitting_report(
         self,
-        cost_center: Optional[str] = None,
-        account: Optional[str] = None,
+        cost_center: Optional[Union[str, Iterable[str]]] = None,
+        account: Optional[Union[str, Iterable[str]]] = None,
         min_date: Optional[str] = None,
         max_date: Optional[str] = None,
         company: Optional[str] = None,
-    ) -> Optional[List[Dict]]:
+        normalized: bool = False,
+        progress_callback: Optional[Any] = None,
+    ) -> Optional[Any]:
         """
         Generate receipt splitting report with filters
 
@@ -472,14 +1105,21 @@ class FlowwerAPIClient:
         filtered by various criteria.
 
         Args:
-            cost_center: Filter by cost center
-            account: Filter by account
+            cost_center: Filter by cost center, or by any of several cost centers
+            account: Filter by account, or by any of several accounts
             min_date: Minimum date (YYYY-MM-DD format)
             max_date: Maximum date (YYYY-MM-DD format)
             company: Filter by company name
+            normalized: Return a NormalizedReport (documents and splits tables
+                        linked by documentId) instead of flat rows
+            progress_callback: Optional callback accepting (percentage: float, text: str)
 
         Returns:
-            List of receipt splitting report entries or None if failed
+            List of receipt splitting report entries (or a NormalizedReport,
+            whose failed_paths lists months that could not be loaded)
+            or None if failed
+
+        See iter_receipt_splitting_report() for month-by-month results.
         """
         if not self.api_key:
             print("No API key set. Please set api_key or call authenticate().")
@@ -497,66 +1137,96 @@ class FlowwerAPIClient:
             return None
 
         try:
-            rows: List[Dict[str, Any]] = []
-
-            def process_path(path):
-                path_docs = self._find_documents_with_receipt_splits(path)
-                path_rows = []
-                if path_docs:
-                    for doc in path_docs:
-                        base_doc = {
-                            k: v
-                            for k, v in doc.items()
-                            if k not in ["documentReceiptSplits", "receiptSplits"]
-                        }
-                        splits = (
-                            doc.get("receiptSplits")
-                            or doc.get("documentReceiptSplits")
-                            or []
-                        )
-                        for split in splits:
-                            merged = {**base_doc, **split}
-                            path_rows.append(merged)
-                return path_rows
-
-            max_workers = min(len(paths), 10)
-            if max_workers < 1:
-                max_workers = 1
-
-            with concurrent.futures.ThreadPoolExecutor(
-                max_workers=max_workers
-            ) as executor:
-                future_to_path = {
-                    executor.submit(process_path, path): path for path in paths
-                }
-
-                for future in concurrent.futures.as_completed(future_to_path):
-                    path = future_to_path[future]
-                    try:
-                        data = future.result()
-                        rows.extend(data)
-                    except Exception as exc:
-                        print(f"Path {path} generated an exception: {exc}")
-
-            if cost_center:
-                rows = [
-                    r for r in rows if str(r.get("costCenter", "")) == str(cost_center)
-                ]
-            if account:
-                rows = [r for r in rows if str(r.get("account", "")) == str(account)]
-            if company:
-                rows = [
-                    r
-                    for r in rows
-                    if str(r.get("supplierName", "")).lower() == str(company).lower()
-                ]
+            build_report = self._month_report_builder(cost_center, account, company)
+            report = NormalizedReport()
+            for completed, (path, month_report, error) in enumerate(
+                self._iter_months(paths, transform=build_report), start=1
+            ):
+                if month_report is None:
+                    print(error)
+                    report.failed_paths.append(path)
+                else:
+                    report.extend(month_report)
+                if progress_callback:
+                    progress_callback(
+                        completed / len(paths), f"Processed {completed}/{len(paths)} months"
+                    )
 
-            print(f"Retrieved {len(rows)} receipt splitting report entries")
-            return rows
+            if report.failed_paths:
+                print(f"Failed to load {len(report.failed_paths)} month(s): {sorted(report.failed_paths)}")
+            print(f"Retrieved {len(report)} receipt splitting report entries")
+            return report if normalized else report.rows()
         except Exception as e:
             print(f"Error getting receipt splitting report: {e}")
             return None
 
+    def iter_receipt_splitting_report(
+        self,
+        cost_center: Optional[Union[str, Iterable[str]]] = None,
+        account: Optional[Union[str, Iterable[str]]] = None,
+        min_date: Optional[str] = None,
+        max_date: Optional[str] = None,
+        company: Optional[str] = None,
+    ) -> Iterator["ReportChunk"]:
+        """
+        Generate the receipt splitting report month by month
+
+        Months are fetched in parallel like get_receipt_splitting_report(),
+        but each is yielded as soon as it completes, so callers can show
+        partial results. A month that fails is yielded with its error
+        instead of being dropped.
+
+        Args:
+            Same filters as get_receipt_splitting_report()
+
+        Yields:
+            ReportChunk per month path, in completion order
+        """
+        if not self.api_key:
+            print("No API key set. Please set api_key or call authenticate().")
+            return
+
+        today = date.today()
+        if not min_date:
+            min_date = date(today.year, today.month, 1).isoformat()
+        if not max_date:
+            max_date = date(today.year, today.month, 1).isoformat()
+
+        paths = self._build_month_paths(min_date, max_date)
+        if not paths:
+            print("No valid date range supplied for receipt splitting report.")
+            return
+
+        build_report = self._month_report_builder(cost_center, account, company)
+        for completed, (path, report, error) in enumerate(
+            self._iter_months(paths, transform=build_report), start=1
+        ):
+            if report is None:
+                print(error)
+            yield ReportChunk(path, report, error, completed, len(paths))
+
+    @staticmethod
+    def _month_report_builder(
+        cost_center: Optional[Union[str, Iterable[str]]],
+        account: Optional[Union[str, Iterable[str]]],
+        company: Optional[str],
+    ) -> Callable[[List[Dict[str, Any]]], NormalizedReport]:
+        """
+        Internal: function turning one month's documents into a filtered report
+
+        It runs in the month's worker thread, so splits that do not match are
+        skipped there and the raw month is released before anything is merged.
+        """
+        matches = make_split_filter(cost_center, account, company)
+
+        def build(documents: List[Dict[str, Any]]) -> NormalizedReport:
+            report = NormalizedReport()
+            for doc in documents:
+                report.add_document(doc, matches)
+            return report
+
+        return build
+
     def get_all_cost_centers(
         self,
         months_back: int = 6,
@@ -584,60 +1254,10 @@ class FlowwerAPIClient:
             if min_date and max_date:
                 return self.get_cost_centers_for_range(min_date, max_date)
 
-            paths = self._recent_month_paths(months_back)
-            if not paths:
-                return []
-
-            cost_centers: set[str] = set()
-
-            def process_path(path):
-                path_ccs = set()
-                docs = self._find_documents_with_receipt_splits(path)
-                if docs:
-                    for doc in docs:
-                        splits = (
-                            doc.get("receiptSplits")
-                            or doc.get("documentReceiptSplits")
-                            or []
-                        )
-                        for split in splits:
-                            cc = split.get("costCenter")
-                            if cc not in [None, "", "None", "nan"]:
-                                path_ccs.add(str(cc))
-                return path_ccs
-
-            max_workers = min(len(paths), 10)
-            if max_workers < 1:
-                max_workers = 1
-
-            total_paths = len(paths)
-            processed_count = 0
-
-            with concurrent.futures.ThreadPoolExecutor(
-                max_workers=max_workers
-            ) as executor:
-                future_to_path = {
-                    executor.submit(process_path, path): path for path in paths
-                }
-
-                for future in concurrent.futures.as_completed(future_to_path):
-                    path = future_to_path[future]
-                    processed_count += 1
-
-                    if progress_callback:
-                        progress = processed_count / total_paths
-                        progress_callback(
-                            progress,
-                            f"Processed {processed_count}/{total_paths} months",
-                        )
-
-                    try:
-                        path_ccs = future.result()
-                        cost_centers.update(path_ccs)
-                    except Exception as exc:
-                        print(f"Path {path} generated an exception: {exc}")
-
-            sorted_cc = sorted(cost_centers)
+            scan = self.scan_months(
+                months_back=months_back, progress_callback=progress_callback
+            )
+            sorted_cc = sorted(scan.cost_centers)
             print(f"Retrieved {len(sorted_cc)} cost centers (via Find API)")
             return sorted_cc
         except Exception as e:
@@ -653,48 +1273,8 @@ class FlowwerAPIClient:
             return None
 
         try:
-            paths = self._build_month_paths(min_date, max_date)
-            if not paths:
-                return []
-
-            cost_centers: set[str] = set()
-
-            def process_path(path):
-                path_ccs = set()
-                docs = self._find_documents_with_receipt_splits(path)
-                if docs:
-                    for doc in docs:
-                        splits = (
-                            doc.get("receiptSplits")
-                            or doc.get("documentReceiptSplits")
-                            or []
-                        )
-                        for split in splits:
-                            cc = split.get("costCenter")
-                            if cc not in [None, "", "None", "nan"]:
-                                path_ccs.add(str(cc))
-                return path_ccs
-
-            max_workers = min(len(paths), 10)
-            if max_workers < 1:
-                max_workers = 1
-
-            with concurrent.futures.ThreadPoolExecutor(
-                max_workers=max_workers
-            ) as executor:
-                future_to_path = {
-                    executor.submit(process_path, path): path for path in paths
-                }
-
-                for future in concurrent.futures.as_completed(future_to_path):
-                    path = future_to_path[future]
-                    try:
-                        path_ccs = future.result()
-                        cost_centers.update(path_ccs)
-                    except Exception as exc:
-                        print(f"Path {path} generated an exception: {exc}")
-
-            sorted_cc = sorted(cost_centers)
+            scan = self.scan_months(min_date=min_date, max_date=max_date)
+            sorted_cc = sorted(scan.cost_centers)
             print(
                 f"Retrieved {len(sorted_cc)} cost centers (via Find API, {min_date} to {max_date})"
             )
@@ -715,27 +1295,8 @@ class FlowwerAPIClient:
             return None
 
         try:
-            paths = self._recent_month_paths(months_back)
-            if not paths:
-                return []
-
-            accounts: set[str] = set()
-            for path in paths:
-                docs = self._find_documents_with_receipt_splits(path)
-                if not docs:
-                    continue
-                for doc in docs:
-                    splits = (
-                        doc.get("receiptSplits")
-                        or doc.get("documentReceiptSplits")
-                        or []
-                    )
-                    for split in splits:
-                        acct = split.get("account")
-                        if acct not in [None, "", "None", "nan"]:
-                            accounts.add(str(acct))
-
-            sorted_accounts = sorted(accounts)
+            scan = self.scan_months(months_back=months_back)
+            sorted_accounts = sorted(scan.accounts)
             print(f"Retrieved {len(sorted_accounts)} accounts (via Find API)")
             return sorted_accounts
         except Exception as e:
@@ -743,28 +1304,114 @@ class FlowwerAPIClient:
             return None
 
     def _find_documents_with_receipt_splits(
-        self, path: str
+        self, path: str, use_cache: bool = True
     ) -> Optional[List[Dict[str, Any]]]:
         """Internal: call Find API for documents + receipt splits for a path."""
+        documents, error = self._fetch_month(path, use_cache)
+        if error:
+            print(error)
+        return documents
+
+    def _fetch_month(
+        self, path: str, use_cache: bool = True
+    ) -> tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+        """Internal: fetch one Find API month path, returning (documents, error)."""
+        if use_cache and self.month_cache is not None:
+            cached = self.month_cache.get(self.cache_scope(), path)
+            if cached is not None:
+                return cached, None
+        if use_cache and self.mirror is not None:
+            mirrored = self.mirror.load_month(self.cache_scope(), path)
+            if mirrored is not None and time.time() - mirrored[1] <= self.mirror_max_age:
+                return mirrored[0], None
+
         url = f"{self.base_url}/api/v1/find/path/documents/receipt-splits"
         try:
-            resp = self.session.get(url, params={"Path": path})
+            resp = self._request("GET", url, params={"Path": path})
             if resp.status_code == 200:
-                data = resp.json()
-                # API returns {"documents": [...]} or a raw list depending on impl
-                if isinstance(data, dict) and "documents" in data:
-                    return data.get("documents", [])
-                if isinstance(data, list):
-                    return data
-                return []
-            else:
-                print(
-                    f"Find API path {path} failed: {resp.status_code} - {resp.text[:200]}"
-                )
-                return None
+                documents = parse_find_documents(resp.json())
+                if self.month_cache is not None:
+                    self.month_cache.put(self.cache_scope(), path, documents)
+                if self.mirror is not None:
+                    self.mirror.save_month(self.cache_scope(), path, documents)
+                return documents, None
+            return None, f"Find API path {path} failed: {resp.status_code} - {resp.text[:200]}"
         except Exception as e:
-            print(f"Error calling Find API for path {path}: {e}")
-            return None
+            return None, f"Error calling Find API for path {path}: {e}"
+
+    def _fetch_month_as(
+        self, path: str, use_cache: bool, transform: Callable[[List[Dict[str, Any]]], Any]
+    ) -> tuple[Any, Optional[str]]:
+        """Internal: fetch one month and apply ``transform`` in the same worker."""
+        documents, error = self._fetch_month(path, use_cache)
+        if documents is None:
+            return None, error
+        return transform(documents), None
+
+    def _iter_months(
+        self,
+        paths: List[str],
+        use_cache: bool = True,
+        transform: Optional[Callable[[List[Dict[str, Any]]], Any]] = None,
+    ) -> Iterator[tuple[str, Any, Optional[str]]]:
+        """
+        Internal: fetch month paths on the shared pool, yielding as each completes
+
+        Args:
+            paths: CreationDate-Months/YYYY-MM paths
+            use_cache: Allow cached/mirrored months
+            transform: Optional function applied to each month's documents
+                       inside its worker; its result is yielded instead
+
+        Yields:
+            (path, documents/transformed result or None, error message or None)
+        """
+        executor = self._get_executor()
+        future_to_path = {
+            (
+                executor.submit(self._fetch_month_as, path, use_cache, transform)
+                if transform is not None
+                else executor.submit(self._fetch_month, path, use_cache)
+            ): path
+            for path in paths
+        }
+        try:
+            for future in concurrent.futures.as_completed(future_to_path):
+                path = future_to_path[future]
+                try:
+                    documents, error = future.result()
+                except Exception as exc:
+                    documents, error = None, f"Path {path} generated an exception: {exc}"
+                yield path, documents, error
+        finally:
+            # A consumer that stops early should not leave months queued
+            for future in future_to_path:
+                future.cancel()
+
+    def cache_scope(self) -> str:
+        """Key that keeps cached data of different instances/API keys apart."""
+        return scope_key(self.base_url, self.api_key)
+
+    def invalidate_month_cache(self, path: Optional[str] = None) -> int:
+        """
+        Drop cached Find API months for this instance and API key
+
+        Args:
+            path: Only this CreationDate-Months/YYYY-MM path (default: all months)
+
+        Returns:
+            Number of cached months removed
+        """
+        if self.month_cache is None:
+            return 0
+        removed = self.month_cache.invalidate(self.cache_scope(), path)
+        print(f"Removed {removed} cached month(s)")
+        return removed
+
+    @staticmethod
+    def _month_path(day: date) -> str:
+        """Internal: CreationDate-Months/<YYYY-MM> path of the month containing day."""
+        return f"CreationDate-Months/{day.year:04d}-{day.month:02d}"
 
     def _build_month_paths(self, min_date: str, max_date: str) -> List[str]:
         """Build list of CreationDate-Months/<YYYY-MM> paths inclusive."""
@@ -782,7 +1429,7 @@ class FlowwerAPIClient:
         end_marker = date(end.year, end.month, 1)
 
         while current <= end_marker:
-            paths.append(f"CreationDate-Months/{current.strftime('%Y-%m')}")
+            paths.append(self._month_path(current))
             if current.month == 12:
                 current = date(current.year + 1, 1, 1)
             else:
@@ -796,7 +1443,7 @@ class FlowwerAPIClient:
         paths: List[str] = []
         year, month = today.year, today.month
         for _ in range(months_back):
-            paths.append(f"CreationDate-Months/{year:04d}-{month:02d}")
+            paths.append(self._month_path(date(year, month, 1)))
             if month == 1:
                 month = 12
                 year -= 1
@@ -853,7 +1500,7 @@ class FlowwerAPIClient:
             params["flowwid"] = flow_id
 
         try:
-            response = self.session.get(url, params=params)
+            response = self._request("GET", url, params=params)
 
             if response.status_code == 200:
                 documents = response.json()
@@ -932,7 +1579,7 @@ class FlowwerAPIClient:
         params = {"backupList": backup_list}
 
         try:
-            response = self.session.get(url, params=params)
+            response = self._request("GET", url, params=params)
 
             if response.status_code == 200:
                 documents = response.json()
@@ -967,6 +1614,119 @@ class FlowwerAPIClient:
             return None
 
 
+class MonthScan:
+    """
+    Results of one pass over Find API month paths
+
+    Every month's documents are visited once and fan out into all consumers:
+    the cost-center, account, supplier and company sets and the normalized
+    documents/splits tables of the receipt splitting report. Flat rows are
+    only built if ``rows`` is read.
+    """
+
+    EMPTY_VALUES = (None, "", "None", "nan")
+
+    def __init__(self, paths: List[str]):
+        self.paths = list(paths)
+        self.completed_paths: List[str] = []
+        self.failed_paths: List[str] = []
+        self.errors: Dict[str, str] = {}
+        self.cost_centers: set[str] = set()
+        self.accounts: set[str] = set()
+        self.suppliers: set[str] = set()
+        self.companies: set[str] = set()
+        self.report = NormalizedReport()
+        self._rows: Optional[List[Dict[str, Any]]] = None
+
+    def add_month(self, path: str, docs: List[Dict[str, Any]]) -> None:
+        """Feed one month's Find API documents into every consumer"""
+        for doc in docs:
+            supplier = doc.get("supplierName")
+            if supplier not in self.EMPTY_VALUES:
+                self.suppliers.add(str(supplier))
+            company = doc.get("companyName")
+            if company not in self.EMPTY_VALUES:
+                self.companies.add(str(company))
+
+            for split in self.report.add_document(doc):
+                cc = split.get("costCenter")
+                if cc not in self.EMPTY_VALUES:
+                    self.cost_centers.add(str(cc))
+                acct = split.get("account")
+                if acct not in self.EMPTY_VALUES:
+                    self.accounts.add(str(acct))
+
+        self._rows = None
+        self.completed_paths.append(path)
+
+    @property
+    def rows(self) -> List[Dict[str, Any]]:
+        """Flat split rows ({**document, **split}), built on first access"""
+        if self._rows is None:
+            self._rows = self.report.rows()
+        return self._rows
+
+    @property
+    def complete(self) -> bool:
+        """True if every month was loaded"""
+        return not self.failed_paths
+
+
+class ReportChunk:
+    """One month of a receipt splitting report (see iter_receipt_splitting_report)"""
+
+    def __init__(
+        self,
+        path: str,
+        report: Optional[NormalizedReport],
+        error: Optional[str],
+        completed: int,
+        total: int,
+    ):
+        self.path = path
+        self.report = report
+        self.error = error
+        self.completed = completed
+        self.total = total
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def progress(self) -> float:
+        """Share of months finished so far (0..1)"""
+        return self.completed / self.total if self.total else 1.0
+
+
+class DocumentSync:
+    """
+    Outcome of an incremental document refresh
+
+    ``documents`` is the merged list. It is the snapshot object itself when
+    nothing changed, so callers sharing that list keep a valid reference.
+    """
+
+    def __init__(self, snapshot: List[Dict[str, Any]], paths: List[str]):
+        self.documents = snapshot
+        self.paths = list(paths)
+        self.added: List[int] = []
+        self.changed: List[int] = []
+        self.removed: List[int] = []
+        self.failed: List[int] = []
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def summary(self) -> str:
+        """Short human readable description, e.g. '3 added, 1 changed, 0 removed'"""
+        text = f"{len(self.added)} added, {len(self.changed)} changed, {len(self.removed)} removed"
+        if self.failed:
+            text += f", {len(self.failed)} not checked"
+        return text
+
+
 class DocumentHelper:
     """Helper class for working with document data"""
 
@@ -1034,11 +1794,18 @@ class DocumentHelper:
         return [doc for doc in documents if doc.get("currentStage") == stage]
 
     @staticmethod
-    def export_to_csv(documents: List[Dict], output_path: str) -> None:
-        """Export documents to CSV"""
+    def export_to_csv(documents: Iterable[Dict], output_path: str) -> None:
+        """
+        Export documents to CSV
+
+        Accepts a list or any iterable, e.g. FlowwerAPIClient.iter_all_documents(),
+        and writes rows as they arrive.
+        """
         import csv
 
-        if not documents:
+        documents = iter(documents or [])
+        first = next(documents, None)
+        if first is None:
             print("No documents to export")
             return
 
@@ -1059,11 +1826,14 @@ class DocumentHelper:
         ]
 
         try:
+            count = 0
             with open(output_path, "w", newline="", encoding="utf-8") as f:
                 writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
                 writer.writeheader()
-                writer.writerows(documents)
+                for document in itertools.chain([first], documents):
+                    writer.writerow(document)
+                    count += 1
 
-            print(f"Exported {len(documents)} documents to {output_path}")
+            print(f"Exported {count} documents to {output_path}")
         except Exception as e:
             print(f"Error exporting to CSV: {e}")
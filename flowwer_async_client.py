@@ -0,0 +1,388 @@
+"""
+Flowwer Async API Client
+An asyncio sibling of FlowwerAPIClient for fan-out heavy workloads
+"""
+
+import asyncio
+from typing import Optional, Dict, List, Any, Awaitable, Callable, Iterable, TypeVar
+
+import aiohttp
+
+from flowwer_api_client import parse_receipt_splits, parse_find_documents
+from utils.http_resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    TokenBucket,
+)
+from utils.http_transport import TransportConfig
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class AsyncFlowwerAPIClient:
+    """
+    Async client for the Flowwer API
+
+    All requests share one aiohttp session and one semaphore, so thousands of
+    document or month requests run on a single event loop with at most
+    ``max_concurrency`` of them in flight. Requests go through the same
+    retry policy, rate limiter and circuit breaker as FlowwerAPIClient;
+    from_client() shares a sync client's instances, so both count against
+    one request budget.
+
+    Usage:
+        async with AsyncFlowwerAPIClient(api_key=key) as client:
+            docs = await client.get_all_documents()
+    """
+
+    def __init__(
+        self,
+        base_url: str = "https://enprom-gmbh.flowwer.de",
+        api_key: Optional[str] = None,
+        max_concurrency: int = 20,
+        transport: Optional[TransportConfig] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Initialize the async Flowwer API client
+
+        Args:
+            base_url: The base URL for the Flowwer instance
+            api_key: The API key for authentication
+            max_concurrency: Maximum number of requests in flight at once
+            transport: Connection pool and timeout settings
+                       (default: pool sized to max_concurrency)
+            retry_policy: Retry/backoff rules for transient failures
+            rate_limiter: Token bucket shared by every request of this client
+            circuit_breaker: Stops calling the API after repeated failures
+        """
+        self.base_url = base_url
+        self.api_key = api_key
+        self.max_concurrency = max(1, max_concurrency)
+        self.transport = transport or TransportConfig.for_concurrency(
+            self.max_concurrency
+        )
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.rate_limiter = rate_limiter or TokenBucket()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_client(cls, client, max_concurrency: int = 20) -> "AsyncFlowwerAPIClient":
+        """
+        Async client for the same account as a FlowwerAPIClient
+
+        Shares its retry policy, rate limiter and circuit breaker, so sync and
+        async requests stay within one rate limit and one outage state.
+        """
+        return cls(
+            base_url=client.base_url,
+            api_key=client.api_key,
+            max_concurrency=max_concurrency,
+            retry_policy=client.retry_policy,
+            rate_limiter=client.rate_limiter,
+            circuit_breaker=client.circuit_breaker,
+        )
+
+    async def __aenter__(self) -> "AsyncFlowwerAPIClient":
+        await self._ensure_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def _ensure_session(self) -> aiohttp.ClientSession:
+        """Create the session and semaphore lazily inside the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Sessions and semaphores are bound to the loop that created them
+            await self._discard_session()
+            self._loop = loop
+        if self._session is None or self._session.closed:
+            headers = {}
+            if self.api_key:
+                headers["X-FLOWWER-ApiKey"] = self.api_key
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self.transport.pool_maxsize,
+                force_close=not self.transport.keep_alive,
+            )
+            timeout = aiohttp.ClientTimeout(
+                sock_connect=self.transport.connect_timeout,
+                sock_read=self.transport.read_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                headers=headers, connector=connector, timeout=timeout
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def _discard_session(self) -> None:
+        """Close a session left over from a previous event loop"""
+        session, self._session, self._semaphore = self._session, None, None
+        if session is None or session.closed:
+            return
+        try:
+            await session.close()
+        except Exception as e:
+            # Its connections belong to the old (usually closed) loop;
+            # the session is still marked closed, so it is not reported as leaked
+            print(f"Error closing previous HTTP session: {e}")
+
+    async def close(self) -> None:
+        """Close the underlying HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._semaphore = None
+
+    async def _send_with_retries(self, method: str, url: str, **kwargs) -> aiohttp.ClientResponse:
+        """
+        Internal: send a request through the rate limiter, breaker and retry policy
+
+        Same rules as FlowwerAPIClient._send_with_retries: 429, 5xx, connection
+        errors and timeouts are retried with jittered backoff, honouring
+        Retry-After, and waits sleep on the event loop. The caller reads and
+        releases the returned response (``async with response``).
+        """
+        session = await self._ensure_session()
+        attempt = 0
+        while True:
+            if not self.circuit_breaker.allow():
+                raise CircuitOpenError(
+                    f"Flowwer API circuit is open after repeated failures; skipped {url}"
+                )
+            wait = self.rate_limiter.try_acquire()
+            while wait:
+                await asyncio.sleep(wait)
+                wait = self.rate_limiter.try_acquire()
+
+            try:
+                response = await session.request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                self.circuit_breaker.record_failure()
+                if not self.retry_policy.should_retry_error(method, attempt):
+                    raise
+                delay = self.retry_policy.compute_delay(attempt)
+                print(f"Request to {url} failed, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except Exception:
+                # Not retried, but it must still end a half-open trial
+                self.circuit_breaker.record_failure()
+                raise
+
+            status = response.status
+            if status >= 500:
+                self.circuit_breaker.record_failure()
+            elif status == 429:
+                # Throttling is not an outage, so 429 neither opens nor closes the circuit
+                self.circuit_breaker.record_throttled()
+            else:
+                self.circuit_breaker.record_success()
+
+            if not self.retry_policy.should_retry_status(method, status, attempt):
+                return response
+
+            delay = self.retry_policy.compute_delay(
+                attempt, response.headers.get("Retry-After")
+            )
+            print(f"Request to {url} returned {status}, retrying in {delay:.1f}s")
+            response.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def gather_bounded(
+        self, func: Callable[[T], Awaitable[R]], items: Iterable[T]
+    ) -> List[R]:
+        """
+        Run ``func`` for every item concurrently and return results in input order
+
+        Concurrency is already bounded by the client semaphore, so callers can
+        pass thousands of items without creating thousands of open requests.
+        """
+        await self._ensure_session()
+        return await asyncio.gather(*(func(item) for item in items))
+
+    async def get_all_documents(
+        self, include_processed: bool = False, include_deleted: bool = False
+    ) -> Optional[List[Dict]]:
+        """
+        Get all documents
+
+        Args:
+            include_processed: Include processed documents
+            include_deleted: Include deleted documents
+
+        Returns:
+            List of document dictionaries or None if failed
+        """
+        if not self.api_key:
+            print("No API key set. Please set api_key.")
+            return None
+
+        url = f"{self.base_url}/api/v1/documents/all"
+        params = {
+            "includeProcessed": str(include_processed).lower(),
+            "includeDeleted": str(include_deleted).lower(),
+        }
+
+        await self._ensure_session()
+        try:
+            async with self._semaphore:
+                async with await self._send_with_retries("GET", url, params=params) as response:
+                    if response.status == 200:
+                        documents = await response.json(content_type=None)
+                        print(f"Retrieved {len(documents)} documents")
+                        return documents
+                    print(f"Failed to get documents: {response.status}")
+                    print(f"Response: {await response.text()}")
+                    return None
+        except Exception as e:
+            print(f"Error getting documents: {e}")
+            return None
+
+    async def get_document(self, document_id: int) -> Optional[Dict]:
+        """
+        Get details of a single document
+
+        Args:
+            document_id: The ID of the document
+
+        Returns:
+            Document dictionary or None if failed
+        """
+        if not self.api_key:
+            print("No API key set. Please set api_key.")
+            return None
+
+        url = f"{self.base_url}/api/v1/documents/{document_id}"
+
+        await self._ensure_session()
+        try:
+            async with self._semaphore:
+                async with await self._send_with_retries("GET", url) as response:
+                    if response.status == 200:
+                        return await response.json(content_type=None)
+                    print(f"Failed to get document {document_id}: {response.status}")
+                    return None
+        except Exception as e:
+            print(f"Error getting document {document_id}: {e}")
+            return None
+
+    async def get_receipt_splits(self, document_id: int) -> Optional[List[Dict]]:
+        """
+        Get receipt splits (Belegaufteilung) for a document
+
+        Args:
+            document_id: The ID of the document
+
+        Returns:
+            List of split dictionaries or None if failed
+        """
+        if not self.api_key:
+            print("No API key set. Please set api_key.")
+            return None
+
+        url = f"{self.base_url}/api/v1/documents/{document_id}/receiptsplits"
+
+        await self._ensure_session()
+        try:
+            async with self._semaphore:
+                async with await self._send_with_retries("GET", url) as response:
+                    if response.status == 200:
+                        return parse_receipt_splits(
+                            await response.json(content_type=None)
+                        )
+                    print(f"Failed to get receipt splits: {response.status}")
+                    print(f"Response: {await response.text()}")
+                    return None
+        except Exception as e:
+            print(f"Error getting receipt splits: {e}")
+            return None
+
+    async def _find_documents_with_receipt_splits(
+        self, path: str
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Internal: call Find API for documents + receipt splits for a path."""
+        url = f"{self.base_url}/api/v1/find/path/documents/receipt-splits"
+
+        await self._ensure_session()
+        try:
+            async with self._semaphore:
+                async with await self._send_with_retries(
+                    "GET", url, params={"Path": path}
+                ) as response:
+                    if response.status == 200:
+                        return parse_find_documents(
+                            await response.json(content_type=None)
+                        )
+                    text = await response.text()
+                    print(f"Find API path {path} failed: {response.status} - {text[:200]}")
+                    return None
+        except Exception as e:
+            print(f"Error calling Find API for path {path}: {e}")
+            return None
+
+    async def download_document(
+        self, document_id: int, unique_id: str, output_path: str
+    ) -> bool:
+        """
+        Download a document PDF
+
+        Args:
+            document_id: The ID of the document
+            unique_id: The unique UUID for the document
+            output_path: Path to save the downloaded file
+
+        Returns:
+            bool: True if download successful
+        """
+        if not self.api_key:
+            print("No API key set. Please set api_key.")
+            return False
+
+        url = f"{self.base_url}/api/v1/download/{document_id}/download/document.pdf"
+        params = {"uniqueId": unique_id}
+
+        await self._ensure_session()
+        try:
+            async with self._semaphore:
+                async with await self._send_with_retries("GET", url, params=params) as response:
+                    if response.status != 200:
+                        print(f"Failed to download document: {response.status}")
+                        return False
+                    # File I/O runs in a worker thread, off the event loop
+                    f = await asyncio.to_thread(open, output_path, "wb")
+                    try:
+                        async for chunk in response.content.iter_chunked(65536):
+                            await asyncio.to_thread(f.write, chunk)
+                    finally:
+                        await asyncio.to_thread(f.close)
+            print(f"Document downloaded to {output_path}")
+            return True
+        except Exception as e:
+            print(f"Error downloading document: {e}")
+            return False
+
+
+def run_async(coro: Awaitable[T]) -> T:
+    """
+    Run a coroutine to completion from synchronous code
+
+    Streamlit scripts run in a worker thread without an event loop, so pages
+    wrap a whole batch in one coroutine and run it here:
+
+        async def load(ids):
+            async with AsyncFlowwerAPIClient(api_key=key) as client:
+                return await client.gather_bounded(client.get_document, ids)
+
+        documents = run_async(load(ids))
+    """
+    return asyncio.run(coro)
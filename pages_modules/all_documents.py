@@ -4,10 +4,12 @@ Browse and manage all documents with comprehensive filtering and statistics
 """
 
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 import json
 from utils.pagination import paginate_dataframe, get_page_size_selector
+from utils.document_frame import document_view
+from utils.document_index import get_document_index
+from utils.document_store import REFRESH_MAX_AGE, refresh_documents
 
 
 def render_all_documents_page(client, t, get_all_document_page_styles, to_excel):
@@ -79,8 +81,11 @@ def render_all_documents_page(client, t, get_all_document_page_styles, to_excel)
             key="btn_refresh_all_docs",
         ):
             with st.spinner(t("all_documents_page.loading")):
-                docs = st.session_state.client.get_all_documents(
-                    include_processed=include_processed, include_deleted=include_deleted
+                docs, sync = refresh_documents(
+                    st.session_state.client,
+                    include_processed=include_processed,
+                    include_deleted=include_deleted,
+                    max_age=REFRESH_MAX_AGE,
                 )
                 st.session_state.documents = docs
                 if docs:
@@ -89,6 +94,8 @@ def render_all_documents_page(client, t, get_all_document_page_styles, to_excel)
                             "{count}", str(len(docs))
                         )
                     )
+                    if sync is not None:
+                        st.caption(f"Incremental refresh: {sync.summary()}")
                 else:
                     st.warning("No documents found")
 
@@ -426,17 +433,13 @@ def render_all_documents_page(client, t, get_all_document_page_styles, to_excel)
 
         with st.expander(t("all_docs_metrics.advanced_filters"), expanded=True):
 
+            # Built once per loaded list; filter changes only combine its bitmaps
+            doc_index = get_document_index(st.session_state.documents)
+
             col1, col2, col3 = st.columns(3)
 
             with col1:
-                companies = list(
-                    set(
-                        [
-                            doc.get("companyName", "Unknown")
-                            for doc in st.session_state.documents
-                        ]
-                    )
-                )
+                companies = doc_index.values("companyName")
                 selected_company = st.selectbox(
                     t("all_docs_metrics.company"),
                     [t("all_docs_metrics.all")] + sorted(companies),
@@ -444,14 +447,7 @@ def render_all_documents_page(client, t, get_all_document_page_styles, to_excel)
                 )
 
             with col2:
-                stages = list(
-                    set(
-                        [
-                            doc.get("currentStage", "Unknown")
-                            for doc in st.session_state.documents
-                        ]
-                    )
-                )
+                stages = doc_index.values("currentStage")
                 selected_stage = st.selectbox(
                     t("all_docs_metrics.stage"),
                     [t("all_docs_metrics.all")] + sorted(stages),
@@ -459,14 +455,7 @@ def render_all_documents_page(client, t, get_all_document_page_styles, to_excel)
                 )
 
             with col3:
-                payment_states = list(
-                    set(
-                        [
-                            doc.get("paymentState", "Unknown")
-                            for doc in st.session_state.documents
-                        ]
-                    )
-                )
+                payment_states = doc_index.values("paymentState")
                 selected_payment = st.selectbox(
                     t("all_docs_metrics.payment_state"),
                     [t("all_docs_metrics.all")] + sorted(payment_states),
@@ -478,15 +467,7 @@ def render_all_documents_page(client, t, get_all_document_page_styles, to_excel)
             col4, col5, col6 = st.columns(3)
 
             with col4:
-                suppliers = list(
-                    set(
-                        [
-                            doc.get("supplierName", "Unknown")
-                            for doc in st.session_state.documents
-                            if doc.get("supplierName")
-                        ]
-                    )
-                )
+                suppliers = doc_index.values("supplierName")
                 selected_supplier = st.selectbox(
                     t("all_docs_metrics.supplier"),
                     [t("all_docs_metrics.all")] + sorted(suppliers),
@@ -494,15 +475,7 @@ def render_all_documents_page(client, t, get_all_document_page_styles, to_excel)
                 )
 
             with col5:
-                currencies = list(
-                    set(
-                        [
-                            doc.get("currencyCode", "EUR")
-                            for doc in st.session_state.documents
-                            if doc.get("currencyCode")
-                        ]
-                    )
-                )
+                currencies = doc_index.values("currencyCode")
                 selected_currency = st.selectbox(
                     t("all_docs_metrics.currency"),
                     [t("all_docs_metrics.all")] + sorted(currencies),
@@ -510,15 +483,7 @@ def render_all_documents_page(client, t, get_all_document_page_styles, to_excel)
                 )
 
             with col6:
-                flows = list(
-                    set(
-                        [
-                            doc.get("flowName", "Unknown")
-                            for doc in st.session_state.documents
-                            if doc.get("flowName")
-                        ]
-                    )
-                )
+                flows = doc_index.values("flowName")
                 selected_flow = st.selectbox(
                     t("all_docs_metrics.flow"),
                     [t("all_docs_metrics.all")] + sorted(flows),
@@ -529,57 +494,36 @@ def render_all_documents_page(client, t, get_all_document_page_styles, to_excel)
 
             col7, col8, col9 = st.columns(3)
 
+            date_bounds = doc_index.date_bounds()
+
             with col7:
-                invoice_dates = [
-                    doc.get("invoiceDate")
-                    for doc in st.session_state.documents
-                    if doc.get("invoiceDate")
-                ]
-                if invoice_dates:
-                    try:
-                        valid_dates = [pd.to_datetime(d) for d in invoice_dates if d]
-                        if valid_dates:
-                            min_doc_date = min(valid_dates).date()
-                            max_doc_date = max(valid_dates).date()
-
-                            date_from = st.date_input(
-                                t("all_docs_metrics.invoice_date_from"),
-                                value=None,
-                                min_value=min_doc_date,
-                                max_value=max_doc_date,
-                                help=t("all_docs_metrics.filter_by_date_from_help"),
-                            )
-                        else:
-                            date_from = None
-                    except:
-                        date_from = None
+                if date_bounds:
+                    min_doc_date, max_doc_date = date_bounds
+                    date_from = st.date_input(
+                        t("all_docs_metrics.invoice_date_from"),
+                        value=None,
+                        min_value=min_doc_date,
+                        max_value=max_doc_date,
+                        help=t("all_docs_metrics.filter_by_date_from_help"),
+                    )
                 else:
                     date_from = None
 
             with col8:
-                if invoice_dates:
-                    try:
-                        if valid_dates:
-                            date_to = st.date_input(
-                                t("all_docs_metrics.invoice_date_to"),
-                                value=None,
-                                min_value=min_doc_date,
-                                max_value=max_doc_date,
-                                help=t("all_docs_metrics.filter_by_date_to_help"),
-                            )
-                        else:
-                            date_to = None
-                    except:
-                        date_to = None
+                if date_bounds:
+                    date_to = st.date_input(
+                        t("all_docs_metrics.invoice_date_to"),
+                        value=None,
+                        min_value=min_doc_date,
+                        max_value=max_doc_date,
+                        help=t("all_docs_metrics.filter_by_date_to_help"),
+                    )
                 else:
                     date_to = None
 
             with col9:
-                gross_values = [
-                    doc.get("totalGross", 0) for doc in st.session_state.documents
-                ]
-                if gross_values:
-                    max_value = max(gross_values)
+                if doc_index.size:
+                    max_value = doc_index.total_gross.max()
                     value_threshold = st.number_input(
                         t("all_docs_metrics.min_value"),
                         min_value=0.0,
@@ -591,90 +535,21 @@ def render_all_documents_page(client, t, get_all_document_page_styles, to_excel)
                 else:
                     value_threshold = 0.0
 
-        filtered_docs = st.session_state.documents
-
-        if selected_company != t("all_docs_metrics.all"):
-            filtered_docs = [
-                doc
-                for doc in filtered_docs
-                if doc.get("companyName") == selected_company
-            ]
-
-        if selected_stage != t("all_docs_metrics.all"):
-            filtered_docs = [
-                doc
-                for doc in filtered_docs
-                if doc.get("currentStage") == selected_stage
-            ]
-
-        if selected_payment != t("all_docs_metrics.all"):
-            filtered_docs = [
-                doc
-                for doc in filtered_docs
-                if doc.get("paymentState") == selected_payment
-            ]
-
-        if selected_supplier != t("all_docs_metrics.all"):
-            filtered_docs = [
-                doc
-                for doc in filtered_docs
-                if doc.get("supplierName") == selected_supplier
-            ]
-
-        if selected_currency != t("all_docs_metrics.all"):
-            filtered_docs = [
-                doc
-                for doc in filtered_docs
-                if doc.get("currencyCode") == selected_currency
-            ]
-
-        if selected_flow != t("all_docs_metrics.all"):
-            filtered_docs = [
-                doc for doc in filtered_docs if doc.get("flowName") == selected_flow
-            ]
-
-        if date_from:
-
-            def is_date_after_or_equal(doc, target_date):
-                date_str = doc.get("invoiceDate")
-                if not date_str:
-                    return False
-                try:
-                    doc_date = pd.to_datetime(date_str, errors="coerce")
-                    if pd.isna(doc_date):
-                        return False
-                    return doc_date.date() >= target_date
-                except:
-                    return False
-
-            filtered_docs = [
-                doc for doc in filtered_docs if is_date_after_or_equal(doc, date_from)
-            ]
-
-        if date_to:
-
-            def is_date_before_or_equal(doc, target_date):
-                date_str = doc.get("invoiceDate")
-                if not date_str:
-                    return False
-                try:
-                    doc_date = pd.to_datetime(date_str, errors="coerce")
-                    if pd.isna(doc_date):
-                        return False
-                    return doc_date.date() <= target_date
-                except:
-                    return False
-
-            filtered_docs = [
-                doc for doc in filtered_docs if is_date_before_or_equal(doc, date_to)
-            ]
-
-        if value_threshold > 0:
-            filtered_docs = [
-                doc
-                for doc in filtered_docs
-                if doc.get("totalGross", 0) >= value_threshold
-            ]
+        def chosen(value):
+            return None if value == t("all_docs_metrics.all") else value
+
+        doc_mask = doc_index.mask(
+            company=chosen(selected_company),
+            stage=chosen(selected_stage),
+            payment=chosen(selected_payment),
+            supplier=chosen(selected_supplier),
+            currency=chosen(selected_currency),
+            flow=chosen(selected_flow),
+            date_from=date_from,
+            date_to=date_to,
+            min_value=value_threshold,
+        )
+        filtered_docs = doc_index.select(doc_mask)
 
         if len(filtered_docs) != len(docs):
             showing_text = (
@@ -713,25 +588,36 @@ def render_all_documents_page(client, t, get_all_document_page_styles, to_excel)
             )
 
         if filtered_docs:
-            df_data = []
-            for doc in filtered_docs:
-                df_data.append(
-                    {
-                        "Document ID": doc.get("documentId"),
-                        "Name": doc.get("simpleName", "N/A"),
-                        "Company": doc.get("companyName", "N/A"),
-                        "Flow": doc.get("flowName", "N/A"),
-                        "Stage": doc.get("currentStage", "N/A"),
-                        "Invoice #": doc.get("invoiceNumber", "N/A"),
-                        "Invoice Date": doc.get("invoiceDate", "N/A"),
-                        "Total Gross": doc.get("totalGross", 0),
-                        "Currency": doc.get("currencyCode", "EUR"),
-                        "Supplier": doc.get("supplierName", "N/A"),
-                        "Payment State": doc.get("paymentState", "N/A"),
-                    }
-                )
-
-            df = pd.DataFrame(df_data)
+            # A view of the list's typed frame; no per-rerun row dicts
+            df = document_view(
+                doc_index.frame,
+                {
+                    "documentId": "Document ID",
+                    "simpleName": "Name",
+                    "companyName": "Company",
+                    "flowName": "Flow",
+                    "currentStage": "Stage",
+                    "invoiceNumber": "Invoice #",
+                    "invoiceDate": "Invoice Date",
+                    "totalGross": "Total Gross",
+                    "currencyCode": "Currency",
+                    "supplierName": "Supplier",
+                    "paymentState": "Payment State",
+                },
+                rows=doc_mask,
+                defaults={
+                    "Name": "N/A",
+                    "Company": "N/A",
+                    "Flow": "N/A",
+                    "Stage": "N/A",
+                    "Invoice #": "N/A",
+                    "Total Gross": 0.0,
+                    "Currency": "EUR",
+                    "Supplier": "N/A",
+                    "Payment State": "N/A",
+                },
+                date_format="%Y-%m-%d",
+            )
 
             st.markdown(f"#### {t('common.documents_table')}")
 
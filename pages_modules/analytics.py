@@ -10,8 +10,14 @@ from datetime import datetime, date
 import calendar
 import json
 from dateutil.relativedelta import relativedelta
-from utils.cost_center_parser import parse_cost_center, enrich_cost_center_data
+from utils.cost_center_pnl import CostCenterPnL
 from utils.pagination import paginate_dataframe, get_page_size_selector
+from utils.document_classification import DIRECTION_RULES, classify_frame
+from utils.document_details import DOCUMENT_TYPE_FIELDS, get_detail_store, stage_timestamps
+from utils.document_frame import document_view
+from utils.document_index import get_document_index
+from utils.document_store import REFRESH_MAX_AGE, get_document_store, refresh_documents
+from utils.split_warehouse import get_split_warehouse
 from components.analytics_components import (
     render_kpi_card,
     render_total_badge,
@@ -23,7 +29,6 @@ from components.analytics_components import (
 try:
     from analytics.utils.data_processing import (
         calculate_kpis as calculate_kpis_optimized,
-        filter_documents as filter_documents_optimized,
         classify_document,
     )
     from analytics.utils.caching import (
@@ -31,8 +36,6 @@ try:
         cache_cost_centers,
         get_cached_receipt_data,
         cache_receipt_data,
-        get_cached_filtered_documents,
-        cache_filtered_documents_manual,
     )
 
     PERFORMANCE_OPTIMIZATIONS_ENABLED = True
@@ -257,10 +260,14 @@ def render_analytics_page(
 
             try:
                 with st.spinner(f"📄 {t('analytics_page.loading_documents')}"):
-                    docs = client.get_all_documents(
+                    docs, sync = refresh_documents(
+                        client,
                         include_processed=include_processed_analytics,
                         include_deleted=include_deleted_analytics,
+                        max_age=REFRESH_MAX_AGE,
                     )
+                    if sync is not None:
+                        st.caption(f"Incremental refresh: {sync.summary()}")
                     st.session_state.documents = docs
                     st.session_state.analytics_load_time = datetime.now()
             except Exception as e:
@@ -275,10 +282,16 @@ def render_analytics_page(
             if PERFORMANCE_OPTIMIZATIONS_ENABLED:
                 cost_centers = get_cached_cost_centers(months_back=int(cc_months_back))
 
+            today = date.today()
+            scan_start = (today - relativedelta(months=cc_months_back - 1)).replace(
+                day=1
+            )
+            scan_end = today.replace(
+                day=calendar.monthrange(today.year, today.month)[1]
+            )
+
             if cost_centers is None:
                 try:
-                    from analytics.utils.caching import fetch_cost_centers_cached
-
                     progress_text = t(
                         "analytics_page.loading_cost_centers_months"
                     ).format(months=cc_months_back)
@@ -289,15 +302,28 @@ def render_analytics_page(
                             p, text=f"{progress_text} ({int(p*100)}%)"
                         )
 
-                    cost_centers = fetch_cost_centers_cached(
-                        client.api_key,
-                        client.base_url,
-                        int(cc_months_back),
+                    # One pass over the months yields both the cost center list
+                    # and the split rows the cost center tab shows by default
+                    scan = client.scan_months(
+                        months_back=int(cc_months_back),
                         progress_callback=ui_progress_callback,
                     )
 
                     progress_bar.empty()
 
+                    cost_centers = sorted(scan.cost_centers) if scan else []
+                    if scan and scan.complete and scan.rows:
+                        receipt_date_key = (
+                            f"{scan_start.isoformat()}_{scan_end.isoformat()}"
+                        )
+                        if PERFORMANCE_OPTIMIZATIONS_ENABLED:
+                            cache_receipt_data(scan.rows, receipt_date_key)
+                        else:
+                            st.session_state.analytics_receipt_data = scan.rows
+                            st.session_state.analytics_receipt_date_key = (
+                                receipt_date_key
+                            )
+
                     if PERFORMANCE_OPTIMIZATIONS_ENABLED and cost_centers:
                         cache_cost_centers(
                             cost_centers, months_back=int(cc_months_back)
@@ -321,14 +347,8 @@ def render_analytics_page(
                 ]
                 st.session_state.analytics_cost_centers = sorted(cleaned_cc)
 
-                today = date.today()
-                start_date = (today - relativedelta(months=cc_months_back - 1)).replace(
-                    day=1
-                )
-                end_date = today
-
-                st.session_state.analytics_cc_sync_start = start_date
-                st.session_state.analytics_cc_sync_end = end_date
+                st.session_state.analytics_cc_sync_start = scan_start
+                st.session_state.analytics_cc_sync_end = today
                 st.session_state.analytics_cc_sync_months = cc_months_back
 
                 st.toast(
@@ -556,6 +576,10 @@ def render_analytics_page(
                 unsafe_allow_html=True,
             )
 
+            # Built once per loaded list; filter changes only combine its bitmaps
+            doc_index = get_document_index(st.session_state.documents)
+            date_index = doc_index.date_index
+
             quick_filters = get_quick_date_filters()
 
             qf_cols = st.columns([1, 1, 1, 1, 1, 1, 1, 1])
@@ -563,9 +587,11 @@ def render_analytics_page(
                 quick_filters.items()
             ):
                 with qf_cols[idx]:
+                    preset_count, preset_gross, _ = date_index.totals(start_date, end_date)
                     if st.button(
                         filter_name,
                         key=f"quick_filter_{filter_name.replace(' ', '_')}",
+                        help=f"{preset_count:,} documents · €{preset_gross:,.0f}",
                         use_container_width=True,
                         type="secondary",
                     ):
@@ -590,14 +616,7 @@ def render_analytics_page(
             col1, col2, col3 = st.columns(3)
 
             with col1:
-                companies = list(
-                    set(
-                        [
-                            doc.get("companyName", "Unknown")
-                            for doc in st.session_state.documents
-                        ]
-                    )
-                )
+                companies = doc_index.values("companyName")
                 selected_company = st.selectbox(
                     t("analytics_page.company"),
                     [t("analytics_page.all")] + sorted(companies),
@@ -606,14 +625,7 @@ def render_analytics_page(
                 )
 
             with col2:
-                stages = list(
-                    set(
-                        [
-                            doc.get("currentStage", "Unknown")
-                            for doc in st.session_state.documents
-                        ]
-                    )
-                )
+                stages = doc_index.values("currentStage")
                 selected_stage = st.selectbox(
                     t("analytics_page.stage"),
                     [t("analytics_page.all")] + sorted(stages),
@@ -622,14 +634,7 @@ def render_analytics_page(
                 )
 
             with col3:
-                payment_states = list(
-                    set(
-                        [
-                            doc.get("paymentState", "Unknown")
-                            for doc in st.session_state.documents
-                        ]
-                    )
-                )
+                payment_states = doc_index.values("paymentState")
                 selected_payment = st.selectbox(
                     t("analytics_page.payment_state"),
                     [t("analytics_page.all")] + sorted(payment_states),
@@ -642,15 +647,7 @@ def render_analytics_page(
             col4, col5, col6 = st.columns(3)
 
             with col4:
-                suppliers = list(
-                    set(
-                        [
-                            doc.get("supplierName", "Unknown")
-                            for doc in st.session_state.documents
-                            if doc.get("supplierName")
-                        ]
-                    )
-                )
+                suppliers = doc_index.values("supplierName")
                 selected_supplier = st.selectbox(
                     t("analytics_page.supplier"),
                     [t("analytics_page.all")] + sorted(suppliers),
@@ -659,15 +656,7 @@ def render_analytics_page(
                 )
 
             with col5:
-                currencies = list(
-                    set(
-                        [
-                            doc.get("currencyCode", "EUR")
-                            for doc in st.session_state.documents
-                            if doc.get("currencyCode")
-                        ]
-                    )
-                )
+                currencies = doc_index.values("currencyCode")
                 selected_currency = st.selectbox(
                     t("analytics_page.currency"),
                     [t("analytics_page.all")] + sorted(currencies),
@@ -676,15 +665,7 @@ def render_analytics_page(
                 )
 
             with col6:
-                flows = list(
-                    set(
-                        [
-                            doc.get("flowName", "Unknown")
-                            for doc in st.session_state.documents
-                            if doc.get("flowName")
-                        ]
-                    )
-                )
+                flows = doc_index.values("flowName")
                 selected_flow = st.selectbox(
                     t("analytics_page.flow"),
                     [t("analytics_page.all")] + sorted(flows),
@@ -779,142 +760,29 @@ def render_analytics_page(
 
             selected_cost_centers = []
 
-        if PERFORMANCE_OPTIMIZATIONS_ENABLED:
-
-            filter_params = {
-                "company": (
-                    selected_company
-                    if selected_company != t("analytics_page.all")
-                    else None
-                ),
-                "stage": (
-                    selected_stage
-                    if selected_stage != t("analytics_page.all")
-                    else None
-                ),
-                "payment": (
-                    selected_payment
-                    if selected_payment != t("analytics_page.all")
-                    else None
-                ),
-                "supplier": (
-                    selected_supplier
-                    if selected_supplier != t("analytics_page.all")
-                    else None
-                ),
-                "currency": (
-                    selected_currency
-                    if selected_currency != t("analytics_page.all")
-                    else None
-                ),
-                "flow": (
-                    selected_flow if selected_flow != t("analytics_page.all") else None
-                ),
-                "date_from": date_from.isoformat() if date_from else None,
-                "date_to": date_to.isoformat() if date_to else None,
-                "min_value": value_threshold if value_threshold > 0 else None,
-            }
-
-            cached_filtered = get_cached_filtered_documents(filter_params)
-            if cached_filtered is not None:
-                filtered_docs = cached_filtered if cached_filtered else []
-            else:
-                filtered_docs = filter_documents_optimized(
-                    st.session_state.documents,
-                    **{k: v for k, v in filter_params.items() if v is not None},
-                )
-                if filtered_docs is None:
-                    filtered_docs = []
-                cache_filtered_documents_manual(filtered_docs, filter_params)
+        all_label = t("analytics_page.all")
+        facet_filters = {
+            "company": selected_company,
+            "stage": selected_stage,
+            "payment": selected_payment,
+            "supplier": selected_supplier,
+            "currency": selected_currency,
+            "flow": selected_flow,
+        }
+        facet_filters = {k: v for k, v in facet_filters.items() if v != all_label}
+        doc_mask = doc_index.mask(
+            **facet_filters,
+            date_from=date_from,
+            date_to=date_to,
+            min_value=value_threshold,
+        )
+        filtered_docs = doc_index.select(doc_mask)
+        # A pure date range is a slice of the sorted date index: totals are
+        # two prefix-sum lookups instead of a pass over the documents
+        if not facet_filters and not value_threshold:
+            _, total_gross, total_net = date_index.totals(date_from, date_to)
         else:
-            filtered_docs = st.session_state.documents
-
-            if selected_company != t("analytics_page.all"):
-                filtered_docs = [
-                    doc
-                    for doc in filtered_docs
-                    if doc.get("companyName") == selected_company
-                ]
-
-            if selected_stage != t("analytics_page.all"):
-                filtered_docs = [
-                    doc
-                    for doc in filtered_docs
-                    if doc.get("currentStage") == selected_stage
-                ]
-
-            if selected_payment != t("analytics_page.all"):
-                filtered_docs = [
-                    doc
-                    for doc in filtered_docs
-                    if doc.get("paymentState") == selected_payment
-                ]
-
-            if selected_supplier != t("analytics_page.all"):
-                filtered_docs = [
-                    doc
-                    for doc in filtered_docs
-                    if doc.get("supplierName") == selected_supplier
-                ]
-
-            if selected_currency != t("analytics_page.all"):
-                filtered_docs = [
-                    doc
-                    for doc in filtered_docs
-                    if doc.get("currencyCode") == selected_currency
-                ]
-
-            if selected_flow != t("analytics_page.all"):
-                filtered_docs = [
-                    doc for doc in filtered_docs if doc.get("flowName") == selected_flow
-                ]
-
-            if date_from:
-
-                def is_date_after_or_equal(doc, target_date):
-                    date_str = doc.get("invoiceDate")
-                    if not date_str:
-                        return False
-                    try:
-                        doc_date = pd.to_datetime(date_str, errors="coerce")
-                        if pd.isna(doc_date):
-                            return False
-                        return doc_date.date() >= target_date
-                    except:
-                        return False
-
-                filtered_docs = [
-                    doc
-                    for doc in filtered_docs
-                    if is_date_after_or_equal(doc, date_from)
-                ]
-
-            if date_to:
-
-                def is_date_before_or_equal(doc, target_date):
-                    date_str = doc.get("invoiceDate")
-                    if not date_str:
-                        return False
-                    try:
-                        doc_date = pd.to_datetime(date_str, errors="coerce")
-                        if pd.isna(doc_date):
-                            return False
-                        return doc_date.date() <= target_date
-                    except:
-                        return False
-
-                filtered_docs = [
-                    doc
-                    for doc in filtered_docs
-                    if is_date_before_or_equal(doc, date_to)
-                ]
-
-        if value_threshold > 0:
-            filtered_docs = [
-                doc
-                for doc in filtered_docs
-                if doc.get("totalGross", 0) >= value_threshold
-            ]
+            _, total_gross, total_net = doc_index.totals(doc_mask)
 
         docs = filtered_docs
 
@@ -960,10 +828,6 @@ def render_analytics_page(
 
         if PERFORMANCE_OPTIMIZATIONS_ENABLED:
             kpi_data = calculate_kpis_optimized(docs)
-            total_gross = kpi_data["total_gross"]
-            total_net = kpi_data["total_net"]
-            total_tax = kpi_data["total_tax"]
-            avg_invoice_value = kpi_data["avg_invoice_value"]
             approved_count = kpi_data["approved_count"]
             in_workflow = kpi_data["in_workflow"]
             draft_count = kpi_data["draft_count"]
@@ -977,11 +841,6 @@ def render_analytics_page(
                 payment = doc.get("paymentState", "Unknown")
                 payment_counts[payment] = payment_counts.get(payment, 0) + 1
         else:
-            total_gross = sum([abs(doc.get("totalGross", 0)) for doc in docs])
-            total_net = sum([abs(doc.get("totalNet", 0)) for doc in docs])
-            total_tax = total_gross - total_net
-            avg_invoice_value = total_gross / len(docs) if len(docs) > 0 else 0
-
             stage_counts = {}
             for doc in docs:
                 stage = doc.get("currentStage", "Unknown")
@@ -1005,6 +864,9 @@ def render_analytics_page(
                 "Pending", 0
             )
 
+        total_tax = total_gross - total_net
+        avg_invoice_value = total_gross / len(docs) if len(docs) > 0 else 0
+
         unique_companies = len(
             set([doc.get("companyName") for doc in docs if doc.get("companyName")])
         )
@@ -1552,21 +1414,10 @@ def render_analytics_page(
                     f'<div class="section-header" style="margin-bottom: 1rem;"><div style="background: linear-gradient(135deg, #3b82f6 0%, #2563eb 100%); width: 40px; height: 40px; border-radius: 10px; display: flex; align-items: center; justify-content: center; font-size: 20px; box-shadow: 0 4px 12px rgba(59, 130, 246, 0.3); flex-shrink: 0; margin-right: 0.5rem;">📈</div> {t("analytics_page.monthly_spending_trend")}</div>',
                     unsafe_allow_html=True,
                 )
-                timeline_data = []
-                for doc in docs_with_dates:
-                    try:
-                        timeline_data.append(
-                            {
-                                "Date": pd.to_datetime(doc.get("invoiceDate")),
-                                "Value": doc.get("totalGross", 0),
-                            }
-                        )
-                    except:
-                        pass
+                # Invoice days were parsed once when the index was built
+                df_timeline = doc_index.monthly_values(doc_mask)
 
-                if timeline_data:
-                    df_timeline = pd.DataFrame(timeline_data)
-                    df_timeline["Month"] = df_timeline["Date"].dt.strftime("%Y-%m")
+                if not df_timeline.empty:
                     monthly_trend = (
                         df_timeline.groupby("Month").agg({"Value": "sum"}).reset_index()
                     )
@@ -2232,6 +2083,27 @@ def render_analytics_page(
 
             current_date_key = f"{cc_date_from.isoformat()}_{cc_date_to.isoformat()}"
 
+            failed_months = []
+            df_warehouse = None
+            warehouse = get_split_warehouse()
+            if warehouse is not None:
+                months_progress = st.progress(0, text=t("analytics_page.loading_cc_data"))
+                try:
+                    df_warehouse = warehouse.load(
+                        client,
+                        cc_date_from.isoformat(),
+                        cc_date_to.isoformat(),
+                        cost_centers=selected_cost_centers or None,
+                        progress_callback=lambda fraction, text: months_progress.progress(
+                            fraction, text=f"{t('analytics_page.loading_cc_data')} ({text})"
+                        ),
+                    )
+                    if df_warehouse is not None:
+                        failed_months = df_warehouse.attrs.get("failed_paths", [])
+                except Exception as e:
+                    print(f"Split warehouse unavailable, loading live: {e}")
+                months_progress.empty()
+
             if PERFORMANCE_OPTIMIZATIONS_ENABLED:
                 receipt_data = get_cached_receipt_data(current_date_key)
                 if receipt_data is None:
@@ -2244,43 +2116,64 @@ def render_analytics_page(
                 if receipt_data is None:
                     receipt_data = []
 
-            if not receipt_data or len(receipt_data) == 0:
+            if df_warehouse is None and not receipt_data:
                 filter_params = {
                     "min_date": cc_date_from.isoformat(),
                     "max_date": cc_date_to.isoformat(),
                 }
-                with st.spinner(t("analytics_page.loading_cc_data")):
-                    try:
-                        receipt_report = client.get_receipt_splitting_report(
-                            **filter_params
-                        )
-                        if receipt_report:
-                            if PERFORMANCE_OPTIMIZATIONS_ENABLED:
-                                cache_receipt_data(receipt_report, current_date_key)
-                            else:
-                                st.session_state.analytics_receipt_data = receipt_report
-                                st.session_state.analytics_receipt_date_key = (
-                                    current_date_key
-                                )
-                            receipt_data = receipt_report if receipt_report else []
+                months_progress = st.progress(0, text=t("analytics_page.loading_cc_data"))
+                try:
+                    receipt_tables = client.get_receipt_splitting_report(
+                        **filter_params,
+                        normalized=True,
+                        progress_callback=lambda fraction, text: months_progress.progress(
+                            fraction, text=f"{t('analytics_page.loading_cc_data')} ({text})"
+                        ),
+                    )
+                    receipt_data = receipt_tables.rows() if receipt_tables else []
+                    if receipt_tables is not None:
+                        failed_months = receipt_tables.failed_paths
+                    # An incomplete range is shown but not cached
+                    if receipt_data and not failed_months:
+                        if PERFORMANCE_OPTIMIZATIONS_ENABLED:
+                            cache_receipt_data(receipt_data, current_date_key)
                         else:
-                            receipt_data = []
-                    except Exception as e:
-                        st.error(f"Error loading receipt data: {str(e)}")
-                        receipt_data = []
+                            st.session_state.analytics_receipt_data = receipt_data
+                            st.session_state.analytics_receipt_date_key = (
+                                current_date_key
+                            )
+                except Exception as e:
+                    st.error(f"Error loading receipt data: {str(e)}")
+                    receipt_data = []
+                months_progress.empty()
 
-            if not receipt_data or len(receipt_data) == 0:
-                st.warning(t("analytics_page.no_cc_data_found"))
-            else:
-                df_receipts = pd.DataFrame(receipt_data)
+            if failed_months:
+                st.warning(
+                    t("analytics_page.months_failed").format(
+                        count=len(failed_months),
+                        months=", ".join(sorted(p.rsplit("/", 1)[-1] for p in failed_months)),
+                    )
+                )
 
-                filtered_receipts = receipt_data
+            if df_warehouse is not None:
+                # Cost centers were already filtered while reading the partitions
+                filtered_receipts = df_warehouse
+                has_receipts = not df_warehouse.empty or bool(selected_cost_centers)
+            else:
+                filtered_receipts = receipt_data or []
+                has_receipts = bool(filtered_receipts)
 
-                if selected_cost_centers:
+            if not has_receipts:
+                st.warning(t("analytics_page.no_cc_data_found"))
+            else:
+                if df_warehouse is None and selected_cost_centers:
+                    # Cached rows cover every cost center of the range, so the
+                    # selection can change without reloading; one set lookup per row
+                    wanted = {str(cc) for cc in selected_cost_centers}
                     filtered_receipts = [
                         r
                         for r in filtered_receipts
-                        if str(r.get("costCenter", "")) in selected_cost_centers
+                        if str(r.get("costCenter", "")) in wanted
                     ]
 
                 if len(filtered_receipts) == 0:
@@ -2313,102 +2206,42 @@ def render_analytics_page(
                             df_filtered[amount_col], errors="coerce"
                         ).fillna(0)
 
-                        if "analytics_doc_type_cache" not in st.session_state:
-                            st.session_state.analytics_doc_type_cache = {}
-
-                        doc_type_cache = st.session_state.analytics_doc_type_cache
-                        unique_doc_ids = [
-                            int(x)
-                            for x in pd.Series(df_filtered["documentId"])
-                            .dropna()
-                            .unique()
-                        ]
-
-                        missing_ids = [
-                            doc_id
-                            for doc_id in unique_doc_ids
-                            if doc_id not in doc_type_cache
-                        ]
+                        detail_store = get_detail_store()
+                        unique_doc_ids = pd.Series(df_filtered["documentId"]).dropna().unique()
+                        doc_stamps = stage_timestamps(
+                            get_document_store().peek(client), df_filtered
+                        )
+                        missing_ids = detail_store.pending(client, unique_doc_ids, doc_stamps)
 
+                        progress_bar = None
+                        update_progress = None
                         if missing_ids:
-                            # Replace spinner with progress bar
                             progress_text = t(
                                 "analytics_page.enriching_documents_type"
                             ).format(count=len(missing_ids))
                             progress_bar = st.progress(0, text=progress_text)
 
-                            import concurrent.futures
-
-                            def fetch_doc_type(d_id):
-                                try:
-                                    detail = client.get_document(int(d_id))
-                                    if detail:
-                                        return (
-                                            d_id,
-                                            detail.get("documentType")
-                                            or detail.get("documentKind")
-                                            or "",
-                                        )
-                                except Exception:
-                                    pass
-                                return d_id, ""
-
-                            max_workers = min(len(missing_ids), 20)
-                            processed_count = 0
-                            total_docs = len(missing_ids)
-
-                            with concurrent.futures.ThreadPoolExecutor(
-                                max_workers=max_workers
-                            ) as executor:
-                                future_to_doc = {
-                                    executor.submit(fetch_doc_type, doc_id): doc_id
-                                    for doc_id in missing_ids
-                                }
-                                for future in concurrent.futures.as_completed(
-                                    future_to_doc
-                                ):
-                                    processed_count += 1
-                                    progress_bar.progress(
-                                        processed_count / total_docs,
-                                        text=f"{progress_text} ({processed_count}/{total_docs})",
-                                    )
-                                    try:
-                                        d_id, d_type = future.result()
-                                        doc_type_cache[d_id] = d_type
-                                    except Exception:
-                                        doc_type_cache[future_to_doc[future]] = ""
+                            def update_progress(fraction, text):
+                                progress_bar.progress(
+                                    fraction, text=f"{progress_text} ({text})"
+                                )
 
+                        doc_type_map = detail_store.get_field(
+                            client,
+                            unique_doc_ids,
+                            DOCUMENT_TYPE_FIELDS,
+                            stage_timestamps=doc_stamps,
+                            progress_callback=update_progress,
+                        )
+                        if progress_bar is not None:
                             progress_bar.empty()
-                            st.session_state.analytics_doc_type_cache = doc_type_cache
 
                         df_filtered["_documentType"] = df_filtered["documentId"].map(
-                            doc_type_cache
+                            doc_type_map
                         )
 
-                        def classify_row(row):
-                            doc_type = str(
-                                row.get("_documentType")
-                                or row.get("documentType")
-                                or row.get("documentKind")
-                                or ""
-                            ).lower()
-                            amount = row[amount_col]
-                            if (
-                                "ausgangsrechnung" in doc_type
-                                or "outgoinginvoice" in doc_type
-                                or "ausgang" in doc_type
-                            ):
-                                return "income"
-                            if (
-                                "eingangsrechnung" in doc_type
-                                or "incominginvoice" in doc_type
-                                or "eingang" in doc_type
-                            ):
-                                return "cost"
-                            return "income" if amount < 0 else "cost"
-
-                        df_filtered["__category"] = df_filtered.apply(
-                            classify_row, axis=1
+                        df_filtered["__category"] = classify_frame(
+                            df_filtered, amount_col, rules=DIRECTION_RULES
                         )
 
                         cost_total = (
@@ -2635,41 +2468,18 @@ def render_analytics_page(
 
                         st.markdown("<br>", unsafe_allow_html=True)
 
-                        enriched_df = df_filtered.copy()
-                        enriched_df["cc_parsed"] = enriched_df[cost_center_col].apply(
-                            parse_cost_center
-                        )
-                        enriched_df["cc_display"] = enriched_df["cc_parsed"].apply(
-                            lambda x: x["display_name"]
-                        )
-                        enriched_df["cc_number"] = enriched_df[cost_center_col].astype(
-                            str
-                        )
-
-                        def calc_cc_metrics(group):
-                            income = (
-                                group.loc[group["__category"] == "income", amount_col]
-                                .apply(abs)
-                                .sum()
-                            )
-                            cost = (
-                                group.loc[group["__category"] == "cost", amount_col]
-                                .apply(abs)
-                                .sum()
-                            )
-                            margin = income - cost
-                            return pd.Series(
-                                {"income": income, "cost": cost, "margin": margin}
-                            )
-
-                        cc_breakdown = (
-                            enriched_df.groupby(["cc_number", "cc_display"])
-                            .apply(calc_cc_metrics)
-                            .reset_index()
+                        company_col = next(
+                            (
+                                col
+                                for col in ("companyName", "supplierName")
+                                if col in df_filtered.columns
+                            ),
+                            None,
                         )
-                        cc_breakdown = cc_breakdown.sort_values(
-                            "margin", ascending=False
+                        cc_pnl = CostCenterPnL(
+                            df_filtered, amount_col, cost_center_col, company_col=company_col
                         )
+                        cc_breakdown = cc_pnl.by_cost_center()
 
                         col_split_header1, col_split_header2 = st.columns([4, 1])
                         with col_split_header1:
@@ -2879,7 +2689,7 @@ def render_analytics_page(
                         )
 
                         rows_html = []
-                        for _, row in cc_breakdown.iterrows():
+                        for row in cc_breakdown.to_dict(orient="records"):
                             cc_num = row["cc_number"]
                             cc_name = row["cc_display"]
                             inc_fmt = f'<span style="color:{"#dc2626" if row["income"] < 0 else "#16a34a"}">{row["income"]:,.2f} €</span>'
@@ -2921,52 +2731,10 @@ def render_analytics_page(
                             unsafe_allow_html=True,
                         )
 
-                        if (
-                            "companyName" in df_filtered.columns
-                            or "supplierName" in df_filtered.columns
-                        ):
-                            company_col = (
-                                "companyName"
-                                if "companyName" in df_filtered.columns
-                                else "supplierName"
-                            )
-
-                            company_cc_data = []
-                            for company in df_filtered[company_col].dropna().unique():
-                                company_df = df_filtered[
-                                    df_filtered[company_col] == company
-                                ]
-                                company_income = (
-                                    company_df.loc[
-                                        company_df["__category"] == "income", amount_col
-                                    ]
-                                    .apply(abs)
-                                    .sum()
-                                )
-                                company_cost = (
-                                    company_df.loc[
-                                        company_df["__category"] == "cost", amount_col
-                                    ]
-                                    .apply(abs)
-                                    .sum()
-                                )
-                                company_margin = company_income - company_cost
-                                company_cc_count = company_df[cost_center_col].nunique()
-
-                                company_cc_data.append(
-                                    {
-                                        "Company": company,
-                                        "Cost Centers": company_cc_count,
-                                        "Income": company_income,
-                                        "Cost": company_cost,
-                                        "Margin": company_margin,
-                                        "Records": len(company_df),
-                                    }
-                                )
-
-                            if company_cc_data:
-                                company_cc_df = pd.DataFrame(company_cc_data)
+                        if company_col is not None:
+                            company_cc_df = cc_pnl.by_company()
 
+                            if not company_cc_df.empty:
                                 col_sort1, col_sort2 = st.columns([1, 3])
                                 with col_sort1:
                                     try:
@@ -3037,8 +2805,8 @@ def render_analytics_page(
                                 company_cols = st.columns(
                                     3
                                 )  # Always 3 columns, will wrap
-                                for idx, (_, row) in enumerate(
-                                    company_cc_df.head(6).iterrows()
+                                for idx, row in enumerate(
+                                    company_cc_df.head(6).to_dict(orient="records")
                                 ):
                                     with company_cols[idx % 3]:
                                         margin_color = (
@@ -3124,30 +2892,32 @@ def render_analytics_page(
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-        df_export = pd.DataFrame(
-            [
-                {
-                    "Document ID": doc.get("documentId"),
-                    "Supplier": doc.get("supplierName"),
-                    "Company": doc.get("companyName"),
-                    "Flow": doc.get("flowName"),
-                    "Invoice Date": doc.get("invoiceDate"),
-                    "Due Date": doc.get("dueDate"),
-                    "Total Gross": doc.get("totalGross"),
-                    "Total Net": doc.get("totalNet"),
-                    "Tax Amount": doc.get("totalGross", 0) - doc.get("totalNet", 0),
-                    "Currency": doc.get("currencyCode"),
-                    "Stage": doc.get("currentStage"),
-                    "Payment State": doc.get("paymentState"),
-                    "Created Date": doc.get("createdDate"),
-                }
-                for doc in docs
-            ]
+        df_export = document_view(
+            doc_index.frame,
+            {
+                "documentId": "Document ID",
+                "supplierName": "Supplier",
+                "companyName": "Company",
+                "flowName": "Flow",
+                "invoiceDate": "Invoice Date",
+                "dueDate": "Due Date",
+                "totalGross": "Total Gross",
+                "totalNet": "Total Net",
+                "currencyCode": "Currency",
+                "currentStage": "Stage",
+                "paymentState": "Payment State",
+                "createdDate": "Created Date",
+            },
+            rows=doc_mask,
+        )
+        df_export.insert(
+            df_export.columns.get_loc("Total Net") + 1,
+            "Tax Amount",
+            df_export["Total Gross"].fillna(0) - df_export["Total Net"].fillna(0),
         )
 
-        if docs_with_dates and timeline_data:
-            df_timeline = pd.DataFrame(timeline_data)
-            df_timeline["Month"] = df_timeline["Date"].dt.strftime("%Y-%m")
+        df_timeline = doc_index.monthly_values(doc_mask)
+        if not df_timeline.empty:
             monthly_summary = (
                 df_timeline.groupby("Month")
                 .agg({"Value": ["sum", "mean", "count", "min", "max"]})
@@ -3,9 +3,11 @@ Approved Documents Page Module
 """
 
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 import json
+import numpy as np
+from utils.document_frame import document_view, get_document_frame, to_document_frame
+from utils.document_store import get_document_store
 
 
 def normalize_dict(obj):
@@ -118,13 +120,20 @@ def render_approved_docs_page(
         ):
             with st.spinner(t("approved_docs_page.loading")):
                
-                all_docs_cache = st.session_state.get("documents")
+                all_docs_cache = st.session_state.get(
+                    "documents"
+                ) or get_document_store().peek(client)
                 docs = None
-                
+                frame = rows = None
+
                 if all_docs_cache:
-                    docs = [d for d in all_docs_cache if d.get("currentStage") == "Approved"]
-                    if selected_flow_id:
-                        docs = [d for d in docs if d.get("flowId") == selected_flow_id]
+                    # Rows of the shared typed frame; no per-load copy or conversion
+                    frame = get_document_frame(all_docs_cache)
+                    mask = frame["currentStage"] == "Approved" if "currentStage" in frame else None
+                    if mask is not None and selected_flow_id and "flowId" in frame:
+                        mask = mask & (frame["flowId"] == selected_flow_id).fillna(False)
+                    rows = np.flatnonzero(mask.to_numpy(dtype=bool)) if mask is not None else np.array([], dtype=int)
+                    docs = [all_docs_cache[i] for i in rows]
                 else:
                 
                     try:
@@ -132,16 +141,19 @@ def render_approved_docs_page(
                     except Exception as e:
                         print(f"Dedicated endpoint failed, falling back: {e}")
                         docs = client.get_approved_documents(flow_id=selected_flow_id, use_filter_method=True)
+                    if docs is not None:
+                        docs = [
+                            normalized_doc
+                            for normalized_doc in map(normalize_dict, docs)
+                            if normalized_doc and isinstance(normalized_doc, dict)
+                        ]
+                        frame = to_document_frame(docs)
                 
                 if docs is not None:
-                    normalized_docs = []
-                    for doc in docs:
-                        normalized_doc = normalize_dict(doc)
-                        if normalized_doc and isinstance(normalized_doc, dict):
-                            normalized_docs.append(normalized_doc)
-                    st.session_state.approved_documents = normalized_docs
-                    if normalized_docs:
-                        st.success(f"{len(normalized_docs)} " + t("approved_docs_page.found"))
+                    st.session_state.approved_documents = docs
+                    st.session_state.approved_documents_view = (frame, rows)
+                    if docs:
+                        st.success(f"{len(docs)} " + t("approved_docs_page.found"))
                     else:
                         st.info("ℹ️ No approved documents found. The API returned an empty list.")
                 else:
@@ -149,31 +161,38 @@ def render_approved_docs_page(
 
     if "approved_documents" in st.session_state and st.session_state.approved_documents:
         docs = st.session_state.approved_documents
-
-        df_data = []
-        for doc in docs:
-            df_data.append(
-                {
-                    "Document ID": doc.get("documentId"),
-                    "Name": doc.get("simpleName", "N/A"),
-                    "Company": doc.get("companyName", "N/A"),
-                    "Flow": doc.get("flowName", "N/A"),
-                    "Invoice #": doc.get("invoiceNumber", "N/A"),
-                    "Invoice Date": doc.get("invoiceDate", "N/A"),
-                    "Total Gross": doc.get("totalGross", 0),
-                    "Currency": doc.get("currencyCode", "EUR"),
-                    "Supplier": doc.get("supplierName", "N/A"),
-                    "Payment State": doc.get("paymentState", "N/A"),
-                }
-            )
-
-        df = pd.DataFrame(df_data)
-
-        if "Invoice Date" in df.columns:
-            df["Invoice Date"] = pd.to_datetime(
-                df["Invoice Date"], errors="coerce"
-            ).dt.strftime("%Y-%m-%d")
-            df["Invoice Date"] = df["Invoice Date"].fillna("")
+        frame, rows = st.session_state.get("approved_documents_view") or (None, None)
+        if frame is None:
+            frame, rows = to_document_frame(docs), None
+            st.session_state.approved_documents_view = (frame, rows)
+
+        df = document_view(
+            frame,
+            {
+                "documentId": "Document ID",
+                "simpleName": "Name",
+                "companyName": "Company",
+                "flowName": "Flow",
+                "invoiceNumber": "Invoice #",
+                "invoiceDate": "Invoice Date",
+                "totalGross": "Total Gross",
+                "currencyCode": "Currency",
+                "supplierName": "Supplier",
+                "paymentState": "Payment State",
+            },
+            rows=rows,
+            defaults={
+                "Name": "N/A",
+                "Company": "N/A",
+                "Flow": "N/A",
+                "Invoice #": "N/A",
+                "Total Gross": 0,
+                "Currency": "EUR",
+                "Supplier": "N/A",
+                "Payment State": "N/A",
+            },
+            date_format="%Y-%m-%d",
+        )
 
         st.dataframe(df, use_container_width=True, height=500)
 
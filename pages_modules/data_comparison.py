@@ -9,6 +9,249 @@ from datetime import datetime, timedelta
 import os
 import plotly.express as px
 import plotly.graph_objects as go
+from utils.document_details import (
+    CURRENCY_FIELDS,
+    INVOICE_NUMBER_FIELDS,
+    get_detail_store,
+    stage_timestamps,
+)
+from utils.document_store import get_document_store
+from utils.fx_rates import FALLBACK_RATES, get_fx_rates
+from utils.reconciliation import RESULT_COLUMNS, reconcile_invoices
+from utils.split_warehouse import get_split_warehouse
+from utils.stage_cache import StageCache, fingerprint
+
+ALL_COST_CENTERS = "All Cost Centers"
+
+# Flowwer stages that are compared against DATEV
+VALID_STAGES = ["Processed", "Draft", "Approved"]
+
+COST_CENTER_COLUMNS = ["costCenter", "CostCenter", "cost_center"]
+INVOICE_NUMBER_COLUMNS = [
+    "invoiceNumber",
+    "invoice_number",
+    "InvoiceNumber",
+    "receiptNumber",
+    "receipt_number",
+]
+DOCUMENT_ID_COLUMNS = ["documentId", "document_id", "DocumentId", "id", "Id"]
+INVOICE_DATE_COLUMNS = ["invoiceDate", "invoice_date", "InvoiceDate", "date", "Date"]
+AMOUNT_COLUMNS = [
+    "grossValue",
+    "netValue",
+    "grossAmount",
+    "netAmount",
+    "amount",
+    "value",
+    "total",
+]
+
+
+def _first_column(df, candidates):
+    """First of the candidate column names present in df, or None"""
+    return next((col for col in candidates if col in df.columns), None)
+
+
+def _has_invoice_number(numbers):
+    """Rows with a usable invoice number"""
+    return numbers.notna() & ~numbers.isin(["", "0", "nan", "None"])
+
+
+def _parse_amount(value):
+    """DATEV amount text as float; "(x)" is negative, empty values are 0"""
+    text = str(value)
+    if "(" in text and ")" in text:
+        return -float(text.replace("(", "").replace(")", "").replace(",", "").strip())
+    if text.strip() and text != "nan" and text != "None":
+        return float(text.replace(",", "").strip())
+    return 0
+
+
+def _filter_cost_center(df, cost_center):
+    """Flowwer rows of one cost center (all rows for "All Cost Centers")"""
+    cost_center_col = _first_column(df, COST_CENTER_COLUMNS)
+    if cost_center == ALL_COST_CENTERS or cost_center_col is None:
+        return df
+    return df[df[cost_center_col] == cost_center]
+
+
+def _clean_excel(df_excel):
+    """DATEV rows with Invoice_Number, Invoice_Date, Cost_Center, Buchungstext and Amount"""
+    df_clean = df_excel.copy()
+    df_clean["Invoice_Number"] = df_clean["Belegfeld 1"].astype(str).str.strip()
+    df_clean["Invoice_Date"] = pd.to_datetime(df_clean["Belegdatum"], errors="coerce")
+    df_clean["Cost_Center"] = (
+        pd.to_numeric(df_clean["KOST1 - Kostenstelle"], errors="coerce")
+        .fillna(0)
+        .astype(int)
+        .astype(str)
+        .str.replace("^0$", "", regex=True)
+    )
+    if "Buchungstext" in df_clean.columns:
+        df_clean["Buchungstext"] = df_clean["Buchungstext"].astype(str).str.strip()
+    else:
+        df_clean["Buchungstext"] = ""
+    df_clean["Amount"] = df_clean["Amount"].astype(str).map(_parse_amount)
+    return df_clean[_has_invoice_number(df_clean["Invoice_Number"])]
+
+
+def _select_excel(df_clean, cost_center):
+    """Cleaned DATEV rows of one cost center"""
+    if cost_center == ALL_COST_CENTERS:
+        return df_clean
+    return df_clean[df_clean["Cost_Center"] == cost_center]
+
+
+def _enrich_flowwer(client, df_flowwer, doc_id_col, progress_callback):
+    """
+    Flowwer rows with Invoice_Number, Invoice_Date, Cost_Center and Amount
+
+    Invoice numbers missing from the report are looked up in the shared
+    detail store for all loaded documents, so changing the cost center
+    filter afterwards needs no further requests.
+    """
+    df_enriched = df_flowwer.copy()
+
+    invoice_number_col = _first_column(df_enriched, INVOICE_NUMBER_COLUMNS)
+    if invoice_number_col:
+        df_enriched["Invoice_Number"] = df_enriched[invoice_number_col].astype(str).str.strip()
+    else:
+        doc_id_col = doc_id_col or _first_column(df_enriched, DOCUMENT_ID_COLUMNS)
+        if doc_id_col and len(df_enriched) > 0:
+            invoice_numbers = get_detail_store().get_field(
+                client,
+                df_enriched[doc_id_col].dropna().unique(),
+                INVOICE_NUMBER_FIELDS,
+                stage_timestamps=stage_timestamps(get_document_store().peek(client), df_enriched),
+                progress_callback=progress_callback,
+            )
+            df_enriched["Invoice_Number"] = (
+                df_enriched[doc_id_col]
+                .map({k: str(v).strip() for k, v in invoice_numbers.items()})
+                .fillna("")
+            )
+        else:
+            df_enriched["Invoice_Number"] = ""
+
+    invoice_date_col = _first_column(df_enriched, INVOICE_DATE_COLUMNS)
+    if invoice_date_col:
+        df_enriched["Invoice_Date"] = pd.to_datetime(
+            df_enriched[invoice_date_col], errors="coerce"
+        ).dt.tz_localize(None)
+    else:
+        df_enriched["Invoice_Date"] = pd.NaT
+
+    cost_center_col = _first_column(df_enriched, COST_CENTER_COLUMNS)
+    if cost_center_col:
+        df_enriched["Cost_Center"] = df_enriched[cost_center_col].astype(str).str.strip()
+    else:
+        df_enriched["Cost_Center"] = ""
+
+    amount_col = _first_column(df_enriched, AMOUNT_COLUMNS)
+    if amount_col:
+        df_enriched["Amount"] = pd.to_numeric(df_enriched[amount_col], errors="coerce")
+    else:
+        df_enriched["Amount"] = 0
+    return df_enriched
+
+
+def _select_flowwer(df_enriched, cost_center, from_date, to_date, t):
+    """
+    Enriched Flowwer rows to compare: cost center, stage, invoice number and
+    date range filters, PLN amounts converted to EUR
+
+    Returns:
+        (rows, notes) where notes are (streamlit message function, text)
+        pairs to show with the result
+    """
+    notes = []
+    df_clean = _filter_cost_center(df_enriched, cost_center)
+
+    if "currentStage" in df_clean.columns:
+        before_stage_filter = len(df_clean)
+        df_clean = df_clean[df_clean["currentStage"].isin(VALID_STAGES)]
+        if before_stage_filter > 0 and len(df_clean) == 0:
+            notes.append(
+                (
+                    "warning",
+                    t("data_comparison_page.all_filtered_warning").format(count=before_stage_filter),
+                )
+            )
+
+    missing_dates = df_clean["Invoice_Date"].isna().sum()
+    if missing_dates > 0:
+        notes.append(
+            (
+                "warning",
+                t("data_comparison_page.missing_dates_warning").format(count=f"{missing_dates:,}"),
+            )
+        )
+
+    before_invoice_filter = len(df_clean)
+    df_clean = df_clean[_has_invoice_number(df_clean["Invoice_Number"])]
+    after_invoice_filter = len(df_clean)
+
+    before_date_filter = len(df_clean)
+    df_clean = df_clean[
+        df_clean["Invoice_Date"].notna()
+        & (df_clean["Invoice_Date"] >= from_date)
+        & (df_clean["Invoice_Date"] <= to_date)
+    ].copy()
+    after_date_filter = len(df_clean)
+
+    if before_date_filter > after_date_filter:
+        notes.append(
+            (
+                "info",
+                t("data_comparison_page.filtered_out_info").format(
+                    count=f"{before_date_filter - after_date_filter:,}",
+                    start=from_date.strftime("%Y-%m-%d"),
+                    end=to_date.strftime("%Y-%m-%d"),
+                ),
+            )
+        )
+    if after_date_filter == 0 and before_date_filter > 0:
+        notes.append(
+            (
+                "warning",
+                t("data_comparison_page.all_filtered_date_warning").format(count=f"{before_date_filter:,}"),
+            )
+        )
+
+    if "currencyCode" in df_clean.columns:
+        pln_mask = df_clean["currencyCode"].str.upper().isin(["PL", "PLN"])
+        if pln_mask.any():
+            converted, fallback_rows = get_fx_rates("PLN").to_eur(
+                df_clean.loc[pln_mask, "Amount"],
+                df_clean.loc[pln_mask, "Invoice_Date"],
+            )
+            df_clean.loc[pln_mask, "Amount"] = converted
+            if fallback_rows:
+                notes.append(
+                    (
+                        "warning",
+                        t("data_comparison_page.fx_fallback_warning").format(
+                            count=f"{fallback_rows:,}", rate=FALLBACK_RATES["PLN"]
+                        ),
+                    )
+                )
+
+    if before_invoice_filter > 0 and after_invoice_filter == 0:
+        notes.append(
+            (
+                "warning",
+                t("data_comparison_page.all_filtered_inv_warning").format(count=before_invoice_filter),
+            )
+        )
+    return df_clean, notes
+
+
+def _aggregate(df_clean, keys):
+    """One row per key combination: first date and cost center, summed amount"""
+    return df_clean.groupby(keys, as_index=False, dropna=False).agg(
+        {"Invoice_Date": "first", "Cost_Center": "first", "Amount": "sum"}
+    )
+
 
 
 def render_data_comparison_page(
@@ -17,7 +260,6 @@ def render_data_comparison_page(
     get_page_header_indigo,
     get_action_bar_styles,
     to_excel,
-    get_pln_eur_rate,
     IN_PRODUCTION,
 ):
     """Render the Data Comparison page for cross-checking DATEV and Flowwer data"""
@@ -262,8 +504,8 @@ def render_data_comparison_page(
                 "excel_data", "flowwer_data", "comparison_results",
                 "df_excel_aggregated", "df_flowwer_aggregated",
                 "df_excel_clean_for_inspector", "df_flowwer_clean_for_inspector",
-                "currency_cache", "invoice_number_cache",
-                "comparison_cc_multiselect", "selected_cost_center"
+                "comparison_cc_multiselect", "selected_cost_center",
+                "comparison_stages"
             ]
             for key in keys_to_clear:
                 if key in st.session_state:
@@ -353,47 +595,53 @@ def render_data_comparison_page(
                 progress_bar.progress(0.50)
                 
                 filter_params = {"min_date": from_date.isoformat(), "max_date": search_max_date.isoformat()}
-                report = client.get_receipt_splitting_report(**filter_params)
+                df_flowwer = None
+                warehouse = get_split_warehouse()
+                if warehouse is not None:
+                    # Month partitions on disk; the cost-center filter is pushed into the read
+                    try:
+                        df_flowwer = warehouse.load(
+                            client,
+                            cost_centers=selected_cost_centers or None,
+                            **filter_params,
+                        )
+                    except Exception as e:
+                        print(f"Split warehouse unavailable, loading live: {e}")
+                        df_flowwer = None
+                if df_flowwer is None:
+                    report = client.get_receipt_splitting_report(
+                        **filter_params,
+                        cost_center=selected_cost_centers or None,
+                        normalized=True,
+                    )
+                    df_flowwer = report.to_frame() if report else None
                 progress_bar.progress(0.65)
 
-                if selected_cost_centers and len(selected_cost_centers) > 0 and report:
-                    cost_center_field = next((f for f in ["costCenter", "CostCenter", "cost_center"] if report and len(report) > 0 and f in report[0]), None)
-                    if cost_center_field:
-                        report = [r for r in report if str(r.get(cost_center_field, "")) in selected_cost_centers]
-
-                if report:
-                    df_flowwer = pd.DataFrame(report)
+                if df_flowwer is not None and not df_flowwer.empty:
                     progress_text.text(f"Downloaded {len(df_flowwer)} Flowwer records.")
                     progress_bar.progress(0.70)
                     
                     doc_id_col = next((c for c in ["documentId", "document_id", "id", "Id"] if c in df_flowwer.columns), None)
                     st.session_state.flowwer_doc_id_col = doc_id_col
                     
-                    currency_cache = st.session_state.get("currency_cache", {})
                     if doc_id_col:
                         progress_text.text("Verifying currency codes...")
                         progress_bar.progress(0.75)
-                        
-                        unique_ids = df_flowwer[doc_id_col].unique()
-                        missing = [did for did in unique_ids if did not in currency_cache]
-                        if missing:
-                            import concurrent.futures
-                            with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                                f_to_id = {executor.submit(client.get_document, did): did for did in missing}
-                                completed = 0
-                                total = len(f_to_id)
-                                for f in concurrent.futures.as_completed(f_to_id):
-                                    did = f_to_id[f]
-                                    try:
-                                        res = f.result()
-                                        currency_cache[did] = res.get("currencyCode", "EUR") if res else "EUR"
-                                    except: 
-                                        currency_cache[did] = "EUR"
-                                    completed += 1
-                                    progress_bar.progress(0.75 + (completed / total) * 0.15)
-                            st.session_state.currency_cache = currency_cache
-                    
-                    df_flowwer["currencyCode"] = df_flowwer[doc_id_col].map(currency_cache).fillna("EUR") if doc_id_col else "EUR"
+
+                        # Shared detail store: only unknown or re-staged documents are fetched
+                        currencies = get_detail_store().get_field(
+                            client,
+                            df_flowwer[doc_id_col].dropna().unique(),
+                            CURRENCY_FIELDS,
+                            default="EUR",
+                            stage_timestamps=stage_timestamps(
+                                get_document_store().peek(client), df_flowwer
+                            ),
+                            progress_callback=lambda fraction, _text: progress_bar.progress(0.75 + fraction * 0.15),
+                        )
+                        df_flowwer["currencyCode"] = df_flowwer[doc_id_col].map(currencies).fillna("EUR")
+                    else:
+                        df_flowwer["currencyCode"] = "EUR"
                     st.session_state.flowwer_data = df_flowwer
 
                     cost_center_col = None
@@ -499,21 +747,10 @@ def render_data_comparison_page(
         )
 
         df_excel = st.session_state.excel_data
-        df_flowwer = st.session_state.flowwer_data
-
-        if (
-            "selected_cost_center" in st.session_state
-            and st.session_state.selected_cost_center != "All Cost Centers"
-        ):
-            cost_center_col = None
-            for col in ["costCenter", "CostCenter", "cost_center"]:
-                if col in df_flowwer.columns:
-                    cost_center_col = col
-                    break
-            if cost_center_col:
-                df_flowwer = df_flowwer[
-                    df_flowwer[cost_center_col] == st.session_state.selected_cost_center
-                ].copy()
+        df_flowwer = _filter_cost_center(
+            st.session_state.flowwer_data,
+            st.session_state.get("selected_cost_center", ALL_COST_CENTERS),
+        )
 
         col1, col2 = st.columns(2)
         with col1:
@@ -552,333 +789,71 @@ def render_data_comparison_page(
                 key="amount_tolerance"
             )
         
-        if compare_button:
+        if compare_button or st.session_state.get("comparison_results") is not None:
+            # Stages rerun only when their inputs changed: a new tolerance
+            # re-matches, a new cost center re-filters and re-aggregates, and
+            # the loaded data is only cleaned and enriched once per sync
+            stages = st.session_state.setdefault("comparison_stages", StageCache())
+            df_flowwer_loaded = st.session_state.flowwer_data
+            selected_cc = st.session_state.get("selected_cost_center", ALL_COST_CENTERS)
+            doc_id_col = st.session_state.get("flowwer_doc_id_col")
+
             with st.spinner(t("data_comparison_page.checking_spinner")):
-                df_excel_clean = df_excel.copy()
+                st.session_state.df_excel_clean_for_inspector = df_excel
+                st.session_state.df_flowwer_clean_for_inspector = df_flowwer_loaded
 
-                st.session_state.df_excel_clean_for_inspector = df_excel_clean.copy()
-                df_excel_clean["Invoice_Number"] = (
-                    df_excel_clean["Belegfeld 1"].astype(str).str.strip()
+                excel_clean_key = fingerprint(df_excel)
+                df_excel_prepared = stages.run(
+                    "excel_clean", excel_clean_key, lambda: _clean_excel(df_excel)
                 )
-                df_excel_clean["Invoice_Date"] = pd.to_datetime(
-                    df_excel_clean["Belegdatum"], errors="coerce"
+                excel_select_key = fingerprint(excel_clean_key, selected_cc)
+                df_excel_clean = stages.run(
+                    "excel_select",
+                    excel_select_key,
+                    lambda: _select_excel(df_excel_prepared, selected_cc),
                 )
-                df_excel_clean["Cost_Center"] = (
-                    pd.to_numeric(
-                        df_excel_clean["KOST1 - Kostenstelle"], errors="coerce"
-                    )
-                    .fillna(0)
-                    .astype(int)
-                    .astype(str)
-                    .str.replace("^0$", "", regex=True)
+                excel_aggregate_key = fingerprint(excel_select_key)
+                df_excel_aggregated = stages.run(
+                    "excel_aggregate",
+                    excel_aggregate_key,
+                    lambda: _aggregate(df_excel_clean, ["Invoice_Number", "Buchungstext"]),
                 )
 
-                if "Buchungstext" in df_excel_clean.columns:
-                    df_excel_clean["Buchungstext"] = (
-                        df_excel_clean["Buchungstext"].astype(str).str.strip()
-                    )
-                else:
-                    df_excel_clean["Buchungstext"] = ""
+                def enrich_flowwer():
+                    progress_bar = st.progress(0)
+                    status_text = st.empty()
 
-                df_excel_clean["Amount"] = df_excel_clean["Amount"].astype(str)
-                df_excel_clean["Amount"] = df_excel_clean["Amount"].apply(
-                    lambda x: (
-                        -float(
-                            x.replace("(", "").replace(")", "").replace(",", "").strip()
-                        )
-                        if "(" in str(x) and ")" in str(x)
-                        else (
-                            float(str(x).replace(",", "").strip())
-                            if str(x).strip() and str(x) != "nan" and str(x) != "None"
-                            else 0
-                        )
-                    )
-                )
+                    def update_progress(fraction, text):
+                        progress_bar.progress(fraction)
+                        status_text.text(f"Fetching invoice numbers: {text}")
 
-                df_excel_clean = df_excel_clean[
-                    (df_excel_clean["Invoice_Number"] != "")
-                    & (df_excel_clean["Invoice_Number"] != "0")
-                    & (df_excel_clean["Invoice_Number"] != "nan")
-                    & (df_excel_clean["Invoice_Number"] != "None")
-                    & (df_excel_clean["Invoice_Number"].notna())
-                ]
+                    try:
+                        return _enrich_flowwer(client, df_flowwer_loaded, doc_id_col, update_progress)
+                    finally:
+                        progress_bar.empty()
+                        status_text.empty()
 
-                if (
-                    "selected_cost_center" in st.session_state
-                    and st.session_state.selected_cost_center != "All Cost Centers"
-                ):
-                    df_excel_clean = df_excel_clean[
-                        df_excel_clean["Cost_Center"]
-                        == st.session_state.selected_cost_center
-                    ].copy()
-
-                df_excel_aggregated = (
-                    df_excel_clean.groupby(
-                        ["Invoice_Number", "Buchungstext"],
-                        as_index=False,
-                        dropna=False,
-                    )
-                    .agg(
-                        {
-                            "Invoice_Date": "first",
-                            "Cost_Center": "first",
-                            "Amount": "sum",
-                        }
-                    )
-                    .copy()
+                flowwer_enrich_key = fingerprint(df_flowwer_loaded, doc_id_col)
+                df_flowwer_prepared = stages.run(
+                    "flowwer_enrich", flowwer_enrich_key, enrich_flowwer
                 )
-
-                df_flowwer_clean = df_flowwer.copy()
-
-                st.session_state.df_flowwer_clean_for_inspector = (
-                    df_flowwer_clean.copy()
+                flowwer_select_key = fingerprint(
+                    flowwer_enrich_key, selected_cc, from_date, to_date
                 )
-
-                initial_count = len(df_flowwer_clean)
-
-                if "currentStage" in df_flowwer_clean.columns:
-                    before_stage_filter = len(df_flowwer_clean)
-                    valid_stages = ["Processed", "Draft", "Approved"]
-                    df_flowwer_clean = df_flowwer_clean[
-                        df_flowwer_clean["currentStage"].isin(valid_stages)
-                    ].copy()
-                    after_stage_filter = len(df_flowwer_clean)
-
-                    if before_stage_filter > 0 and after_stage_filter == 0:
-                        unique_stages = (
-                            df_flowwer["currentStage"].unique()
-                            if "currentStage" in df_flowwer.columns
-                            else []
-                        )
-                        st.warning(
-                            t("data_comparison_page.all_filtered_warning").format(
-                                count=before_stage_filter
-                            )
-                        )
-                    elif before_stage_filter > after_stage_filter:
-                        pass
-
-                invoice_number_col = None
-                for col in [
-                    "invoiceNumber",
-                    "invoice_number",
-                    "InvoiceNumber",
-                    "receiptNumber",
-                    "receipt_number",
-                ]:
-                    if col in df_flowwer_clean.columns:
-                        invoice_number_col = col
-                        break
-
-                if invoice_number_col:
-                    df_flowwer_clean["Invoice_Number"] = (
-                        df_flowwer_clean[invoice_number_col].astype(str).str.strip()
-                    )
-                else:
-
-                    doc_id_col = st.session_state.get("flowwer_doc_id_col")
-                    if doc_id_col is None:
-                        for col in [
-                            "documentId",
-                            "document_id",
-                            "DocumentId",
-                            "id",
-                            "Id",
-                        ]:
-                            if col in df_flowwer_clean.columns:
-                                doc_id_col = col
-                                break
-
-                    if doc_id_col and len(df_flowwer_clean) > 0:
-                        unique_doc_ids = df_flowwer[doc_id_col].dropna().unique()
-
-                        invoice_cache = st.session_state.get("invoice_number_cache", {})
-                        missing_ids = [
-                            doc_id
-                            for doc_id in unique_doc_ids
-                            if doc_id not in invoice_cache
-                        ]
-
-                        if missing_ids:
-                            progress_bar = st.progress(0)
-                            status_text = st.empty()
-                            
-                            total_missing = len(missing_ids)
-                            status_text.text(f"Fetching invoice numbers: 0/{total_missing}")
-                            
-                            for i, doc_id in enumerate(missing_ids):
-                                try:
-                                    doc_details = client.get_document(doc_id)
-                                    if doc_details:
-                                        inv_num = (
-                                            doc_details.get("invoiceNumber")
-                                            or doc_details.get("invoice_number")
-                                            or doc_details.get("InvoiceNumber")
-                                            or doc_details.get("receiptNumber")
-                                            or doc_details.get("receipt_number")
-                                            or ""
-                                        )
-                                        invoice_cache[doc_id] = (
-                                            str(inv_num).strip() if inv_num else ""
-                                        )
-                                    else:
-                                        invoice_cache[doc_id] = ""
-                                except Exception:
-                                    invoice_cache[doc_id] = ""
-
-                                progress = (i + 1) / total_missing
-                                progress_bar.progress(progress)
-                                status_text.text(f"Fetching invoice numbers: {i + 1}/{total_missing}")
-                            
-                            progress_bar.empty()
-                            status_text.empty()
-
-                            st.session_state.invoice_number_cache = invoice_cache
-
-                        df_flowwer_clean["Invoice_Number"] = (
-                            df_flowwer_clean[doc_id_col].map(invoice_cache).fillna("")
-                        )
-
-                        non_empty_invoices = (
-                            df_flowwer_clean["Invoice_Number"] != ""
-                        ).sum()
-                        if non_empty_invoices < len(df_flowwer_clean):
-                            missing_count = len(df_flowwer_clean) - non_empty_invoices
-                    else:
-                        df_flowwer_clean["Invoice_Number"] = ""
-
-                invoice_date_col = None
-                for col in [
-                    "invoiceDate",
-                    "invoice_date",
-                    "InvoiceDate",
-                    "date",
-                    "Date",
-                ]:
-                    if col in df_flowwer_clean.columns:
-                        invoice_date_col = col
-                        break
-                if invoice_date_col:
-                    df_flowwer_clean["Invoice_Date"] = pd.to_datetime(
-                        df_flowwer_clean[invoice_date_col], errors="coerce"
-                    ).dt.tz_localize(None)
-                    missing_dates = df_flowwer_clean["Invoice_Date"].isna().sum()
-                    if missing_dates > 0:
-                        st.warning(
-                            t("data_comparison_page.missing_dates_warning").format(
-                                count=f"{missing_dates:,}"
-                            )
-                        )
-                else:
-                    df_flowwer_clean["Invoice_Date"] = pd.NaT
-
-                cost_center_col = None
-                for col in ["costCenter", "CostCenter", "cost_center"]:
-                    if col in df_flowwer_clean.columns:
-                        cost_center_col = col
-                        break
-                if cost_center_col:
-                    df_flowwer_clean["Cost_Center"] = (
-                        df_flowwer_clean[cost_center_col].astype(str).str.strip()
-                    )
-                else:
-                    df_flowwer_clean["Cost_Center"] = ""
-
-                amount_col = None
-                for col in [
-                    "grossValue",
-                    "netValue",
-                    "grossAmount",
-                    "netAmount",
-                    "amount",
-                    "value",
-                    "total",
-                ]:
-                    if col in df_flowwer_clean.columns:
-                        amount_col = col
-                        break
-                if amount_col:
-                    df_flowwer_clean["Amount"] = pd.to_numeric(
-                        df_flowwer_clean[amount_col], errors="coerce"
-                    )
-                else:
-                    df_flowwer_clean["Amount"] = 0
-
-                before_invoice_filter = len(df_flowwer_clean)
-                df_flowwer_clean = df_flowwer_clean[
-                    (df_flowwer_clean["Invoice_Number"] != "")
-                    & (df_flowwer_clean["Invoice_Number"] != "0")
-                    & (df_flowwer_clean["Invoice_Number"] != "nan")
-                    & (df_flowwer_clean["Invoice_Number"] != "None")
-                    & (df_flowwer_clean["Invoice_Number"].notna())
-                ]
-                after_invoice_filter = len(df_flowwer_clean)
-
-                before_date_filter = len(df_flowwer_clean)
-                df_flowwer_clean = df_flowwer_clean[
-                    df_flowwer_clean["Invoice_Date"].notna()
-                    & (df_flowwer_clean["Invoice_Date"] >= from_date)
-                    & (df_flowwer_clean["Invoice_Date"] <= to_date)
-                ]
-                after_date_filter = len(df_flowwer_clean)
-
-                if before_date_filter > after_date_filter:
-                    filtered_out_dates = before_date_filter - after_date_filter
-                    st.info(
-                        t("data_comparison_page.filtered_out_info").format(
-                            count=f"{filtered_out_dates:,}",
-                            start=from_date.strftime("%Y-%m-%d"),
-                            end=to_date.strftime("%Y-%m-%d"),
-                        )
-                    )
-
-                if after_date_filter == 0 and before_date_filter > 0:
-                    st.warning(
-                        t("data_comparison_page.all_filtered_date_warning").format(
-                            count=f"{before_date_filter:,}"
-                        )
-                    )
-
-                if "currencyCode" in df_flowwer_clean.columns:
-                    pln_mask = (
-                        df_flowwer_clean["currencyCode"].str.upper().isin(["PL", "PLN"])
-                    )
-
-                    for idx in df_flowwer_clean[pln_mask].index:
-                        invoice_date = df_flowwer_clean.loc[idx, "Invoice_Date"]
-                        if pd.notna(invoice_date):
-                            if isinstance(invoice_date, pd.Timestamp):
-                                date_str = invoice_date.strftime("%Y-%m-%d")
-                            else:
-                                date_str = pd.to_datetime(invoice_date).strftime(  # type: ignore
-                                    "%Y-%m-%d"
-                                )
-
-                            rate = get_pln_eur_rate(date_str)
-                            current_amount = float(df_flowwer_clean.loc[idx, "Amount"]) # type: ignore
-                            df_flowwer_clean.loc[idx, "Amount"] = current_amount / rate
-
-                if before_invoice_filter > 0 and after_invoice_filter == 0:
-                    st.warning(
-                        t("data_comparison_page.all_filtered_inv_warning").format(
-                            count=before_invoice_filter
-                        )
-                    )
-
-                df_flowwer_aggregated = (
-                    df_flowwer_clean.groupby(
-                        ["Invoice_Number"],
-                        as_index=False,
-                        dropna=False,
-                    )
-                    .agg(
-                        {
-                            "Invoice_Date": "first",
-                            "Cost_Center": "first",
-                            "Amount": "sum",
-                        }
-                    )
-                    .copy()
+                df_flowwer_clean, flowwer_notes = stages.run(
+                    "flowwer_select",
+                    flowwer_select_key,
+                    lambda: _select_flowwer(
+                        df_flowwer_prepared, selected_cc, from_date, to_date, t
+                    ),
+                )
+                for level, message in flowwer_notes:
+                    getattr(st, level)(message)
+                flowwer_aggregate_key = fingerprint(flowwer_select_key)
+                df_flowwer_aggregated = stages.run(
+                    "flowwer_aggregate",
+                    flowwer_aggregate_key,
+                    lambda: _aggregate(df_flowwer_clean, ["Invoice_Number"]),
                 )
 
                 excel_unique_invoices = df_excel_clean["Invoice_Number"].nunique()
@@ -908,8 +883,6 @@ def render_data_comparison_page(
 
                 st.markdown(f"### {t('data_comparison_page.results_title')}")
 
-                results = []
-
                 if len(df_flowwer_aggregated) == 0:
                     st.warning(
                         t("data_comparison_page.no_records_warning")
@@ -920,236 +893,26 @@ def render_data_comparison_page(
                         "- Data loading failed\n\n"
                         "Please check your filters and try again."
                     )
-                    df_results = pd.DataFrame(
-                        columns=[
-                            "Invoice_Number",
-                            "Status",
-                            "Flowwer_Date",
-                            "DATEV_Date",
-                            "Date_Match",
-                            "Flowwer_CC",
-                            "DATEV_CC",
-                            "CC_Match",
-                            "Buchungstext_Match",
-                            "Flowwer_Amount",
-                            "DATEV_Amount",
-                            "Amount_Match",
-                            "Amount_Diff",
-                        ]
-                    )
+                    df_results = pd.DataFrame(columns=RESULT_COLUMNS)
                     st.session_state.comparison_results = df_results
                     st.session_state.df_excel_aggregated = df_excel_aggregated
                     st.session_state.df_flowwer_aggregated = df_flowwer_aggregated
                 else:
-                    for idx, flowwer_row in df_flowwer_aggregated.iterrows():
-                        invoice_num = flowwer_row["Invoice_Number"]
-                        flowwer_date = flowwer_row["Invoice_Date"]
-                        flowwer_cc = flowwer_row["Cost_Center"]
-                        flowwer_amount = flowwer_row["Amount"]
-
-                        excel_matches = df_excel_aggregated[
-                            df_excel_aggregated["Invoice_Number"] == invoice_num
-                        ]
-
-                        if len(excel_matches) == 0:
-                            results.append(
-                                {
-                                    "Invoice_Number": invoice_num,
-                                    "Status": "Not in DATEV",
-                                    "Flowwer_Date": flowwer_date,
-                                    "DATEV_Date": None,
-                                    "Date_Match": False,
-                                    "Flowwer_CC": flowwer_cc,
-                                    "DATEV_CC": "",
-                                    "CC_Match": False,
-                                    "Buchungstext_Match": False,
-                                    "Flowwer_Amount": flowwer_amount,
-                                    "DATEV_Amount": None,
-                                    "Amount_Match": False,
-                                    "Amount_Diff": None,
-                                }
-                            )
-                        else:
-                            exact_match = False
-                            best_match = None
-
-                            total_excel_amount = excel_matches["Amount"].sum()
-                            excel_is_paid = abs(total_excel_amount) <= 0.01
-
-                            for _, excel_row in excel_matches.iterrows():
-                                excel_date = excel_row["Invoice_Date"]
-                                excel_cc = excel_row["Cost_Center"]
-                                excel_amount = excel_row["Amount"]
-                                excel_text = excel_row.get("Buchungstext", "")
-
-                                amount_diff = (
-                                    abs(abs(flowwer_amount) - abs(excel_amount))
-                                    if pd.notna(excel_amount)
-                                    else None
-                                )
-
-                                total_amount_diff = abs(
-                                    abs(flowwer_amount) - abs(total_excel_amount)
-                                )
-
-                                date_match = False
-                                if pd.notna(flowwer_date) and pd.notna(excel_date):
-                                    date_match = (
-                                        flowwer_date.date() == excel_date.date()
-                                    )
-
-                                cc_match = str(flowwer_cc) == str(excel_cc)
-
-                                tolerance = st.session_state.get("amount_tolerance", 0.01)
-                                amount_match = (
-                                    amount_diff is not None and amount_diff <= tolerance
-                                )
-                                total_amount_match = total_amount_diff <= tolerance
-
-                                if excel_is_paid:
-                                    exact_match = True
-                                else:
-                                
-                                    if date_match and cc_match and (amount_match or total_amount_match):
-                                        exact_match = True
-
-                                current_score = 0
-                                if amount_match: current_score += 4
-                                elif total_amount_match: current_score += 3
-                                if date_match: current_score += 2
-                                if cc_match: current_score += 1
-
-                                update_best = False
-                                if best_match is None:
-                                    update_best = True
-                                else:
-                                    old_score = 0
-                                    if best_match.get("amount_match"): old_score += 4
-                                    elif best_match.get("is_total_match"): old_score += 3
-                                    if best_match.get("date_match"): old_score += 2
-                                    if best_match.get("cc_match"): old_score += 1
-                                    
-                                    if current_score > old_score:
-                                        update_best = True
-
-                                if update_best or exact_match:
-                                    use_total = (total_amount_match and not amount_match)
-                                    final_amount = total_excel_amount if use_total else excel_amount
-                                    final_diff = total_amount_diff if use_total else amount_diff
-                                    final_amount_match = amount_match or total_amount_match
-
-                                    best_match = {
-                                        "datev_date": excel_date,
-                                        "datev_cc": excel_cc,
-                                        "datev_text": excel_text,
-                                        "datev_amount": final_amount,
-                                        "date_match": date_match,
-                                        "cc_match": cc_match,
-                                        "text_match": True,
-                                        "amount_match": final_amount_match,
-                                        "amount_diff": final_diff,
-                                        "datev_is_paid": excel_is_paid,
-                                        "is_total_match": use_total
-                                    }
-                                
-                                if exact_match:
-                                    break
-
-                            if exact_match:
-                                status = "Paid (DATEV)" if excel_is_paid else "Match"
-
-                                results.append(
-                                    {
-                                        "Invoice_Number": invoice_num,
-                                        "Status": status,
-                                        "Flowwer_Date": flowwer_date,
-                                        "DATEV_Date": (
-                                            best_match["datev_date"]
-                                            if best_match
-                                            else None
-                                        ),
-                                        "Date_Match": (
-                                            best_match["date_match"]
-                                            if best_match
-                                            else False
-                                        ),
-                                        "Flowwer_CC": flowwer_cc,
-                                        "DATEV_CC": (
-                                            best_match["datev_cc"] if best_match else ""
-                                        ),
-                                        "CC_Match": (
-                                            best_match["cc_match"]
-                                            if best_match
-                                            else False
-                                        ),
-                                        "Buchungstext": (
-                                            best_match["datev_text"]
-                                            if best_match
-                                            else ""
-                                        ),
-                                        "Flowwer_Amount": flowwer_amount,
-                                        "DATEV_Amount": (
-                                            best_match["datev_amount"]
-                                            if best_match
-                                            else None
-                                        ),
-                                        "Amount_Match": (
-                                            best_match["amount_match"]
-                                            if best_match
-                                            else False
-                                        ),
-                                        "Amount_Diff": (
-                                            best_match["amount_diff"]
-                                            if best_match
-                                            else None
-                                        ),
-                                    }
-                                )
-                            elif best_match is not None:
-                                results.append(
-                                    {
-                                        "Invoice_Number": invoice_num,
-                                        "Status": "Mismatch",
-                                        "Flowwer_Date": flowwer_date,
-                                        "DATEV_Date": best_match["datev_date"],
-                                        "Date_Match": best_match["date_match"],
-                                        "Flowwer_CC": flowwer_cc,
-                                        "DATEV_CC": best_match["datev_cc"],
-                                        "CC_Match": best_match["cc_match"],
-                                        "Buchungstext": best_match["datev_text"],
-                                        "Flowwer_Amount": flowwer_amount,
-                                        "DATEV_Amount": best_match["datev_amount"],
-                                        "Amount_Match": best_match["amount_match"],
-                                        "Amount_Diff": best_match["amount_diff"],
-                                    }
-                                )
-                            else:
-                                results.append(
-                                    {
-                                        "Invoice_Number": invoice_num,
-                                        "Status": "Mismatch",
-                                        "Flowwer_Date": flowwer_date,
-                                        "DATEV_Date": None,
-                                        "Date_Match": False,
-                                        "Flowwer_CC": flowwer_cc,
-                                        "DATEV_CC": "",
-                                        "CC_Match": False,
-                                        "Buchungstext": "",
-                                        "Flowwer_Amount": flowwer_amount,
-                                        "DATEV_Amount": None,
-                                        "Amount_Match": False,
-                                        "Amount_Diff": None,
-                                    }
-                                )
-
-                    df_results = pd.DataFrame(results)
+                    df_results = stages.run(
+                        "match",
+                        fingerprint(excel_aggregate_key, flowwer_aggregate_key, tolerance),
+                        lambda: reconcile_invoices(
+                            df_flowwer_aggregated, df_excel_aggregated, tolerance=tolerance
+                        ),
+                    )
 
                     st.session_state.comparison_results = df_results
                     st.session_state.df_excel_aggregated = df_excel_aggregated
                     st.session_state.df_flowwer_aggregated = df_flowwer_aggregated
-                    
-                    st.session_state.inspector_excel_ready = df_excel_clean.copy()
-                    st.session_state.inspector_flowwer_ready = df_flowwer_clean.copy()
+
+                    # Stage results are not modified later, so the inspector reads them directly
+                    st.session_state.inspector_excel_ready = df_excel_clean
+                    st.session_state.inspector_flowwer_ready = df_flowwer_clean
                     st.session_state.invoice_list_for_autocomplete = sorted(df_results["Invoice_Number"].unique().tolist())
 
         if (
@@ -5,6 +5,44 @@ Data Explorer Page Module
 import streamlit as st
 import pandas as pd
 from datetime import datetime
+from flowwer_api_client import document_id
+from utils.document_store import REFRESH_MAX_AGE, get_document_store, refresh_documents
+
+# Document fields read when building explorer rows (projection for streaming)
+EXPLORER_DOCUMENT_FIELDS = [
+    "documentId",
+    "simpleName",
+    "invoiceDate",
+    "invoiceNumber",
+    "receiptNumber",
+    "totalGross",
+    "totalNet",
+    "companyName",
+    "dateOfReceipt",
+    "uploadTime",
+    "documentType",
+    "currentStage",
+    "purchaseOrderNumber",
+    "ownReference",
+    "foreignReference",
+    "currencyCode",
+    "dueDate",
+    "discountAmount",
+    "discountPeriodEnd",
+    "paymentState",
+    "paymentDate",
+    "paymentMethod",
+    "isDunning",
+    "isOnHold",
+    "flowName",
+    "stageTimestamp",
+    "supplierName",
+    "supplierVATId",
+    "serviceStartDate",
+    "serviceEndDate",
+    "creationTimestampUtc",
+    "fileSize",
+]
 
 
 def render_data_explorer_page(
@@ -98,20 +136,48 @@ def render_data_explorer_page(
             key="btn_load_explorer_docs",
         ):
             with st.spinner(t("data_explorer_page.loading")):
-                docs = client.get_all_documents(
-                    include_processed=include_processed, include_deleted=include_deleted
-                )
+                if get_document_store().has_snapshot(
+                    client, include_processed, include_deleted
+                ):
+                    # A shared list is already held: sync it incrementally
+                    docs, _ = refresh_documents(
+                        client,
+                        include_processed=include_processed,
+                        include_deleted=include_deleted,
+                        max_age=REFRESH_MAX_AGE,
+                    )
+                    docs = docs or []
+                else:
+                    # Stream documents with only the fields below, so full
+                    # document payloads are never held in memory
+                    docs = client.iter_all_documents(
+                        include_processed=include_processed,
+                        include_deleted=include_deleted,
+                        fields=EXPLORER_DOCUMENT_FIELDS,
+                    )
 
-                if docs:
-                    all_data = []
+                # Read the whole (projected) listing first, so the response is
+                # not held open while the splits are fetched
+                documents = None
+                try:
+                    documents = [doc for doc in docs if doc.get("documentId") is not None]
+                except Exception as e:
+                    print(f"Error streaming documents: {e}")
+
+                all_data = None
+                doc_count = 0
+                if documents is not None:
                     progress_bar = st.progress(0)
+                    splits_by_id = client.get_receipt_splits_many(
+                        [doc["documentId"] for doc in documents],
+                        progress_callback=lambda fraction, text: progress_bar.progress(fraction, text=text),
+                    )
+                    progress_bar.empty()
 
-                    for idx, doc in enumerate(docs):
+                    all_data = []
+                    for doc in documents:
                         doc_id = doc.get("documentId")
-                        if doc_id is None:
-                            continue
-
-                        splits = client.get_receipt_splits(doc_id)
+                        splits = splits_by_id.get(document_id(doc))
 
                         if splits and len(splits) > 0:
                             
@@ -238,8 +304,9 @@ def render_data_explorer_page(
                             }
                             all_data.append(merged_data)
 
-                        progress_bar.progress((idx + 1) / len(docs))
+                        doc_count += 1
 
+                if all_data is not None and doc_count > 0:
                     df_export = pd.DataFrame(all_data)
 
                     date_columns = [
@@ -263,7 +330,7 @@ def render_data_explorer_page(
 
                     st.session_state.explorer_data = df_export
                     st.success(
-                        f"Loaded {len(all_data)} rows from {len(docs)} documents"
+                        f"Loaded {len(all_data)} rows from {doc_count} documents"
                     )
                 else:
                     st.error("Failed to load documents")
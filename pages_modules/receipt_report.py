@@ -7,7 +7,26 @@ import pandas as pd
 from datetime import datetime, date
 import calendar
 from dateutil.relativedelta import relativedelta
-from utils.cost_center_parser import parse_cost_center, enrich_cost_center_data
+from utils.cost_center_pnl import CostCenterPnL
+from utils.document_classification import DIRECTION_RULES, classify_frame
+from utils.document_details import DOCUMENT_TYPE_FIELDS, get_detail_store, stage_timestamps
+from utils.document_store import get_document_store
+from utils.report_tables import NormalizedReport
+
+
+PARTIAL_AMOUNT_FIELDS = ("grossValue", "netValue", "grossAmount", "netAmount", "amount", "value", "total")
+
+
+def _add_partial_totals(totals, splits):
+    """Add split amounts per cost center to the running totals shown while months load"""
+    for split in splits:
+        cost_center = str(split.get("costCenter", ""))
+        amount = next((split[f] for f in PARTIAL_AMOUNT_FIELDS if f in split), 0)
+        try:
+            amount = float(amount or 0)
+        except (TypeError, ValueError):
+            amount = 0.0
+        totals[cost_center] = totals.get(cost_center, 0.0) + amount
 
 
 def render_receipt_report_page(
@@ -262,43 +281,76 @@ def render_receipt_report_page(
             key="btn_generate_receipt_report",
             use_container_width=True,
         ):
-            with st.spinner(t("receipt_report_page.fetching_data")):
-                filter_params = {
-                    "min_date": min_date.isoformat(),
-                    "max_date": max_date.isoformat(),
-                }
-
-                report = client.get_receipt_splitting_report(**filter_params)
-
-                if report:
-                    st.session_state.full_receipt_report = report
-                    total_records = len(report)
-
-                    if selected_cost_centers and len(selected_cost_centers) > 0:
-                        filtered_report = [
-                            r
-                            for r in report
-                            if str(r.get("costCenter", "")) in selected_cost_centers
-                        ]
-                        st.session_state.receipt_report = filtered_report
-                        st.session_state.filtered_cost_centers = selected_cost_centers
-                        st.toast(
-                            t("receipt_report_page.filtered_to").format(
-                                filtered=len(filtered_report), total=total_records
-                            ),
-                            icon="✅",
-                        )
-                    else:
-                        st.session_state.receipt_report = report
-                        st.session_state.filtered_cost_centers = []
-                        st.toast(
-                            t("receipt_report_page.retrieved_records").format(
-                                count=len(report)
-                            ),
-                            icon="✅",
-                        )
+            filter_params = {
+                "min_date": min_date.isoformat(),
+                "max_date": max_date.isoformat(),
+                "cost_center": selected_cost_centers or None,
+            }
+
+            # Months arrive one at a time, already filtered to the selected cost
+            # centers; show running totals while loading. Documents and splits
+            # stay linked tables and are joined when rendered.
+            progress_bar = st.progress(0, text=t("receipt_report_page.fetching_data"))
+            partial_table = st.empty()
+            report = NormalizedReport()
+            failed_months = []
+            partial_totals = {}
+            for chunk in client.iter_receipt_splitting_report(**filter_params):
+                if not chunk.ok:
+                    failed_months.append(chunk.path.rsplit("/", 1)[-1])
+                else:
+                    report.extend(chunk.report)
+                    _add_partial_totals(partial_totals, chunk.report.splits)
+                progress_bar.progress(
+                    chunk.progress,
+                    text=t("receipt_report_page.months_loaded").format(
+                        done=chunk.completed, total=chunk.total, records=f"{len(report):,}"
+                    ),
+                )
+                if partial_totals:
+                    partial_table.dataframe(
+                        pd.DataFrame(
+                            sorted(partial_totals.items()),
+                            columns=[
+                                t("receipt_report_page.cost_center_column"),
+                                t("receipt_report_page.amount_column"),
+                            ],
+                        ),
+                        hide_index=True,
+                        use_container_width=True,
+                    )
+            progress_bar.empty()
+            partial_table.empty()
+
+            report.failed_paths = failed_months
+            if failed_months:
+                st.warning(
+                    t("receipt_report_page.months_failed").format(
+                        count=len(failed_months), months=", ".join(sorted(failed_months))
+                    )
+                )
+
+            if report:
+                st.session_state.receipt_report = report
+
+                if selected_cost_centers and len(selected_cost_centers) > 0:
+                    st.session_state.filtered_cost_centers = selected_cost_centers
+                    st.toast(
+                        t("receipt_report_page.filtered_to").format(
+                            filtered=len(report), total=report.splits_seen
+                        ),
+                        icon="✅",
+                    )
                 else:
-                    st.toast(t("receipt_report_page.no_data_found"), icon="❌")
+                    st.session_state.filtered_cost_centers = []
+                    st.toast(
+                        t("receipt_report_page.retrieved_records").format(
+                            count=len(report)
+                        ),
+                        icon="✅",
+                    )
+            else:
+                st.toast(t("receipt_report_page.no_data_found"), icon="❌")
 
     if "receipt_report" in st.session_state and st.session_state.receipt_report:
         st.divider()
@@ -316,35 +368,25 @@ def render_receipt_report_page(
         else:
             st.info(t("receipt_report_page.showing_all"))
 
-        df = pd.DataFrame(report_data)
+        df = (
+            report_data.to_frame()
+            if isinstance(report_data, NormalizedReport)
+            else pd.DataFrame(report_data)
+        )
 
         if "documentType" not in df.columns or df["documentType"].isna().any():
             doc_ids = df.get("documentId")
             if doc_ids is not None:
-                unique_ids = [int(x) for x in pd.Series(doc_ids).dropna().unique()]
-                type_cache = st.session_state.get("receipt_doc_type_cache", {})
-                missing_ids = [i for i in unique_ids if i not in type_cache]
-                if missing_ids:
-                    with st.spinner(t("receipt_report_page.fetching_document_types")):
-                        for doc_id in missing_ids:
-                            try:
-                                detail = client.get_document(int(doc_id))
-                                dtype = ""
-                                if detail:
-                                    dtype = (
-                                        detail.get("documentType")
-                                        or detail.get("documenttype")
-                                        or detail.get("documentKind")
-                                        or detail.get("documentkind")
-                                        or ""
-                                    )
-                                type_cache[doc_id] = dtype
-                            except Exception:
-                                type_cache[doc_id] = ""
-                        st.session_state.receipt_doc_type_cache = type_cache
-                df["documentType"] = df["documentId"].map(
-                    st.session_state.get("receipt_doc_type_cache", {})
-                )
+                with st.spinner(t("receipt_report_page.fetching_document_types")):
+                    type_map = get_detail_store().get_field(
+                        client,
+                        pd.Series(doc_ids).dropna().unique(),
+                        DOCUMENT_TYPE_FIELDS,
+                        stage_timestamps=stage_timestamps(
+                            get_document_store().peek(client), df
+                        ),
+                    )
+                df["documentType"] = df["documentId"].map(type_map)
 
         if "invoiceDate" in df.columns:
             df["invoiceDate"] = pd.to_datetime(
@@ -378,30 +420,7 @@ def render_receipt_report_page(
             num_cost_centers = df[cost_center_col].nunique()
             num_records = len(df)
 
-            def classify_row(row):
-                doc_type = str(
-                    row.get("documentType")
-                    or row.get("documenttype")
-                    or row.get("documentKind")
-                    or row.get("documentkind")
-                    or ""
-                ).lower()
-                amount = row[amount_col]
-                if (
-                    "ausgangsrechnung" in doc_type
-                    or "outgoinginvoice" in doc_type
-                    or "ausgang" in doc_type
-                ):
-                    return "income"
-                if (
-                    "eingangsrechnung" in doc_type
-                    or "incominginvoice" in doc_type
-                    or "eingang" in doc_type
-                ):
-                    return "cost"
-                return "income" if amount < 0 else "cost"
-
-            df["__category"] = df.apply(classify_row, axis=1)
+            df["__category"] = classify_frame(df, amount_col, rules=DIRECTION_RULES)
 
             income_total = df.loc[df["__category"] == "income", amount_col].abs().sum()
             cost_total = df.loc[df["__category"] == "cost", amount_col].abs().sum()
@@ -501,35 +520,7 @@ def render_receipt_report_page(
 
             st.markdown(kpi_html, unsafe_allow_html=True)
 
-            enriched_df = df.copy()
-            enriched_df["cc_parsed"] = enriched_df[cost_center_col].apply(
-                parse_cost_center
-            )
-            enriched_df["cc_display"] = enriched_df["cc_parsed"].apply(
-                lambda x: x["display_name"]
-            )
-            enriched_df["cc_number"] = enriched_df[cost_center_col].astype(str)
-
-            cc_stats = []
-            for (cc_num, cc_name), sub in enriched_df.groupby(
-                ["cc_number", "cc_display"]
-            ):
-                income_sum = (
-                    sub.loc[sub["__category"] == "income", amount_col].abs().sum()
-                )
-                cost_sum = sub.loc[sub["__category"] == "cost", amount_col].abs().sum()
-                margin_cc = income_sum - cost_sum
-                cc_stats.append(
-                    {
-                        "cc_number": cc_num,
-                        "cc_display": cc_name,
-                        "income": income_sum,
-                        "cost": cost_sum,
-                        "margin": margin_cc,
-                    }
-                )
-            cc_breakdown = pd.DataFrame(cc_stats)
-            cc_breakdown = cc_breakdown.sort_values("margin", ascending=False)
+            cc_breakdown = CostCenterPnL(df, amount_col, cost_center_col).by_cost_center()
 
             col_split_header1, col_split_header2 = st.columns([4, 1])
             with col_split_header1:
@@ -737,7 +728,7 @@ def render_receipt_report_page(
             )
 
             rows_html = []
-            for _, row in cc_breakdown.iterrows():
+            for row in cc_breakdown.to_dict(orient="records"):
                 cc_num = row["cc_number"]
                 cc_name = row["cc_display"]
                 inc_fmt = f'<span style="color:{"#dc2626" if row["income"] < 0 else "#16a34a"}">{row["income"]:,.2f} €</span>'
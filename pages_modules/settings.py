@@ -5,6 +5,9 @@ Configure API settings and authentication.
 
 import streamlit as st
 import time
+from utils.document_details import get_detail_store
+from utils.local_mirror import MirrorSyncWorker, describe_age
+from utils.split_warehouse import get_split_warehouse
 
 
 def render_settings_page(client, t, get_page_header_slate, get_action_bar_styles, get_card_styles):
@@ -284,3 +287,47 @@ def render_settings_page(client, t, get_page_header_slate, get_action_bar_styles
             """,
             unsafe_allow_html=True,
         )
+
+    st.divider()
+
+    st.markdown("### Local Data Cache")
+    st.caption(
+        "Closed months of receipt-split data are cached on disk and fetched again after 30 days. "
+        "The current and previous month are always fetched live. "
+        "Document details are kept until a document changes stage."
+    )
+
+    if st.button("Clear Cached Months", key="btn_clear_month_cache"):
+        removed = client.invalidate_month_cache()
+        warehouse = get_split_warehouse()
+        partitions = warehouse.invalidate(client.cache_scope()) if warehouse is not None else 0
+        get_detail_store().invalidate(client.cache_scope())
+        st.success(
+            f"Removed {removed} cached month(s) and {partitions} split warehouse partition(s). "
+            "They will be fetched again on next use."
+        )
+
+    st.markdown("### Local Mirror")
+    if client.mirror is None:
+        st.caption(
+            "The local SQLite mirror is off. Set ENPROM_LOCAL_MIRROR=1 to keep a "
+            "background-synced copy of documents and receipt splits on disk."
+        )
+    else:
+        st.caption(
+            f"Documents last synced {describe_age(client.mirror_synced_at())} "
+            f"({client.mirror.path})"
+        )
+        col_sync, col_clear = st.columns(2)
+        with col_sync:
+            if st.button("Sync Mirror Now", key="btn_sync_mirror"):
+                with st.spinner("Syncing local mirror..."):
+                    ok = MirrorSyncWorker(client).run_once()
+                if ok:
+                    st.success("Local mirror is up to date.")
+                else:
+                    st.warning("Sync finished with errors; see the server log.")
+        with col_clear:
+            if st.button("Clear Mirror", key="btn_clear_mirror"):
+                client.mirror.clear(client.cache_scope())
+                st.success("Local mirror cleared. It is rebuilt on the next sync.")
@@ -3,9 +3,11 @@ Signable Documents (Pending Approvals) Page Module
 """
 
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 import json
+import numpy as np
+from utils.document_frame import document_view, get_document_frame, to_document_frame
+from utils.document_store import get_document_store
 
 
 def normalize_dict(obj):
@@ -90,17 +92,21 @@ def render_signable_docs_page(
         st.write("")
         if st.button(" " + t("signable_docs_page.load_documents"), type="primary"):
             with st.spinner(t("signable_docs_page.loading")):
-                all_docs_cache = st.session_state.get("documents")
+                all_docs_cache = st.session_state.get(
+                    "documents"
+                ) or get_document_store().peek(client)
                 docs = None
+                frame = rows = None
 
                 if all_docs_cache and not backup_list:
-
+                    # Rows of the shared typed frame; no per-load copy or conversion
+                    frame = get_document_frame(all_docs_cache)
                     signable_stages = [f"Stage{i}" for i in range(1, 6)]
-                    docs = [
-                        d
-                        for d in all_docs_cache
-                        if d.get("currentStage") in signable_stages
-                    ]
+                    if "currentStage" in frame:
+                        rows = np.flatnonzero(frame["currentStage"].isin(signable_stages).to_numpy(dtype=bool))
+                    else:
+                        rows = np.array([], dtype=int)
+                    docs = [all_docs_cache[i] for i in rows]
                 else:
 
                     try:
@@ -111,17 +117,20 @@ def render_signable_docs_page(
                         docs = client.get_signable_documents(
                             backup_list=backup_list, use_filter_method=True
                         )
+                    if docs is not None:
+                        docs = [
+                            normalized_doc
+                            for normalized_doc in map(normalize_dict, docs)
+                            if normalized_doc and isinstance(normalized_doc, dict)
+                        ]
+                        frame = to_document_frame(docs)
 
                 if docs is not None:
-                    normalized_docs = []
-                    for doc in docs:
-                        normalized_doc = normalize_dict(doc)
-                        if normalized_doc and isinstance(normalized_doc, dict):
-                            normalized_docs.append(normalized_doc)
-                    st.session_state.signable_documents = normalized_docs
-                    if normalized_docs:
+                    st.session_state.signable_documents = docs
+                    st.session_state.signable_documents_view = (frame, rows)
+                    if docs:
                         st.success(
-                            f"{len(normalized_docs)} " + t("signable_docs_page.found")
+                            f"{len(docs)} " + t("signable_docs_page.found")
                         )
                     else:
                         st.info(
@@ -134,34 +143,39 @@ def render_signable_docs_page(
 
     if "signable_documents" in st.session_state and st.session_state.signable_documents:
         docs = st.session_state.signable_documents
-
-        df_data = []
-        for doc in docs:
-            df_data.append(
-                {
-                    "Document ID": doc.get("documentId"),
-                    "Name": doc.get("simpleName", "N/A"),
-                    "Company": doc.get("companyName", "N/A"),
-                    "Flow": doc.get("flowName", "N/A"),
-                    "Current Stage": doc.get("currentStage", "N/A"),
-                    "Invoice #": doc.get("invoiceNumber", "N/A"),
-                    "Invoice Date": doc.get("invoiceDate", "N/A"),
-                    "Total Gross": doc.get("totalGross", 0),
-                    "Currency": doc.get("currencyCode", "EUR"),
-                    "Supplier": doc.get("supplierName", "N/A"),
-                    "Upload Time": doc.get("uploadTime", "N/A"),
-                }
-            )
-
-        df = pd.DataFrame(df_data)
-
-        date_columns = ["Invoice Date", "Upload Time"]
-        for col in date_columns:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors="coerce").dt.strftime(
-                    "%Y-%m-%d"
-                )
-                df[col] = df[col].fillna("")
+        frame, rows = st.session_state.get("signable_documents_view") or (None, None)
+        if frame is None:
+            frame, rows = to_document_frame(docs), None
+            st.session_state.signable_documents_view = (frame, rows)
+
+        df = document_view(
+            frame,
+            {
+                "documentId": "Document ID",
+                "simpleName": "Name",
+                "companyName": "Company",
+                "flowName": "Flow",
+                "currentStage": "Current Stage",
+                "invoiceNumber": "Invoice #",
+                "invoiceDate": "Invoice Date",
+                "totalGross": "Total Gross",
+                "currencyCode": "Currency",
+                "supplierName": "Supplier",
+                "uploadTime": "Upload Time",
+            },
+            rows=rows,
+            defaults={
+                "Name": "N/A",
+                "Company": "N/A",
+                "Flow": "N/A",
+                "Current Stage": "N/A",
+                "Invoice #": "N/A",
+                "Total Gross": 0,
+                "Currency": "EUR",
+                "Supplier": "N/A",
+            },
+            date_format="%Y-%m-%d",
+        )
 
         st.dataframe(df, use_container_width=True, height=500)
 
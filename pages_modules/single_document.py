@@ -6,6 +6,7 @@ View detailed information about a specific document with receipt splits
 import streamlit as st
 import pandas as pd
 import json
+from utils.document_store import load_documents
 
 
 def normalize_dict(obj):
@@ -207,8 +208,8 @@ def render_single_document_page(
 
                         if not all_docs:
                             with st.spinner("Downloading document list..."):
-                                all_docs = st.session_state.client.get_all_documents(
-                                    include_processed=True
+                                all_docs = load_documents(
+                                    st.session_state.client, include_processed=True
                                 )
                                 if all_docs:
                                     st.session_state.documents = all_docs
@@ -0,0 +1,72 @@
+"""
+Tests for the circuit breaker as used by FlowwerAPIClient
+"""
+
+import unittest
+
+import requests
+
+from flowwer_api_client import FlowwerAPIClient
+from utils.http_resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+
+class _FailingSession:
+    """Session stub whose requests raise the given exception"""
+
+    def __init__(self, error):
+        self.error = error
+        self.headers = {}
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        raise self.error
+
+
+def _half_open_client(error):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    client = FlowwerAPIClient(
+        api_key="test",
+        circuit_breaker=breaker,
+        retry_policy=RetryPolicy(max_retries=0),
+        use_month_cache=False,
+    )
+    client.session = _FailingSession(error)
+    return client, breaker
+
+
+class HalfOpenTrialTest(unittest.TestCase):
+    def test_non_connection_error_ends_the_trial(self):
+        client, breaker = _half_open_client(requests.exceptions.ChunkedEncodingError("cut off"))
+
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            client._send_with_retries("GET", "https://flowwer.test/api/v1/documents/1")
+
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        # The next trial is let through once the (zero) reset timeout has passed
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+
+    def test_unexpected_error_ends_the_trial(self):
+        client, breaker = _half_open_client(ValueError("bad url"))
+
+        with self.assertRaises(ValueError):
+            client._send_with_retries("GET", "https://flowwer.test/api/v1/documents/1")
+        with self.assertRaises(ValueError):
+            client._send_with_retries("GET", "https://flowwer.test/api/v1/documents/1")
+
+        self.assertEqual(client.session.calls, 2)
+
+    def test_open_circuit_rejects_without_sending(self):
+        client, breaker = _half_open_client(requests.exceptions.TooManyRedirects("loop"))
+        breaker.reset_timeout = 60.0
+
+        with self.assertRaises(CircuitOpenError):
+            client._send_with_retries("GET", "https://flowwer.test/api/v1/documents/1")
+
+        self.assertEqual(client.session.calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
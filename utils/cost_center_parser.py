@@ -3,6 +3,9 @@ Cost Center Parser Utility
 Intelligently parses cost center codes and enriches them with project and category information
 """
 
+import numpy as np
+import pandas as pd
+
 PROJECTS = {
     "290000": {"name": "Zukünftige Projekte", "description": "Zukünftige Projekte"},
     "250348": {"name": "Hamburg", "description": "Isolatorenketten_Seiltausch_Hamburg"},
@@ -359,6 +362,92 @@ def parse_cost_center(cost_center_str):
     return result
 
 
+# Project ID -> display name (the description when a project has no name)
+PROJECT_NAMES = {
+    project_id: info["name"] or info["description"] for project_id, info in PROJECTS.items()
+}
+
+DECODED_COLUMNS = (
+    "original",
+    "project_id",
+    "project_name",
+    "cost_center_id",
+    "cost_center_category",
+    "type",
+    "display_name",
+)
+
+
+def decode_cost_centers(values, columns=DECODED_COLUMNS):
+    """
+    Parse a column of cost center codes, one row per value
+
+    Same rules as parse_cost_center(), but every distinct code is decoded
+    only once, with vectorized string slicing and dictionary lookups, and the
+    results are mapped back to the rows as categoricals.
+
+    Args:
+        values: Cost center codes (Series, list or array); missing values and
+                empty strings decode as unknown
+        columns: Result columns to build (default: all of DECODED_COLUMNS)
+
+    Returns:
+        DataFrame aligned with ``values`` with one categorical column per
+        entry of ``columns`` ("original" is the code as text)
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    # Missing values share one extra slot decoded like an empty code
+    raw = list(uniques) + [""]
+    codes = np.where(codes < 0, len(uniques), codes)
+
+    originals = pd.Series(["" if value is None else str(value) for value in raw], dtype=object)
+    empty = np.array([not value for value in raw], dtype=bool)
+    cc = originals.str.strip().str.replace("_", "", regex=False)
+    length = cc.str.len().to_numpy()
+
+    sga = ~empty & (length == 6) & (cc.str.startswith("55") | (cc == "9999")).to_numpy()
+    with_cc = ~empty & ~sga & (length == 10)
+    project_only = ~empty & ~sga & (length == 6)
+
+    project_id = pd.Series(np.select([with_cc, project_only], [cc.str[:6], cc], None), dtype=object)
+    project_name = project_id.map(PROJECT_NAMES)
+    project_name = project_name.where(project_name.notna(), "Project " + project_id)
+
+    cc_id = pd.Series(np.select([with_cc, sga], [cc.str[6:], cc], None), dtype=object)
+    sga_name = cc.map(SGA_COST_CENTERS).fillna("SG&A - Unknown")
+    cc_name = cc_id.map(COST_CENTER_CATEGORIES)
+    cc_name = cc_name.where(cc_name.notna(), "CC-" + cc_id)
+    category = pd.Series(np.select([sga, with_cc], [sga_name, cc_name], None), dtype=object)
+
+    decoded = {
+        "original": originals,
+        "project_id": project_id,
+        "project_name": project_name,
+        "cost_center_id": cc_id,
+        "cost_center_category": category,
+        "type": np.select(
+            [sga, with_cc, project_only], ["sga", "project_with_cc", "project_only"], "unknown"
+        ),
+        "display_name": np.select(
+            [empty, sga, with_cc, project_only],
+            [
+                "Unknown",
+                category,
+                project_name.fillna("") + " → " + category.fillna(""),
+                project_name,
+            ],
+            "Unknown: " + originals,
+        ),
+    }
+
+    result = {}
+    for name in columns:
+        column_codes, categories = pd.factorize(pd.Series(decoded[name], dtype=object))
+        result[name] = pd.Categorical.from_codes(column_codes[codes], categories)
+    return pd.DataFrame(result, index=series.index)
+
+
 def enrich_cost_center_data(data_list):
     """
     Enrich a list of records with parsed cost center information
@@ -370,10 +459,15 @@ def enrich_cost_center_data(data_list):
         List of dicts with added keys: parsed_cc, project_name, cost_center_category
     """
     enriched = []
+    parsed_by_value = {}
     for record in data_list:
         enriched_record = record.copy()
         cc_value = record.get("costCenter", "")
-        parsed = parse_cost_center(cc_value)
+        # Reports repeat a few cost centers many times; parse each one once
+        key = (type(cc_value), str(cc_value))
+        parsed = parsed_by_value.get(key)
+        if parsed is None:
+            parsed = parsed_by_value[key] = parse_cost_center(cc_value)
         enriched_record["parsed_cc"] = parsed
         enriched_record["project_name"] = parsed["project_name"]
         enriched_record["cost_center_category"] = parsed["cost_center_category"]
@@ -0,0 +1,121 @@
+"""
+Cost Center P&L
+Income, cost and margin per cost center and per company from one pivot over classified rows
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.cost_center_parser import decode_cost_centers
+from utils.document_classification import COST, INCOME
+
+_NO_COMPANY = -1
+
+
+class CostCenterPnL:
+    """
+    Cost center × category and company × cost center tables of a report
+
+    Every row's absolute amount is summed into one pivot_table indexed by
+    (company, cost center, cost center name) with the income/cost category
+    as columns; the cost center and company tables are both sums over that
+    pivot, so the rows are only grouped once. Rows without a company still
+    count towards the cost center table.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        amount_col: str,
+        cost_center_col: str,
+        category_col: str = "__category",
+        company_col: Optional[str] = None,
+    ):
+        """
+        Args:
+            df: Report rows
+            amount_col: Amount column (absolute values are summed)
+            cost_center_col: Cost center code column (decoded for the names)
+            category_col: Column holding 'income' or 'cost' (see classify_frame())
+            company_col: Optional company column for by_company()
+        """
+        decoded = decode_cost_centers(df[cost_center_col], columns=("original", "display_name"))
+        if company_col and company_col in df.columns:
+            company_codes, self._companies = pd.factorize(df[company_col])
+        else:
+            company_codes, self._companies = np.full(len(df), _NO_COMPANY), pd.Index([])
+
+        rows = pd.DataFrame(
+            {
+                "company": company_codes,
+                "cc_number": decoded["original"].array,
+                "cc_display": decoded["display_name"].array,
+                "category": df[category_col].array,
+                "amount": pd.to_numeric(df[amount_col], errors="coerce").fillna(0).abs().to_numpy(),
+            }
+        )
+        pivot = rows.pivot_table(
+            index=["company", "cc_number", "cc_display"],
+            columns="category",
+            values="amount",
+            aggfunc=["sum", "count"],
+            fill_value=0,
+            observed=True,
+        )
+        sums = pivot["sum"] if len(pivot) else pd.DataFrame(index=pivot.index)
+        counts = pivot["count"] if len(pivot) else pd.DataFrame(index=pivot.index)
+        self.table = pd.DataFrame(
+            {
+                INCOME: sums.get(INCOME, 0.0),
+                COST: sums.get(COST, 0.0),
+                "records": counts.sum(axis=1).astype(int),
+            },
+            index=pivot.index,
+        ).astype({INCOME: float, COST: float})
+        self.table["margin"] = self.table[INCOME] - self.table[COST]
+
+    def by_cost_center(self) -> pd.DataFrame:
+        """
+        Income, cost and margin per cost center
+
+        Returns:
+            DataFrame with cc_number, cc_display, income, cost, margin, records,
+            sorted by margin (highest first)
+        """
+        table = self.table.groupby(level=["cc_number", "cc_display"], observed=True).sum()
+        return table.reset_index().sort_values("margin", ascending=False, kind="stable")
+
+    def by_company(self) -> pd.DataFrame:
+        """
+        Income, cost and margin per company
+
+        Returns:
+            DataFrame with Company, Cost Centers, Income, Cost, Margin, Records
+            (rows without a company left out)
+        """
+        table = self.table[self.table.index.get_level_values("company") != _NO_COMPANY]
+        if table.empty:
+            return pd.DataFrame(columns=["Company", "Cost Centers", "Income", "Cost", "Margin", "Records"])
+
+        cost_centers = table.index.get_level_values("cc_number")
+        table = table.assign(has_cc=np.asarray(cost_centers != "", dtype=int))
+        # One pivot row per (company, code, name); a code has one name, so
+        # counting non-empty codes counts distinct cost centers
+        grouped = table.groupby(level="company", sort=False).sum()
+        return pd.DataFrame(
+            {
+                "Company": self._companies[grouped.index.to_numpy()],
+                "Cost Centers": grouped["has_cc"].to_numpy(),
+                "Income": grouped[INCOME].to_numpy(),
+                "Cost": grouped[COST].to_numpy(),
+                "Margin": grouped["margin"].to_numpy(),
+                "Records": grouped["records"].to_numpy(),
+            }
+        )
+
+    def cost_center_stats(self) -> Dict[Any, Dict[str, float]]:
+        """Cost center code -> {"income", "cost", "margin"}"""
+        table = self.table.groupby(level="cc_number", observed=True)[[INCOME, COST, "margin"]].sum()
+        return table.to_dict(orient="index")
@@ -1,11 +1,12 @@
 import msal
-import requests
 import pandas as pd
 import streamlit as st
 import os
 
+from utils.http_transport import TransportConfig, create_session
+
 class DataverseClient:
-    def __init__(self, resource_url, tenant_id=None, client_id=None, client_secret=None):
+    def __init__(self, resource_url, tenant_id=None, client_id=None, client_secret=None, transport=None):
         """
         Initialize the Dataverse Client.
         
@@ -14,6 +15,7 @@ class DataverseClient:
             tenant_id: Azure AD Tenant ID
             client_id: Azure App Registration Client ID
             client_secret: Azure App Registration Client Secret
+            transport: Optional TransportConfig for pooling and timeouts
         """
         self.resource_url = resource_url.rstrip('/')
         self.api_url = f"{self.resource_url}/api/data/v9.2"
@@ -21,6 +23,8 @@ class DataverseClient:
         self.client_id = client_id or os.getenv("DATAVERSE_CLIENT_ID")
         self.client_secret = client_secret or os.getenv("DATAVERSE_CLIENT_SECRET")
         self.token = None
+        self.transport = transport or TransportConfig()
+        self.session = create_session(self.transport)
 
     def _get_access_token(self):
         """Authenticate and get an access token using MSAL."""
@@ -77,7 +81,7 @@ class DataverseClient:
                 params["$filter"] = filter_query
 
             try:
-                response = requests.get(url, headers=headers, params=params)
+                response = self.session.get(url, headers=headers, params=params)
                 if response.status_code == 200:
                     data = response.json()
                     if 'value' in data:
@@ -98,7 +102,7 @@ class DataverseClient:
         
         headers = {"Authorization": f"Bearer {self.token}", "Accept": "application/json"}
         try:
-            response = requests.get(self.api_url, headers=headers)
+            response = self.session.get(self.api_url, headers=headers)
             if response.status_code == 200:
                 data = response.json()
                 entities = sorted([e['name'] for e in data.get('value', [])])
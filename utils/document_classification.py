@@ -0,0 +1,160 @@
+"""
+Document Classification
+Income/cost classification of documents and report rows, vectorized over columns
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.document_details import DOCUMENT_TYPE_FIELDS
+
+INCOME = "income"
+COST = "cost"
+CATEGORIES = (INCOME, COST)
+
+# Checked in order against the lower-cased document type; the first rule with
+# a matching keyword wins, so the explicit invoice directions come before the
+# broad terms ("rechnung" is part of both "eingangsrechnung" and
+# "ausgangsrechnung"). Types matching no rule are classified by sign.
+KEYWORD_RULES = (
+    (INCOME, ("ausgangsrechnung", "outgoinginvoice", "ausgang")),
+    (COST, ("eingangsrechnung", "incominginvoice", "eingang")),
+    (INCOME, ("invoice", "rechnung", "sales", "revenue")),
+    (COST, ("expense", "cost", "purchase")),
+)
+
+# Only the explicit invoice directions. The report pages classify with these
+# and leave everything else to the amount's sign; the broad terms would turn
+# every "Rechnung"/"Invoice" row into income.
+DIRECTION_RULES = KEYWORD_RULES[:2]
+
+# Report columns holding the document type, best first
+TYPE_COLUMNS = ("_documentType",) + DOCUMENT_TYPE_FIELDS
+
+Rules = Sequence[Tuple[str, Sequence[str]]]
+
+
+def _patterns(rules: Rules) -> List[Tuple[str, str]]:
+    """One regex alternation per rule"""
+    return [
+        (category, "|".join(re.escape(keyword) for keyword in keywords))
+        for category, keywords in rules
+    ]
+
+
+def classify_type(doc_type: Any, amount: Any = 0) -> str:
+    """
+    Classify one document type and amount as 'income' or 'cost'
+
+    Args:
+        doc_type: Document type or kind (any case, may be empty)
+        amount: Gross or net amount, used when the type matches no rule
+
+    Returns:
+        'income' or 'cost'
+    """
+    text = str(doc_type or "").lower()
+    for category, keywords in KEYWORD_RULES:
+        if any(keyword in text for keyword in keywords):
+            return category
+    try:
+        return INCOME if float(amount or 0) < 0 else COST
+    except (TypeError, ValueError):
+        return COST
+
+
+def document_types(df: pd.DataFrame, columns: Sequence[str] = TYPE_COLUMNS) -> pd.Series:
+    """
+    First non-empty document type per row across ``columns``
+
+    Returns:
+        Object Series aligned with ``df`` (None where no column has a value)
+    """
+    result = np.full(len(df), None, dtype=object)
+    missing = np.ones(len(df), dtype=bool)
+    for col in columns:
+        if col not in df.columns or not missing.any():
+            continue
+        values = df[col]
+        take = missing & (values.notna() & (values != "")).to_numpy()
+        if take.any():
+            result[take] = values[take].astype(str).to_numpy()
+            missing &= ~take
+    return pd.Series(result, index=df.index, dtype=object)
+
+
+def classify_documents(
+    doc_types: pd.Series,
+    amounts: Optional[pd.Series] = None,
+    rules: Rules = KEYWORD_RULES,
+) -> pd.Series:
+    """
+    Classify a column of document types as 'income' or 'cost'
+
+    The keyword rules run as string-contains masks over the distinct types
+    only and are then expanded to the rows through categorical codes, so the
+    cost grows with the number of types rather than the number of rows.
+
+    Args:
+        doc_types: Document type per row (missing or empty allowed)
+        amounts: Amount per row, for types matching no rule (negative = income)
+        rules: (category, keywords) pairs, checked in order
+
+    Returns:
+        Categorical Series with categories ('income', 'cost'), aligned with ``doc_types``
+    """
+    types = pd.Series(doc_types)
+    if not isinstance(types.dtype, pd.CategoricalDtype):
+        types = types.astype("category")
+    distinct = pd.Series(types.cat.categories).astype(str).str.lower()
+
+    # Category code per distinct type (-1: no rule matched)
+    labels = np.full(len(distinct), -1, dtype=np.int8)
+    for category, pattern in _patterns(rules):
+        hits = distinct.str.contains(pattern, regex=True).to_numpy() & (labels < 0)
+        labels[hits] = CATEGORIES.index(category)
+
+    codes = types.cat.codes.to_numpy()
+    result = np.where(codes >= 0, labels[np.maximum(codes, 0)] if len(labels) else -1, -1).astype(np.int8)
+
+    unmatched = result < 0
+    if unmatched.any():
+        if amounts is None:
+            result[unmatched] = CATEGORIES.index(COST)
+        else:
+            values = pd.to_numeric(pd.Series(amounts), errors="coerce").fillna(0).to_numpy()
+            result[unmatched] = np.where(values[unmatched] < 0, CATEGORIES.index(INCOME), CATEGORIES.index(COST))
+
+    return pd.Series(pd.Categorical.from_codes(result, categories=CATEGORIES), index=types.index)
+
+
+def classify_frame(
+    df: pd.DataFrame,
+    amount_col: Optional[str],
+    type_columns: Sequence[str] = TYPE_COLUMNS,
+    rules: Rules = KEYWORD_RULES,
+) -> pd.Series:
+    """
+    Classify every row of a report or document frame
+
+    Args:
+        df: Rows with a document type column and an amount column
+        amount_col: Amount column for rows whose type matches no rule
+        type_columns: Type columns to coalesce, best first
+        rules: (category, keywords) pairs, checked in order
+
+    Returns:
+        Categorical Series with categories ('income', 'cost'), aligned with ``df``
+    """
+    amounts = df[amount_col] if amount_col and amount_col in df.columns else None
+    return classify_documents(document_types(df, type_columns), amounts, rules)
+
+
+def classify_document(doc: Dict[str, Any]) -> str:
+    """Classify one document dict (type fields, then totalGross/totalNet sign)"""
+    doc_type = next((doc.get(name) for name in DOCUMENT_TYPE_FIELDS if doc.get(name)), "")
+    amount = doc.get("totalGross", 0) or doc.get("totalNet", 0) or 0
+    return classify_type(doc_type, amount)
@@ -0,0 +1,305 @@
+"""
+Document Detail Store
+Persistent get_document() results shared by every page, invalidated by stageTimestamp
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.storage import get_data_dir
+
+DOCUMENT_TYPE_FIELDS = ("documentType", "documenttype", "documentKind", "documentkind")
+CURRENCY_FIELDS = ("currencyCode",)
+INVOICE_NUMBER_FIELDS = (
+    "invoiceNumber",
+    "invoice_number",
+    "InvoiceNumber",
+    "receiptNumber",
+    "receipt_number",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS details (
+    scope TEXT NOT NULL,
+    document_id INTEGER NOT NULL,
+    stage_timestamp TEXT,
+    payload TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (scope, document_id)
+);
+"""
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+
+def _as_id(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_stamp(value: Any) -> Optional[str]:
+    """Comparable stageTimestamp: naive-UTC ISO text, whatever form it came in"""
+    if value is None or value == "" or value != value:  # NaN/NaT
+        return None
+    text = str(value)
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return text
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat()
+
+
+def detail_field(detail: Optional[Dict[str, Any]], fields: Tuple[str, ...], default: Any = "") -> Any:
+    """First non-empty value of ``fields`` in a document detail, or ``default``"""
+    if not detail:
+        return default
+    for name in fields:
+        value = detail.get(name)
+        if value:
+            return value
+    return default
+
+
+def stage_timestamps(*sources: Any) -> Dict[int, str]:
+    """
+    Collect documentId -> stageTimestamp from document lists or DataFrames
+
+    Later sources win, so pass the document list first and fresher report
+    rows after it. Rows without either field are skipped.
+    """
+    stamps: Dict[int, str] = {}
+    for source in sources:
+        if source is None:
+            continue
+        columns = getattr(source, "columns", None)
+        if columns is not None:
+            if "documentId" not in columns or "stageTimestamp" not in columns:
+                continue
+            pairs = zip(source["documentId"], source["stageTimestamp"])
+        else:
+            pairs = ((doc.get("documentId"), doc.get("stageTimestamp")) for doc in source)
+        for raw_id, raw_stamp in pairs:
+            doc_id, stamp = _as_id(raw_id), _as_stamp(raw_stamp)
+            if doc_id is not None and stamp is not None:
+                stamps[doc_id] = stamp
+    return stamps
+
+
+class DocumentDetailStore:
+    """
+    get_document() results per (scope, documentId) in SQLite
+
+    A stored detail stays valid until the document's stageTimestamp in the
+    document list differs from the one it was fetched with; documents whose
+    current stageTimestamp is unknown are served as stored. Recently used
+    details are also kept in memory. If a refetch fails, the older detail is
+    returned rather than nothing.
+    """
+
+    def __init__(self, path: Optional[Path] = None, memory_entries: int = 20000):
+        """
+        Args:
+            path: Database file (default: <data dir>/details/documents.sqlite3)
+            memory_entries: Details kept in memory in front of SQLite
+        """
+        self.path = Path(path) if path else get_data_dir("details") / "documents.sqlite3"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[Tuple[str, int], Tuple[Optional[str], Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fetches = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _remember(self, key: Tuple[str, int], stamp: Optional[str], detail: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[key] = (stamp, detail)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _load(self, scope: str, ids: List[int]) -> Dict[int, Tuple[Optional[str], Dict[str, Any]]]:
+        found: Dict[int, Tuple[Optional[str], Dict[str, Any]]] = {}
+        missing = []
+        with self._lock:
+            for doc_id in ids:
+                entry = self._memory.get((scope, doc_id))
+                if entry is None:
+                    missing.append(doc_id)
+                else:
+                    self._memory.move_to_end((scope, doc_id))
+                    found[doc_id] = entry
+        if not missing:
+            return found
+
+        try:
+            with self._connect() as conn:
+                for start in range(0, len(missing), _QUERY_CHUNK):
+                    chunk = missing[start:start + _QUERY_CHUNK]
+                    rows = conn.execute(
+                        "SELECT document_id, stage_timestamp, payload FROM details "
+                        f"WHERE scope = ? AND document_id IN ({','.join('?' * len(chunk))})",
+                        (scope, *chunk),
+                    ).fetchall()
+                    for doc_id, stamp, payload in rows:
+                        entry = (stamp, json.loads(payload))
+                        found[doc_id] = entry
+                        self._remember((scope, doc_id), *entry)
+        except sqlite3.Error as e:
+            print(f"Could not read document details {self.path}: {e}")
+        return found
+
+    def _save(self, scope: str, entries: Dict[int, Tuple[Optional[str], Dict[str, Any]]]) -> None:
+        now = time.time()
+        for doc_id, (stamp, detail) in entries.items():
+            self._remember((scope, doc_id), stamp, detail)
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO details VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (scope, doc_id, stamp, json.dumps(detail, separators=(",", ":")), now)
+                        for doc_id, (stamp, detail) in entries.items()
+                    ],
+                )
+        except sqlite3.Error as e:
+            print(f"Could not write document details: {e}")
+
+    def _is_current(self, entry: Optional[Tuple[Optional[str], Dict[str, Any]]], current: Optional[str]) -> bool:
+        return entry is not None and (current is None or entry[0] == current)
+
+    def pending(
+        self,
+        client,
+        document_ids: Iterable[Any],
+        stage_timestamps: Optional[Dict[int, str]] = None,
+    ) -> List[int]:
+        """IDs that get_details() would fetch (unknown or changed documents)"""
+        ids = list(dict.fromkeys(i for i in map(_as_id, document_ids) if i is not None))
+        stamps = stage_timestamps or {}
+        stored = self._load(client.cache_scope(), ids)
+        return [i for i in ids if not self._is_current(stored.get(i), stamps.get(i))]
+
+    def get_details(
+        self,
+        client,
+        document_ids: Iterable[Any],
+        stage_timestamps: Optional[Dict[int, str]] = None,
+        progress_callback: Optional[Any] = None,
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Details of many documents, fetching only unknown or changed ones
+
+        Args:
+            client: FlowwerAPIClient used for documents that must be fetched
+            document_ids: Document IDs (ints, numeric strings or floats)
+            stage_timestamps: Current documentId -> stageTimestamp (see
+                              stage_timestamps()); a stored detail with a
+                              different value is refetched
+            progress_callback: Optional callback accepting (percentage: float, text: str)
+
+        Returns:
+            Dict of integer document ID to detail dictionary. Documents that
+            could not be fetched and were never stored are left out.
+        """
+        ids = list(dict.fromkeys(i for i in map(_as_id, document_ids) if i is not None))
+        if not ids:
+            return {}
+        stamps = stage_timestamps or {}
+        scope = client.cache_scope()
+
+        stored = self._load(scope, ids)
+        details: Dict[int, Dict[str, Any]] = {}
+        to_fetch = []
+        for doc_id in ids:
+            entry = stored.get(doc_id)
+            if self._is_current(entry, stamps.get(doc_id)):
+                details[doc_id] = entry[1]
+            else:
+                to_fetch.append(doc_id)
+        self.hits += len(details)
+
+        if to_fetch:
+            self.fetches += len(to_fetch)
+            fetched = {}
+            for doc_id, result in client.get_documents(to_fetch, progress_callback).items():
+                detail = result.get("document")
+                if detail:
+                    stamp = stamps.get(doc_id) or _as_stamp(detail.get("stageTimestamp"))
+                    fetched[doc_id] = (stamp, detail)
+                    details[doc_id] = detail
+                elif doc_id in stored:
+                    details[doc_id] = stored[doc_id][1]
+            if fetched:
+                self._save(scope, fetched)
+        return details
+
+    def get_field(
+        self,
+        client,
+        document_ids: Iterable[Any],
+        fields: Tuple[str, ...],
+        default: Any = "",
+        stage_timestamps: Optional[Dict[int, str]] = None,
+        progress_callback: Optional[Any] = None,
+    ) -> Dict[int, Any]:
+        """
+        One value per document, e.g. fields=DOCUMENT_TYPE_FIELDS
+
+        Returns:
+            Dict of integer document ID to the first non-empty field value, or
+            ``default`` (also for documents that could not be fetched)
+        """
+        ids = [i for i in map(_as_id, document_ids) if i is not None]
+        details = self.get_details(client, ids, stage_timestamps, progress_callback)
+        return {doc_id: detail_field(details.get(doc_id), fields, default) for doc_id in ids}
+
+    def invalidate(self, scope: Optional[str] = None) -> None:
+        """Forget stored details of one scope, or all of them"""
+        with self._lock:
+            if scope is None:
+                self._memory.clear()
+            else:
+                for key in [k for k in self._memory if k[0] == scope]:
+                    del self._memory[key]
+        with self._connect() as conn:
+            if scope is None:
+                conn.execute("DELETE FROM details")
+            else:
+                conn.execute("DELETE FROM details WHERE scope = ?", (scope,))
+
+
+_default_store: Optional[DocumentDetailStore] = None
+_default_lock = threading.Lock()
+
+
+def get_detail_store() -> DocumentDetailStore:
+    """Process-wide detail store shared by every session"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = DocumentDetailStore()
+        return _default_store
@@ -0,0 +1,145 @@
+"""
+Document Frame
+One typed, columnar DataFrame per loaded Flowwer document list
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.document_store import get_derived
+
+try:
+    import pyarrow  # noqa: F401  (backs the string columns)
+
+    STRING_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:
+    STRING_DTYPE = pd.StringDtype()
+
+# Repeated text stored once per distinct value
+CATEGORY_COLUMNS = (
+    "companyName",
+    "supplierName",
+    "currentStage",
+    "flowName",
+    "paymentState",
+    "currencyCode",
+    "documentType",
+    "documentKind",
+)
+
+DATETIME_COLUMNS = (
+    "invoiceDate",
+    "dueDate",
+    "paymentDate",
+    "discountPeriodEnd",
+    "uploadTime",
+    "createdDate",
+    "creationTimestampUtc",
+    "stageTimestamp",
+)
+
+AMOUNT_COLUMNS = ("totalGross", "totalNet", "totalTax")
+
+ID_COLUMNS = ("documentId", "flowId", "companyId", "supplierId")
+
+
+def _parse_datetimes(series: pd.Series) -> pd.Series:
+    """Wall-clock time as written (offsets dropped), NaT if missing or invalid"""
+    text = series.map(lambda v: str(v)[:19] if v not in (None, "") and v == v else None)
+    return pd.to_datetime(text, format="ISO8601", errors="coerce")
+
+
+def to_document_frame(documents: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Convert documents to one row per document with typed columns
+
+    Names, stages, flows and other repeated text become categoricals, known
+    date fields datetimes, amounts float64, IDs nullable integers and other
+    text pyarrow strings. Nested values (e.g. receiptSplits) are left out;
+    they stay on the document dicts.
+
+    Args:
+        documents: Document list as returned by get_all_documents()
+
+    Returns:
+        DataFrame aligned with ``documents`` (row i is documents[i])
+    """
+    df = pd.DataFrame.from_records(documents) if documents else pd.DataFrame()
+    for col in list(df.columns):
+        series = df[col]
+        if col in DATETIME_COLUMNS:
+            df[col] = _parse_datetimes(series)
+        elif col in AMOUNT_COLUMNS:
+            df[col] = pd.to_numeric(series, errors="coerce").astype("float64")
+        elif col in ID_COLUMNS:
+            df[col] = pd.to_numeric(series, errors="coerce").astype("Int64")
+        elif col in CATEGORY_COLUMNS:
+            df[col] = series.map(lambda v: None if v is None or v != v else str(v)).astype("category")
+        elif series.dtype == object:
+            values = series.dropna()
+            if values.map(lambda v: isinstance(v, (dict, list))).any():
+                df = df.drop(columns=[col])
+            elif len(values) and values.map(lambda v: isinstance(v, bool)).all():
+                df[col] = series.astype("boolean")
+            elif len(values) and values.map(lambda v: isinstance(v, (int, float)) and not isinstance(v, bool)).all():
+                df[col] = pd.to_numeric(series, errors="coerce").astype("float64")
+            else:
+                df[col] = series.map(lambda v: None if v is None else str(v)).astype(STRING_DTYPE)
+    return df
+
+
+def document_view(
+    frame: pd.DataFrame,
+    columns: Dict[str, str],
+    rows: Optional[Any] = None,
+    defaults: Optional[Dict[str, Any]] = None,
+    date_format: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Table of selected document columns under display names
+
+    Args:
+        frame: Frame from get_document_frame()
+        columns: Document field -> column label, in display order; fields the
+                 documents do not have become empty columns
+        rows: Optional boolean mask or positions to keep
+        defaults: Column label -> value for missing entries
+        date_format: If set, datetime columns become strings in this format
+                     (missing dates as "")
+
+    Returns:
+        New DataFrame; categoricals stay categoricals
+    """
+    selected = frame if rows is None else frame.iloc[np.flatnonzero(rows) if np.asarray(rows).dtype == bool else rows]
+    view = pd.DataFrame(index=selected.index)
+    for field, label in columns.items():
+        view[label] = selected[field] if field in selected.columns else pd.Series(pd.NA, index=selected.index, dtype=object)
+    view = view.reset_index(drop=True)
+
+    for label, default in (defaults or {}).items():
+        series = view[label]
+        if not series.isna().any():
+            continue
+        if isinstance(series.dtype, pd.CategoricalDtype) and default not in series.cat.categories:
+            series = series.cat.add_categories([default])
+        view[label] = series.fillna(default)
+
+    if date_format:
+        for label in view.columns:
+            if pd.api.types.is_datetime64_any_dtype(view[label]):
+                view[label] = view[label].dt.strftime(date_format).fillna("")
+    return view
+
+
+def get_document_frame(documents: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Typed frame of a document list, built once per list
+
+    Kept on the store entry, or in session state for the session's own list
+    after the store has moved on (see get_derived). Other lists are
+    converted on every call, so callers that reuse one should keep the frame.
+    Callers must not modify the returned frame.
+    """
+    return get_derived(documents, "frame", to_document_frame)
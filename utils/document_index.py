@@ -0,0 +1,288 @@
+"""
+Document Index
+Columnar filter engine for loaded document lists: categorical codes, per-value bitmaps, parsed dates
+"""
+
+import threading
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.document_frame import get_document_frame
+from utils.document_store import get_derived
+
+# Filter name -> document field
+FACET_FIELDS = {
+    "company": "companyName",
+    "stage": "currentStage",
+    "payment": "paymentState",
+    "supplier": "supplierName",
+    "currency": "currencyCode",
+    "flow": "flowName",
+}
+
+
+def _to_day(value: Any) -> Optional[np.datetime64]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        value = value[:10]
+    day = pd.Timestamp(value)
+    return None if pd.isna(day) else np.datetime64(day.date(), "D")
+
+
+class DocumentIndex:
+    """
+    Filter structures built once per loaded document list
+
+    Built on the list's typed DocumentFrame: every facet (company, stage,
+    payment, supplier, currency, flow) is its categorical codes. The first time a value is filtered on, its rows are
+    packed into a bitmap and kept, so later filter changes AND a few bitmaps
+    together. Invoice dates are parsed once into a day array and gross
+    values into a float array, so date and value filters are vectorized too.
+    """
+
+    def __init__(self, documents: List[Dict[str, Any]]):
+        """
+        Args:
+            documents: Document list as returned by get_all_documents()
+        """
+        self.documents = documents
+        self.size = len(documents)
+        # Columns come from the shared typed frame, so nothing is parsed twice
+        self.frame = get_document_frame(documents)
+        self._codes: Dict[str, np.ndarray] = {}
+        self._categories: Dict[str, pd.Index] = {}
+        for field in FACET_FIELDS.values():
+            if field in self.frame.columns:
+                categorical = self.frame[field].cat
+                self._codes[field] = categorical.codes.to_numpy()
+                self._categories[field] = categorical.categories
+            else:
+                self._codes[field] = np.full(self.size, -1, dtype=np.int8)
+                self._categories[field] = pd.Index([], dtype=object)
+
+        self.invoice_days = self._column("invoiceDate", "datetime64[ns]").to_numpy().astype("datetime64[D]")
+        self.total_gross = self._column("totalGross", "float64").fillna(0.0).to_numpy(dtype=float)
+        self.total_net = self._column("totalNet", "float64").fillna(0.0).to_numpy(dtype=float)
+
+        self._bitmaps: Dict[Tuple[str, Any], np.ndarray] = {}
+        self._cost_center_rows: Optional[Dict[str, List[int]]] = None
+        self._date_index: Optional["InvoiceDateIndex"] = None
+        self._lock = threading.Lock()
+
+    def _column(self, field: str, dtype: str) -> pd.Series:
+        if field in self.frame.columns:
+            return self.frame[field]
+        return pd.Series(np.full(self.size, None), dtype=dtype)
+
+    @property
+    def date_index(self) -> "InvoiceDateIndex":
+        """Sorted invoice-date index with prefix sums (built on first use)"""
+        if self._date_index is None:
+            self._date_index = InvoiceDateIndex(self.invoice_days, self.total_gross, self.total_net)
+        return self._date_index
+
+    def values(self, field: str) -> List[str]:
+        """Distinct non-empty values of a document field, sorted"""
+        return [value for value in self._categories[field] if value != ""]
+
+    def date_bounds(self) -> Optional[Tuple[date, date]]:
+        """Earliest and latest invoice date, or None if no document has one"""
+        valid = self.invoice_days[~np.isnat(self.invoice_days)]
+        if not len(valid):
+            return None
+        return valid.min().astype(date), valid.max().astype(date)
+
+    def _bitmap(self, field: str, value: Any) -> np.ndarray:
+        """Packed rows where ``field`` equals ``value`` (built on first use)"""
+        value = str(value)
+        key = (field, value)
+        with self._lock:
+            bitmap = self._bitmaps.get(key)
+        if bitmap is None:
+            categories = self._categories[field]
+            if value in categories:
+                rows = self._codes[field] == categories.get_loc(value)
+            else:
+                rows = np.zeros(self.size, dtype=bool)
+            bitmap = np.packbits(rows)
+            with self._lock:
+                self._bitmaps[key] = bitmap
+        return bitmap
+
+    def _cost_center_bitmap(self, cost_centers: Iterable[Any]) -> np.ndarray:
+        """Packed rows with at least one receipt split in ``cost_centers``"""
+        with self._lock:
+            if self._cost_center_rows is None:
+                rows: Dict[str, List[int]] = {}
+                for position, doc in enumerate(self.documents):
+                    splits = doc.get("receiptSplits") or doc.get("documentReceiptSplits") or []
+                    for split in splits:
+                        cc = str(split.get("costCenter", "")).strip()
+                        rows.setdefault(cc, []).append(position)
+                self._cost_center_rows = rows
+            cost_center_rows = self._cost_center_rows
+        mask = np.zeros(self.size, dtype=bool)
+        for cc in {str(cc) for cc in cost_centers}:
+            positions = cost_center_rows.get(cc)
+            if positions:
+                mask[positions] = True
+        return np.packbits(mask)
+
+    def mask(
+        self,
+        company: Optional[str] = None,
+        stage: Optional[str] = None,
+        payment: Optional[str] = None,
+        supplier: Optional[str] = None,
+        currency: Optional[str] = None,
+        flow: Optional[str] = None,
+        date_from: Optional[Any] = None,
+        date_to: Optional[Any] = None,
+        min_value: Optional[float] = None,
+        min_abs_value: Optional[float] = None,
+        cost_centers: Optional[Iterable[Any]] = None,
+    ) -> np.ndarray:
+        """
+        Boolean row mask for the given filters (None or "All" means no filter)
+
+        Args:
+            company, stage, payment, supplier, currency, flow: Exact field values
+            date_from: First invoice date to keep (date or ISO string)
+            date_to: Last invoice date to keep (date or ISO string)
+            min_value: Minimum totalGross
+            min_abs_value: Minimum absolute totalGross
+            cost_centers: Keep documents with a receipt split in one of these
+
+        Returns:
+            numpy bool array aligned with ``documents``
+        """
+        packed = None
+        facets = {
+            "company": company,
+            "stage": stage,
+            "payment": payment,
+            "supplier": supplier,
+            "currency": currency,
+            "flow": flow,
+        }
+        for name, value in facets.items():
+            if value is None or value == "All":
+                continue
+            bitmap = self._bitmap(FACET_FIELDS[name], value)
+            packed = bitmap if packed is None else packed & bitmap
+        if cost_centers:
+            bitmap = self._cost_center_bitmap(cost_centers)
+            packed = bitmap if packed is None else packed & bitmap
+
+        if packed is None:
+            mask = np.ones(self.size, dtype=bool)
+        else:
+            mask = np.unpackbits(packed, count=self.size).astype(bool)
+
+        first_day, last_day = _to_day(date_from), _to_day(date_to)
+        if first_day is not None:
+            mask &= self.invoice_days >= first_day
+        if last_day is not None:
+            mask &= self.invoice_days <= last_day
+        if min_value is not None and min_value > 0:
+            mask &= self.total_gross >= min_value
+        if min_abs_value is not None and min_abs_value > 0:
+            mask &= np.abs(self.total_gross) >= min_abs_value
+        return mask
+
+    def select(self, mask: np.ndarray) -> List[Dict[str, Any]]:
+        """Documents of a mask, in their original order"""
+        if mask.all():
+            return self.documents
+        return [self.documents[i] for i in np.flatnonzero(mask)]
+
+    def filter(self, **filters: Any) -> List[Dict[str, Any]]:
+        """Documents matching the filters of mask(), in their original order"""
+        return self.select(self.mask(**filters))
+
+    def totals(self, mask: np.ndarray) -> Tuple[int, float, float]:
+        """(count, sum of |totalGross|, sum of |totalNet|) of a mask"""
+        return (
+            int(mask.sum()),
+            float(np.abs(self.total_gross[mask]).sum()),
+            float(np.abs(self.total_net[mask]).sum()),
+        )
+
+    def monthly_values(self, mask: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Invoice month and totalGross per document, for timeline charts
+
+        Returns:
+            DataFrame with "Month" (YYYY-MM) and "Value", documents without a
+            valid invoice date left out
+        """
+        keep = ~np.isnat(self.invoice_days)
+        if mask is not None:
+            keep &= mask
+        months = self.invoice_days[keep].astype("datetime64[M]").astype(str)
+        return pd.DataFrame({"Month": months, "Value": self.total_gross[keep]})
+
+
+class InvoiceDateIndex:
+    """
+    Invoice days sorted once, with cumulative counts and gross/net sums
+
+    The documents of any date range are a contiguous slice of the sorted
+    days, found with two binary searches, so its count and totals are
+    differences of the prefix arrays. Sums are of absolute values, as in
+    the KPI cards. Documents without an invoice date are not indexed.
+    """
+
+    def __init__(self, invoice_days: np.ndarray, total_gross: np.ndarray, total_net: np.ndarray):
+        """
+        Args:
+            invoice_days: datetime64[D] per document (NaT if unknown)
+            total_gross: totalGross per document
+            total_net: totalNet per document
+        """
+        dated = ~np.isnat(invoice_days)
+        order = np.argsort(invoice_days[dated], kind="stable")
+        self.days = invoice_days[dated][order]
+        self.positions = np.flatnonzero(dated)[order]
+        self.gross_prefix = np.concatenate(([0.0], np.cumsum(np.abs(total_gross[dated][order]))))
+        self.net_prefix = np.concatenate(([0.0], np.cumsum(np.abs(total_net[dated][order]))))
+
+    def _bounds(self, date_from: Optional[Any], date_to: Optional[Any]) -> Tuple[int, int]:
+        first_day, last_day = _to_day(date_from), _to_day(date_to)
+        lo = 0 if first_day is None else int(np.searchsorted(self.days, first_day, side="left"))
+        hi = len(self.days) if last_day is None else int(np.searchsorted(self.days, last_day, side="right"))
+        return lo, max(lo, hi)
+
+    def count(self, date_from: Optional[Any] = None, date_to: Optional[Any] = None) -> int:
+        """Documents with an invoice date in [date_from, date_to]"""
+        lo, hi = self._bounds(date_from, date_to)
+        return hi - lo
+
+    def totals(self, date_from: Optional[Any] = None, date_to: Optional[Any] = None) -> Tuple[int, float, float]:
+        """(count, sum of |totalGross|, sum of |totalNet|) for [date_from, date_to]"""
+        lo, hi = self._bounds(date_from, date_to)
+        return (
+            hi - lo,
+            float(self.gross_prefix[hi] - self.gross_prefix[lo]),
+            float(self.net_prefix[hi] - self.net_prefix[lo]),
+        )
+
+    def positions_between(self, date_from: Optional[Any] = None, date_to: Optional[Any] = None) -> np.ndarray:
+        """Document positions in the range, ordered by invoice date"""
+        lo, hi = self._bounds(date_from, date_to)
+        return self.positions[lo:hi]
+
+
+def get_document_index(documents: List[Dict[str, Any]]) -> DocumentIndex:
+    """
+    Index of a document list, built once per list
+
+    Kept on the store entry, or in session state for the session's own list
+    after the store has moved on (see get_derived). Other lists get a new
+    index on every call.
+    """
+    return get_derived(documents, "index", DocumentIndex)
@@ -0,0 +1,401 @@
+"""
+Shared Document Store
+One process-wide copy of the Flowwer document list per API key, shared by all sessions
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+StoreKey = Tuple[str, bool, bool]
+
+# Session state key for structures built from the session's own document
+# list after the store has replaced it: (documents, {name: structure})
+_SESSION_DERIVED_KEY = "_documents_derived"
+
+# Max age accepted by explicit "Refresh" / "Load" buttons: a list another
+# session loaded within this window is reused instead of refetched
+REFRESH_MAX_AGE = 60.0
+
+
+class _Entry:
+    """A loaded document list and its bookkeeping."""
+
+    def __init__(self, documents: List[Dict[str, Any]], full_loaded_at: Optional[float] = None):
+        self.documents = documents
+        self.loaded_at = time.time()
+        self.full_loaded_at = full_loaded_at or self.loaded_at
+        self.last_access = self.loaded_at
+        # Structures built from the list (typed frame, filter index), released with it
+        self.derived: Dict[str, Any] = {}
+
+
+class DocumentStore:
+    """
+    Process-wide cache of get_all_documents() results
+
+    Entries are keyed by API-key scope and the include_processed /
+    include_deleted flags, so users with different keys never see each
+    other's data. Every session receives a reference to the same list
+    instead of its own copy; callers must treat it as read-only.
+
+    An entry older than ``ttl_seconds`` is brought up to date with an
+    incremental sync (FlowwerAPIClient.sync_documents) rather than a full
+    download. Every ``full_refresh_seconds`` a full load replaces it, which
+    also picks up changes to documents created before the sync window. The
+    least recently used entry is evicted once more than ``max_entries`` are held.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 1800.0,
+        max_entries: int = 8,
+        full_refresh_seconds: float = 12 * 3600.0,
+    ):
+        """
+        Args:
+            ttl_seconds: Age after which an entry is synced again
+            max_entries: Maximum number of document lists kept in memory
+            full_refresh_seconds: Age of the last full load after which a
+                                  full load is done instead of a sync
+        """
+        self.ttl_seconds = ttl_seconds
+        self.full_refresh_seconds = full_refresh_seconds
+        self.max_entries = max(1, max_entries)
+        self._entries: Dict[StoreKey, _Entry] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[StoreKey, threading.Lock] = {}
+
+    @staticmethod
+    def key_for(client, include_processed: bool, include_deleted: bool) -> StoreKey:
+        return (client.cache_scope(), bool(include_processed), bool(include_deleted))
+
+    def _fresh_entry(self, key: StoreKey, max_age: float) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry.loaded_at > min(max_age, self.ttl_seconds):
+                return None
+            entry.last_access = time.time()
+            return entry
+
+    def get_documents(
+        self,
+        client,
+        include_processed: bool = False,
+        include_deleted: bool = False,
+        max_age: Optional[float] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Return the shared document list, loading or syncing it if too old
+
+        Args:
+            client: FlowwerAPIClient used when a load is needed
+            include_processed: Include processed documents
+            include_deleted: Include deleted documents
+            max_age: Refresh if the entry is older than this many seconds
+                     (default: the store TTL). Refresh buttons pass a small
+                     value so a list another user just loaded is reused.
+
+        Returns:
+            Shared, read-only list of documents or None if loading failed
+        """
+        documents, _ = self.refresh(
+            client,
+            include_processed=include_processed,
+            include_deleted=include_deleted,
+            max_age=max_age,
+        )
+        return documents
+
+    def refresh(
+        self,
+        client,
+        include_processed: bool = False,
+        include_deleted: bool = False,
+        max_age: Optional[float] = None,
+        progress_callback: Optional[Any] = None,
+    ) -> Tuple[Optional[List[Dict[str, Any]]], Optional[Any]]:
+        """
+        Bring the shared list up to date, incrementally when possible
+
+        Concurrent sessions asking for the same key wait for a single load.
+
+        Args:
+            client: FlowwerAPIClient used for the load or sync
+            include_processed: Include processed documents
+            include_deleted: Include deleted documents
+            max_age: Reuse the entry as is if younger than this many seconds
+            progress_callback: Optional callback accepting (percentage: float, text: str)
+
+        Returns:
+            Tuple of (documents, DocumentSync). The sync is None when the
+            entry was reused or fully reloaded; documents is None on failure.
+        """
+        if not client.api_key:
+            return None, None
+
+        key = self.key_for(client, include_processed, include_deleted)
+        max_age = self.ttl_seconds if max_age is None else max_age
+
+        entry = self._fresh_entry(key, max_age)
+        if entry is not None:
+            return entry.documents, None
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            # Another session may have finished loading while we waited
+            entry = self._fresh_entry(key, max_age)
+            if entry is not None:
+                return entry.documents, None
+
+            with self._lock:
+                snapshot = self._entries.get(key)
+            if (
+                snapshot is not None
+                and time.time() - snapshot.full_loaded_at <= self.full_refresh_seconds
+            ):
+                sync = client.sync_documents(
+                    snapshot.documents,
+                    since=datetime.fromtimestamp(snapshot.loaded_at),
+                    include_processed=include_processed,
+                    include_deleted=include_deleted,
+                    progress_callback=progress_callback,
+                )
+                if sync is not None:
+                    self._put(key, sync.documents, full_loaded_at=snapshot.full_loaded_at)
+                    return sync.documents, sync
+
+            documents = client.get_all_documents(
+                include_processed=include_processed, include_deleted=include_deleted
+            )
+            if documents is None:
+                with self._lock:
+                    if key not in self._entries:
+                        self._load_locks.pop(key, None)
+                return None, None
+            self._put(key, documents)
+            return documents, None
+
+    def has_snapshot(self, client, include_processed: bool = False, include_deleted: bool = False) -> bool:
+        """True if a list for these flags is held and can be synced incrementally"""
+        with self._lock:
+            entry = self._entries.get(self.key_for(client, include_processed, include_deleted))
+        return entry is not None and time.time() - entry.full_loaded_at <= self.full_refresh_seconds
+
+    def peek(self, client, include_processed: Optional[bool] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Return any fresh list for the client's API key without loading
+
+        Args:
+            client: FlowwerAPIClient whose scope to look up
+            include_processed: Require this flag value (default: any)
+        """
+        scope = client.cache_scope()
+        now = time.time()
+        with self._lock:
+            candidates = [
+                (key, entry)
+                for key, entry in self._entries.items()
+                if key[0] == scope
+                and now - entry.loaded_at <= self.ttl_seconds
+                and (include_processed is None or key[1] == include_processed)
+            ]
+        if not candidates:
+            return None
+        # Prefer the most complete list (processed included, deleted excluded)
+        candidates.sort(key=lambda item: (item[0][1], not item[0][2]), reverse=True)
+        return candidates[0][1].documents
+
+    def holds(self, documents: List[Dict[str, Any]]) -> bool:
+        """True if ``documents`` is a list currently held by the store"""
+        with self._lock:
+            return any(entry.documents is documents for entry in self._entries.values())
+
+    def derived(
+        self,
+        documents: List[Dict[str, Any]],
+        name: str,
+        build: Callable[[List[Dict[str, Any]]], Any],
+    ) -> Optional[Any]:
+        """
+        A structure built from a held document list, once per list
+
+        The result is kept on the store entry, so it is released together
+        with the list when the entry is replaced or evicted.
+
+        Args:
+            documents: A list handed out by the store
+            name: Name of the structure (e.g. "frame")
+            build: Called with the list to build it
+
+        Returns:
+            The structure, or None if the store does not hold ``documents``
+        """
+        with self._lock:
+            entry = next((e for e in self._entries.values() if e.documents is documents), None)
+            if entry is None:
+                return None
+            value = entry.derived.get(name)
+        if value is None:
+            value = build(documents)
+            with self._lock:
+                value = entry.derived.setdefault(name, value)
+        return value
+
+    def loaded_at(self, client, include_processed: bool = False, include_deleted: bool = False) -> Optional[float]:
+        """Epoch seconds when the entry was loaded, or None"""
+        with self._lock:
+            entry = self._entries.get(self.key_for(client, include_processed, include_deleted))
+            return entry.loaded_at if entry else None
+
+    def _put(
+        self,
+        key: StoreKey,
+        documents: List[Dict[str, Any]],
+        full_loaded_at: Optional[float] = None,
+    ) -> None:
+        with self._lock:
+            entry = _Entry(documents, full_loaded_at)
+            previous = self._entries.get(key)
+            if previous is not None and previous.documents is documents:
+                # A sync without changes keeps the list, and with it what was built from it
+                entry.derived = previous.derived
+            self._entries[key] = entry
+            now = time.time()
+            for stale in [
+                k
+                for k, e in self._entries.items()
+                if now - e.full_loaded_at > self.full_refresh_seconds
+            ]:
+                self._drop(stale)
+            while len(self._entries) > self.max_entries:
+                self._drop(min(self._entries, key=lambda k: self._entries[k].last_access))
+
+    def _drop(self, key: StoreKey) -> None:
+        """Remove an entry and its load lock (caller holds self._lock)"""
+        self._entries.pop(key, None)
+        self._load_locks.pop(key, None)
+
+    def invalidate(self, client=None) -> None:
+        """Drop entries for one client's API key, or all entries"""
+        with self._lock:
+            if client is None:
+                self._entries.clear()
+                self._load_locks.clear()
+                return
+            scope = client.cache_scope()
+            for key in [k for k in set(self._entries) | set(self._load_locks) if k[0] == scope]:
+                self._drop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of entries and documents currently held"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "documents": sum(len(e.documents) for e in self._entries.values()),
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_document_store() -> DocumentStore:
+    """The single DocumentStore of this Streamlit process"""
+    return DocumentStore()
+
+
+def _session_documents() -> Optional[List[Dict[str, Any]]]:
+    """The current session's document list, or None outside a Streamlit session"""
+    if get_script_run_ctx() is None:
+        return None
+    return st.session_state.get("documents")
+
+
+def keeps_derived(documents: List[Dict[str, Any]]) -> bool:
+    """True if structures built from ``documents`` are kept (see get_derived)"""
+    if get_document_store().holds(documents):
+        return True
+    return documents is not None and documents is _session_documents()
+
+
+def get_derived(
+    documents: List[Dict[str, Any]],
+    name: str,
+    build: Callable[[List[Dict[str, Any]]], Any],
+) -> Any:
+    """
+    A structure built from a document list, once per list
+
+    Lists held by the store keep it on their entry. A session goes on using
+    the list it loaded after another session's sync or a full refresh has
+    replaced the entry; for that list (st.session_state.documents) the
+    structure is kept in session state until the session loads another one.
+    Other lists are built on every call.
+
+    Args:
+        documents: Document list
+        name: Name of the structure (e.g. "frame")
+        build: Called with the list to build it
+    """
+    value = get_document_store().derived(documents, name, build)
+    if value is not None:
+        return value
+    if documents is None or documents is not _session_documents():
+        return build(documents)
+
+    kept = st.session_state.get(_SESSION_DERIVED_KEY)
+    if kept is None or kept[0] is not documents:
+        kept = (documents, {})
+        st.session_state[_SESSION_DERIVED_KEY] = kept
+    value = kept[1].get(name)
+    if value is None:
+        value = kept[1][name] = build(documents)
+    return value
+
+
+def load_documents(
+    client,
+    include_processed: bool = False,
+    include_deleted: bool = False,
+    max_age: Optional[float] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Load documents through the shared store
+
+    Pages call this instead of client.get_all_documents() and keep only the
+    returned reference in session state, so memory stays flat as users are added.
+    """
+    return get_document_store().get_documents(
+        client,
+        include_processed=include_processed,
+        include_deleted=include_deleted,
+        max_age=max_age,
+    )
+
+
+def refresh_documents(
+    client,
+    include_processed: bool = False,
+    include_deleted: bool = False,
+    max_age: Optional[float] = None,
+    progress_callback: Optional[Any] = None,
+):
+    """
+    Refresh documents through the shared store
+
+    Returns:
+        Tuple of (documents, DocumentSync or None), see DocumentStore.refresh
+    """
+    return get_document_store().refresh(
+        client,
+        include_processed=include_processed,
+        include_deleted=include_deleted,
+        max_age=max_age,
+        progress_callback=progress_callback,
+    )
@@ -0,0 +1,272 @@
+"""
+FX Rates
+Daily EUR exchange rates fetched per date range, stored on disk and filled over weekends and holidays
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import requests
+
+from utils.storage import get_data_dir
+
+FRANKFURTER_URL = "https://api.frankfurter.app"
+
+# Used (and counted) only for days no source could provide a rate for
+FALLBACK_RATES = {"PLN": 4.23}
+
+# Days after the latest published rate are asked for again at most this often
+_TAIL_RECHECK_SECONDS = 3600
+
+# The latest published rate stands in for at most this many following days
+# (a weekend plus a holiday); later days without a rate use the fallback
+_MAX_CARRY_DAYS = 4
+
+# Fetch this many days before a missing range, so its first days can be
+# filled forward from the last business day before it
+_LOOKBACK_DAYS = 10
+
+
+def _to_days(dates) -> pd.Series:
+    """Calendar days (datetime64, NaT if missing or invalid) of dates or date strings"""
+    stamps = pd.to_datetime(pd.Series(dates), errors="coerce")
+    if getattr(stamps.dt, "tz", None) is not None:
+        stamps = stamps.dt.tz_localize(None)
+    return stamps.dt.normalize()
+
+
+def _parse_rates(payload: Dict, currency: str) -> pd.Series:
+    """Frankfurter response ({"rates": {date: {currency: rate}}}) as a date-indexed Series"""
+    rates = payload.get("rates") or {}
+    if "date" in payload and currency in rates:
+        # Single-day response: {"date": ..., "rates": {currency: rate}}
+        rates = {payload["date"]: rates}
+    values = {day: day_rates.get(currency) for day, day_rates in rates.items() if isinstance(day_rates, dict)}
+    series = pd.Series(values, dtype="float64").dropna()
+    series.index = pd.to_datetime(series.index)
+    return series.sort_index()
+
+
+class FxRateTable:
+    """
+    Daily EUR -> ``currency`` rates for vectorized conversion
+
+    Missing days are fetched as one Frankfurter (ECB) time series covering
+    the whole gap, filled forward over weekends and holidays and written to
+    ``<data dir>/fx/EUR_<currency>.csv``, so every calendar day up to the
+    latest published rate is stored once. Up to ``_MAX_CARRY_DAYS`` days
+    after it (today, before the ECB publishes) are filled forward in memory
+    only; days further from any published rate count as fallback rows.
+
+    A local rate file (CSV with a date column and a ``rate`` or currency
+    column, or a saved Frankfurter JSON response) can replace the API, e.g.
+    for offline runs; it can also be set with ENPROM_FX_RATE_FILE.
+    """
+
+    def __init__(
+        self,
+        currency: str = "PLN",
+        path: Optional[Path] = None,
+        rate_file: Optional[Path] = None,
+        base_url: str = FRANKFURTER_URL,
+        timeout: float = 10.0,
+    ):
+        """
+        Args:
+            currency: Target currency (rates are units per 1 EUR)
+            path: Storage file (default: <data dir>/fx/EUR_<currency>.csv)
+            rate_file: Local rate file used instead of the API
+            base_url: Frankfurter API root
+            timeout: Seconds to wait for the API
+        """
+        self.currency = currency.upper()
+        self.path = Path(path) if path else get_data_dir("fx") / f"EUR_{self.currency}.csv"
+        rate_file = rate_file or os.getenv("ENPROM_FX_RATE_FILE")
+        self.rate_file = Path(rate_file) if rate_file else None
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.fallback_rate = FALLBACK_RATES.get(self.currency)
+        self._lock = threading.Lock()
+        self._file_rates: Optional[pd.Series] = None
+        self._tail_checked = 0.0
+        self._rates = self._read_store()
+
+    def _read_store(self) -> pd.Series:
+        try:
+            df = pd.read_csv(self.path, parse_dates=["date"])
+            return pd.Series(df["rate"].to_numpy(dtype=float), index=pd.DatetimeIndex(df["date"])).sort_index()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Could not read FX rates {self.path}: {e}")
+        return pd.Series(dtype="float64", index=pd.DatetimeIndex([]))
+
+    def _write_store(self) -> None:
+        df = pd.DataFrame({"date": self._rates.index.strftime("%Y-%m-%d"), "rate": self._rates.to_numpy()})
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            df.to_csv(tmp_name, index=False)
+            os.replace(tmp_name, self.path)
+        except Exception as e:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            print(f"Could not write FX rates {self.path}: {e}")
+
+    def _read_rate_file(self) -> pd.Series:
+        if self._file_rates is None:
+            if self.rate_file.suffix.lower() == ".json":
+                with open(self.rate_file, encoding="utf-8") as f:
+                    self._file_rates = _parse_rates(json.load(f), self.currency)
+            else:
+                df = pd.read_csv(self.rate_file)
+                date_col = "date" if "date" in df.columns else df.columns[0]
+                rate_col = next(c for c in ("rate", self.currency, df.columns[-1]) if c in df.columns)
+                rates = pd.Series(
+                    pd.to_numeric(df[rate_col], errors="coerce").to_numpy(),
+                    index=pd.to_datetime(df[date_col], errors="coerce"),
+                )
+                self._file_rates = rates[rates.index.notna()].dropna().sort_index()
+        return self._file_rates
+
+    def _fetch(self, start: pd.Timestamp, end: pd.Timestamp) -> Optional[pd.Series]:
+        """Published rates between start and end (one request), or None on failure"""
+        if self.rate_file is not None:
+            try:
+                return self._read_rate_file().loc[start:end]
+            except Exception as e:
+                print(f"Could not read FX rate file {self.rate_file}: {e}")
+                return None
+        url = f"{self.base_url}/{start:%Y-%m-%d}..{end:%Y-%m-%d}"
+        try:
+            response = requests.get(url, params={"from": "EUR", "to": self.currency}, timeout=self.timeout)
+            if response.status_code != 200:
+                print(f"FX rate request failed ({response.status_code}): {url}")
+                return None
+            return _parse_rates(response.json(), self.currency)
+        except Exception as e:
+            print(f"FX rate request failed: {e}")
+            return None
+
+    def ensure(self, start, end) -> bool:
+        """
+        Make sure every day from start to end (at most today) has a stored rate
+
+        Returns:
+            False if a needed range could not be fetched or ends more than
+            _MAX_CARRY_DAYS days after the latest published rate
+        """
+        today = pd.Timestamp.today().normalize()
+        carry = pd.Timedelta(days=_MAX_CARRY_DAYS)
+        first = pd.Timestamp(start).normalize()
+        last = min(pd.Timestamp(end).normalize(), today)
+        if last < first:
+            return True
+        with self._lock:
+            days = pd.date_range(first, last, freq="D")
+            missing = days.difference(self._rates.index)
+            if missing.empty:
+                return True
+            # Only the last few days, not published yet: asked for again hourly
+            only_tail = (
+                len(self._rates) > 0
+                and missing[0] > self._rates.index[-1]
+                and missing[-1] - self._rates.index[-1] <= carry
+                and missing[0] >= today - carry
+            )
+            if only_tail and time.time() - self._tail_checked < _TAIL_RECHECK_SECONDS:
+                return True
+            if only_tail:
+                self._tail_checked = time.time()
+            fetched = self._fetch(missing[0] - pd.Timedelta(days=_LOOKBACK_DAYS), missing[-1])
+            if fetched is None or fetched.empty:
+                return False
+
+            # Every calendar day up to the latest published rate, filled forward;
+            # a short gap after it is stored too once it can no longer be published
+            published = fetched.index[-1]
+            covered = missing[-1] - published <= carry
+            end_day = missing[-1] if covered and missing[-1] < today - carry else published
+            if end_day < missing[-1]:
+                self._tail_checked = time.time()
+            filled = fetched.reindex(pd.date_range(fetched.index[0], end_day, freq="D")).ffill()
+            merged = pd.concat([self._rates[~self._rates.index.isin(filled.index)], filled])
+            self._rates = merged.sort_index()
+            self._write_store()
+            return covered
+
+    def rates(self, dates) -> pd.Series:
+        """
+        Rate (currency per 1 EUR) for each date
+
+        Args:
+            dates: Dates, timestamps or ISO strings (Series, list or array)
+
+        Returns:
+            Series aligned with ``dates``: NaN for missing dates, the latest
+            earlier rate for up to _MAX_CARRY_DAYS days not published yet,
+            and the fallback rate where no rate is known (counted in
+            attrs["fallback_rows"]). If the range could not be fetched, days
+            without a stored rate of their own count as fallback as well.
+        """
+        days = _to_days(dates)
+        if isinstance(dates, pd.Series):
+            days.index = dates.index
+        valid = days.notna()
+        result = pd.Series(np.nan, index=days.index)
+        fallback_rows = 0
+        if valid.any():
+            first, last = days[valid].min(), days[valid].max()
+            complete = self.ensure(first, last)
+            with self._lock:
+                known = self._rates
+            # Extend over [first, last] so the days after a published rate take it
+            calendar = known.index.union(pd.date_range(first, last, freq="D"))
+            daily = known.reindex(calendar).ffill(limit=_MAX_CARRY_DAYS)
+            result[valid] = daily.reindex(days[valid].to_numpy()).to_numpy()
+            unknown = valid & result.isna()
+            if not complete:
+                unknown |= valid & ~days.isin(known.index)
+            fallback_rows = int(unknown.sum())
+            if fallback_rows and self.fallback_rate is not None:
+                print(f"No EUR/{self.currency} rate for {fallback_rows} row(s); using {self.fallback_rate}")
+                result[unknown] = self.fallback_rate
+            elif fallback_rows:
+                result[unknown] = np.nan
+        result.attrs["fallback_rows"] = fallback_rows
+        return result
+
+    def to_eur(self, amounts: pd.Series, dates) -> Tuple[pd.Series, int]:
+        """
+        Convert amounts in ``currency`` to EUR (amount / rate of its date)
+
+        Amounts without a valid date are returned unchanged.
+
+        Returns:
+            (converted amounts, number of rows that used the fallback rate)
+        """
+        rates = self.rates(dates)
+        rates.index = amounts.index
+        converted = pd.to_numeric(amounts, errors="coerce") / rates
+        return converted.where(rates.notna(), amounts), rates.attrs["fallback_rows"]
+
+
+_tables: Dict[str, FxRateTable] = {}
+_tables_lock = threading.Lock()
+
+
+def get_fx_rates(currency: str = "PLN") -> FxRateTable:
+    """Process-wide rate table for one currency"""
+    currency = currency.upper()
+    with _tables_lock:
+        table = _tables.get(currency)
+        if table is None:
+            table = _tables[currency] = FxRateTable(currency)
+        return table
@@ -0,0 +1,214 @@
+"""
+HTTP Resilience Utilities
+Retry with backoff, token-bucket rate limiting and a circuit breaker for API clients
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import requests
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised when the circuit breaker rejects a request without sending it"""
+
+
+class RetryPolicy:
+    """
+    Decide whether a request is retried and how long to wait first
+
+    Delays use exponential backoff with full jitter, so parallel workers that
+    fail together do not retry together. A Retry-After header from the server
+    always wins over the computed delay (capped at ``max_backoff``).
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 4,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        retry_statuses: tuple = (429, 500, 502, 503, 504),
+        retry_methods: tuple = ("GET", "HEAD", "OPTIONS"),
+    ):
+        """
+        Args:
+            max_retries: Retries after the first attempt (0 disables retrying)
+            backoff_factor: Base delay in seconds, doubled on every attempt
+            max_backoff: Upper bound for any single delay
+            retry_statuses: HTTP status codes that are retried
+            retry_methods: Methods that are safe to repeat after a server error
+        """
+        self.max_retries = max(0, max_retries)
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_methods = frozenset(m.upper() for m in retry_methods)
+
+    def should_retry_status(self, method: str, status_code: int, attempt: int) -> bool:
+        """True if a response with this status should be retried"""
+        if attempt >= self.max_retries or status_code not in self.retry_statuses:
+            return False
+        # A 429 means the server refused the request, so any method may repeat it
+        return status_code == 429 or method.upper() in self.retry_methods
+
+    def should_retry_error(self, method: str, attempt: int) -> bool:
+        """True if a connection error or timeout should be retried"""
+        return attempt < self.max_retries and method.upper() in self.retry_methods
+
+    def compute_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Seconds to wait before the next attempt
+
+        Args:
+            attempt: Zero-based index of the attempt that just failed
+            retry_after: Raw Retry-After header value, if any
+        """
+        server_delay = parse_retry_after(retry_after)
+        if server_delay is not None:
+            return min(server_delay, self.max_backoff)
+        ceiling = min(self.max_backoff, self.backoff_factor * (2**attempt))
+        return random.uniform(0, ceiling)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given as seconds or an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by all workers of a client
+
+    Each request takes one token. Tokens refill at ``rate`` per second up to
+    ``capacity``, which allows short bursts while holding the long-run request
+    rate under the API limit.
+    """
+
+    def __init__(self, rate: float = 50.0, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens added per second (sustained requests per second)
+            capacity: Maximum burst size (defaults to 2 × rate)
+        """
+        self.rate = max(0.001, rate)
+        self.capacity = capacity if capacity is not None else max(1.0, rate * 2)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Block until ``tokens`` are available and take them
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0.0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """
+        Take ``tokens`` if they are available, without blocking
+
+        Returns:
+            0.0 if the tokens were taken, otherwise the seconds to wait
+            before trying again (for callers that sleep without blocking,
+            e.g. on an event loop)
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+
+class CircuitBreaker:
+    """
+    Stop calling an API that keeps failing
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    requests fail fast for ``reset_timeout`` seconds. Then a single trial
+    request is let through (half-open); its outcome closes or re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 8, reset_timeout: float = 30.0):
+        """
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds to stay open before a trial request
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """True if a request may be sent now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_throttled(self) -> None:
+        """A throttled (429) trial proves nothing either way; allow another trial"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
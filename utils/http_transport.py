@@ -0,0 +1,211 @@
+"""
+HTTP Transport Configuration
+Shared connection pooling, keep-alive and timeout settings for API clients
+"""
+
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class TransportConfig:
+    """
+    Connection settings shared by FlowwerAPIClient, AsyncFlowwerAPIClient and DataverseClient
+
+    The connection pool should be at least as large as the number of worker
+    threads using it, otherwise urllib3 opens throwaway connections and logs
+    "connection pool is full, discarding connection".
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 4,
+        pool_maxsize: int = 20,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 120.0,
+        keep_alive: bool = True,
+        backend: str = "requests",
+    ):
+        """
+        Args:
+            pool_connections: Number of distinct hosts to keep pools for
+            pool_maxsize: Connections kept open per host
+            connect_timeout: Seconds to wait for the TCP/TLS handshake
+            read_timeout: Seconds to wait between bytes of the response
+            keep_alive: Reuse connections between requests
+            backend: Name of a registered backend ("requests" or "httpx" for HTTP/2)
+        """
+        self.pool_connections = max(1, pool_connections)
+        self.pool_maxsize = max(1, pool_maxsize)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.keep_alive = keep_alive
+        self.backend = backend
+
+    @classmethod
+    def for_concurrency(cls, workers: int, **kwargs) -> "TransportConfig":
+        """Build a config whose per-host pool matches the number of workers"""
+        kwargs.setdefault("pool_maxsize", max(1, workers))
+        return cls(**kwargs)
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """(connect, read) tuple in the form requests expects"""
+        return (self.connect_timeout, self.read_timeout)
+
+
+class TimeoutSession(requests.Session):
+    """requests.Session that applies a default timeout to every request"""
+
+    def __init__(self, timeout: Tuple[float, float]):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().request(method, url, **kwargs)
+
+
+def _create_requests_session(config: TransportConfig) -> requests.Session:
+    """Default backend: pooled HTTP/1.1 keep-alive session via requests/urllib3."""
+    session = TimeoutSession(config.timeout)
+    adapter = HTTPAdapter(
+        pool_connections=config.pool_connections,
+        pool_maxsize=config.pool_maxsize,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not config.keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+class _HttpxResponse:
+    """Expose the parts of the requests.Response API the clients use."""
+
+    def __init__(self, response):
+        self._response = response
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    @property
+    def reason(self) -> str:
+        return self._response.reason_phrase
+
+    # Like requests, read a streamed body on first access instead of
+    # raising httpx.ResponseNotRead (error paths print response.text)
+    @property
+    def content(self) -> bytes:
+        return self._response.read()
+
+    @property
+    def text(self) -> str:
+        self._response.read()
+        return self._response.text
+
+    def json(self, **kwargs) -> Any:
+        self._response.read()
+        return self._response.json(**kwargs)
+
+    def iter_content(self, chunk_size: int = 8192) -> Iterator[bytes]:
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        finally:
+            self._response.close()
+
+
+class _HttpxSession:
+    """requests-compatible wrapper around httpx.Client with HTTP/2 enabled."""
+
+    def __init__(self, config: TransportConfig):
+        import httpx
+
+        limits = httpx.Limits(
+            max_connections=config.pool_maxsize * config.pool_connections,
+            max_keepalive_connections=config.pool_maxsize if config.keep_alive else 0,
+        )
+        timeout = httpx.Timeout(config.read_timeout, connect=config.connect_timeout)
+        self._httpx = httpx
+        self._client = httpx.Client(http2=True, limits=limits, timeout=timeout)
+        self.headers = self._client.headers
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Any = None,
+        json: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Any = None,
+        stream: bool = False,
+        **kwargs,
+    ) -> _HttpxResponse:
+        if isinstance(data, (bytes, bytearray, str)):
+            kwargs["content"] = data
+        elif data is not None:
+            kwargs["data"] = data
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        if params:
+            # httpx renders booleans as "true"/"false"; keep requests' spelling
+            params = {k: str(v) if isinstance(v, bool) else v for k, v in params.items()}
+
+        request = self._client.build_request(
+            method, url, params=params, json=json, headers=headers, **kwargs
+        )
+        # Surface httpx failures as requests exceptions so retry logic is backend-agnostic
+        try:
+            response = self._client.send(request, stream=stream)
+        except self._httpx.TimeoutException as exc:
+            raise requests.exceptions.Timeout(str(exc)) from exc
+        except self._httpx.TransportError as exc:
+            raise requests.exceptions.ConnectionError(str(exc)) from exc
+        return _HttpxResponse(response)
+
+    def get(self, url: str, **kwargs) -> _HttpxResponse:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> _HttpxResponse:
+        return self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+_BACKENDS: Dict[str, Callable[[TransportConfig], Any]] = {
+    "requests": _create_requests_session,
+    "httpx": _HttpxSession,
+}
+
+
+def register_backend(name: str, factory: Callable[[TransportConfig], Any]) -> None:
+    """
+    Register a session factory under a backend name
+
+    The factory receives the TransportConfig and must return an object with
+    requests-style ``request``/``get``/``post``/``close`` methods and a ``headers`` mapping.
+    """
+    _BACKENDS[name] = factory
+
+
+def create_session(config: Optional[TransportConfig] = None):
+    """
+    Create an HTTP session for the configured backend
+
+    Args:
+        config: Transport settings (defaults to TransportConfig())
+
+    Returns:
+        A requests-compatible session
+    """
+    config = config or TransportConfig()
+    factory = _BACKENDS.get(config.backend)
+    if factory is None:
+        raise ValueError(
+            f"Unknown HTTP backend '{config.backend}'. Available: {sorted(_BACKENDS)}"
+        )
+    return factory(config)
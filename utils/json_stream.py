@@ -0,0 +1,106 @@
+"""
+Streaming JSON Utilities
+Incrementally decode the items of a top-level JSON array from a byte stream
+"""
+
+import codecs
+import json
+from typing import Any, Iterable, Iterator
+
+_WHITESPACE = " \t\r\n"
+_DELIMITERS = _WHITESPACE + ",]"
+
+
+def iter_json_array(chunks: Iterable[bytes], encoding: str = "utf-8") -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array one at a time
+
+    Roughly one chunk of text is buffered at a time, so a response with tens
+    of thousands of objects never exists as one bytes or str object.
+    A payload that is not an array (e.g. {"documents": [...]}) is decoded in
+    one go as a fallback and its list items are yielded.
+
+    Args:
+        chunks: Iterable of raw bytes, e.g. response.iter_content(65536)
+        encoding: Text encoding of the payload
+
+    Raises:
+        ValueError: If the payload is not valid JSON
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder(encoding)()
+    chunk_iter = iter(chunks)
+    buffer = ""
+    pos = 0
+    exhausted = False
+
+    def read_more() -> bool:
+        nonlocal buffer, pos, exhausted
+        if exhausted:
+            return False
+        for chunk in chunk_iter:
+            text = text_decoder.decode(chunk)
+            if text:
+                buffer = buffer[pos:] + text
+                pos = 0
+                return True
+        buffer = buffer[pos:] + text_decoder.decode(b"", final=True)
+        pos = 0
+        exhausted = True
+        return bool(buffer)
+
+    def skip_whitespace() -> bool:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer):
+                return True
+            if not read_more():
+                return False
+
+    if not skip_whitespace():
+        return
+
+    if buffer[pos] != "[":
+        while read_more():
+            pass
+        payload = json.loads(buffer[pos:])
+        if isinstance(payload, dict):
+            payload = next((v for v in payload.values() if isinstance(v, list)), [])
+        yield from payload if isinstance(payload, list) else [payload]
+        return
+
+    pos += 1
+    expect_value = True
+    while True:
+        if not skip_whitespace():
+            raise ValueError("Unexpected end of JSON array")
+
+        char = buffer[pos]
+        if char == "]":
+            return
+        if not expect_value:
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {char!r}")
+            pos += 1
+            expect_value = True
+            continue
+
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if not read_more():
+                    raise
+                continue
+            # A number cut off by the chunk boundary ("12" of "12.5") decodes
+            # fine, so only accept a value once its delimiter has arrived
+            delimited = end < len(buffer) and buffer[end] in _DELIMITERS
+            if not delimited and not exhausted and read_more():
+                continue
+            break
+
+        pos = end
+        expect_value = False
+        yield value
@@ -0,0 +1,335 @@
+"""
+Local Mirror
+Optional SQLite copy of Flowwer documents and Find API months, kept fresh by a background worker
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.storage import get_data_dir
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    scope TEXT NOT NULL,
+    list_key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (scope, list_key, position)
+);
+CREATE TABLE IF NOT EXISTS find_months (
+    scope TEXT NOT NULL,
+    path TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (scope, path)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    scope TEXT NOT NULL,
+    list_key TEXT NOT NULL,
+    synced_at REAL NOT NULL,
+    full_synced_at REAL NOT NULL,
+    PRIMARY KEY (scope, list_key)
+);
+"""
+
+
+def mirror_enabled() -> bool:
+    """True if the ENPROM_LOCAL_MIRROR environment variable switches the mirror on"""
+    return os.getenv("ENPROM_LOCAL_MIRROR", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def list_key(include_processed: bool, include_deleted: bool) -> str:
+    """Name of a get_all_documents() variant, e.g. 'p0d0'"""
+    return f"p{int(bool(include_processed))}d{int(bool(include_deleted))}"
+
+
+def describe_age(synced_at: Optional[float]) -> str:
+    """Human readable age of a sync time, e.g. '5 min ago'"""
+    if not synced_at:
+        return "never"
+    seconds = max(0, int(time.time() - synced_at))
+    if seconds < 60:
+        return "just now"
+    if seconds < 3600:
+        return f"{seconds // 60} min ago"
+    if seconds < 86400:
+        return f"{seconds // 3600} h ago"
+    return datetime.fromtimestamp(synced_at).strftime("%Y-%m-%d %H:%M")
+
+
+class LocalMirror:
+    """
+    SQLite mirror of document lists and Find API month results
+
+    Each call opens its own connection, so the mirror can be shared by the
+    Streamlit sessions and the sync worker thread. WAL mode lets readers
+    continue while the worker writes.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Args:
+            path: Database file (default: <data dir>/mirror/flowwer.sqlite3)
+        """
+        self.path = Path(path) if path else get_data_dir("mirror") / "flowwer.sqlite3"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save_documents(
+        self,
+        scope: str,
+        include_processed: bool,
+        include_deleted: bool,
+        documents: Iterable[Dict[str, Any]],
+        full: bool = True,
+    ) -> None:
+        """
+        Replace a mirrored document list in one transaction
+
+        Args:
+            scope: Instance/API-key scope (see utils.storage.scope_key)
+            include_processed: Flag the list was loaded with
+            include_deleted: Flag the list was loaded with
+            documents: The complete list
+            full: True if it came from a full load rather than an incremental sync
+        """
+        key = list_key(include_processed, include_deleted)
+        now = time.time()
+        rows = (
+            (scope, key, position, json.dumps(doc, separators=(",", ":")))
+            for position, doc in enumerate(documents)
+        )
+        try:
+            with self._connect() as conn:
+                previous = conn.execute(
+                    "SELECT full_synced_at FROM sync_state WHERE scope = ? AND list_key = ?",
+                    (scope, key),
+                ).fetchone()
+                conn.execute(
+                    "DELETE FROM documents WHERE scope = ? AND list_key = ?", (scope, key)
+                )
+                conn.executemany("INSERT INTO documents VALUES (?, ?, ?, ?)", rows)
+                full_synced_at = now if full or previous is None else previous[0]
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)",
+                    (scope, key, now, full_synced_at),
+                )
+        except sqlite3.Error as e:
+            print(f"Could not write documents to local mirror: {e}")
+
+    def touch_documents(self, scope: str, include_processed: bool, include_deleted: bool) -> None:
+        """Record that a list was checked and found unchanged"""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE sync_state SET synced_at = ? WHERE scope = ? AND list_key = ?",
+                    (time.time(), scope, list_key(include_processed, include_deleted)),
+                )
+        except sqlite3.Error as e:
+            print(f"Could not update local mirror: {e}")
+
+    def load_documents(
+        self, scope: str, include_processed: bool, include_deleted: bool
+    ) -> Optional[Tuple[List[Dict[str, Any]], float, float]]:
+        """
+        Read a mirrored document list
+
+        Returns:
+            Tuple of (documents, synced_at, full_synced_at) or None if not mirrored
+        """
+        key = list_key(include_processed, include_deleted)
+        try:
+            with self._connect() as conn:
+                state = conn.execute(
+                    "SELECT synced_at, full_synced_at FROM sync_state "
+                    "WHERE scope = ? AND list_key = ?",
+                    (scope, key),
+                ).fetchone()
+                if state is None:
+                    return None
+                rows = conn.execute(
+                    "SELECT payload FROM documents WHERE scope = ? AND list_key = ? "
+                    "ORDER BY position",
+                    (scope, key),
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Could not read local mirror {self.path}: {e}")
+            return None
+        return [json.loads(row[0]) for row in rows], state[0], state[1]
+
+    def last_synced(self, scope: str, include_processed: bool = False, include_deleted: bool = False) -> Optional[float]:
+        """Epoch seconds of the last sync of a document list, or None"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT synced_at FROM sync_state WHERE scope = ? AND list_key = ?",
+                    (scope, list_key(include_processed, include_deleted)),
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def save_month(self, scope: str, path: str, documents: List[Dict[str, Any]]) -> None:
+        """Store the Find API documents (with receipt splits) of one month path"""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO find_months VALUES (?, ?, ?, ?)",
+                    (scope, path, json.dumps(documents, separators=(",", ":")), time.time()),
+                )
+        except sqlite3.Error as e:
+            print(f"Could not write month {path} to local mirror: {e}")
+
+    def load_month(
+        self, scope: str, path: str
+    ) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+        """
+        Read a mirrored month path
+
+        Returns:
+            Tuple of (documents, synced_at) or None if not mirrored
+        """
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT payload, synced_at FROM find_months WHERE scope = ? AND path = ?",
+                    (scope, path),
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Could not read local mirror {self.path}: {e}")
+            return None
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def clear(self, scope: Optional[str] = None) -> None:
+        """Remove mirrored data of one scope, or everything"""
+        with self._connect() as conn:
+            for table in ("documents", "find_months", "sync_state"):
+                if scope is None:
+                    conn.execute(f"DELETE FROM {table}")
+                else:
+                    conn.execute(f"DELETE FROM {table} WHERE scope = ?", (scope,))
+
+
+class MirrorSyncWorker:
+    """
+    Daemon thread that keeps a client's mirror up to date
+
+    Every ``interval_seconds`` the mirrored document lists are synced
+    incrementally (or fully reloaded once ``full_refresh_seconds`` old or
+    missing) and the recent Find API months are fetched live. The client
+    writes every live result into its mirror, so the worker only drives calls.
+    """
+
+    def __init__(
+        self,
+        client,
+        interval_seconds: float = 900.0,
+        months_back: int = 3,
+        document_lists: Tuple[Tuple[bool, bool], ...] = ((False, False),),
+        full_refresh_seconds: float = 12 * 3600.0,
+    ):
+        """
+        Args:
+            client: FlowwerAPIClient with an API key and a mirror
+            interval_seconds: Pause between sync runs
+            months_back: Recent months of receipt splits to refresh
+            document_lists: (include_processed, include_deleted) variants to mirror
+            full_refresh_seconds: Age of the last full load that forces a new one
+        """
+        if client.mirror is None:
+            raise ValueError("MirrorSyncWorker needs a client with a mirror")
+        self.client = client
+        self.interval_seconds = interval_seconds
+        self.months_back = months_back
+        self.document_lists = tuple(document_lists)
+        self.full_refresh_seconds = full_refresh_seconds
+        self.last_run: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "MirrorSyncWorker":
+        """Start the background thread (no-op if already running)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="flowwer-mirror-sync", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Ask the thread to finish after the current run"""
+        self._stop.set()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval_seconds)
+
+    def run_once(self) -> bool:
+        """
+        Perform one sync run
+
+        Returns:
+            True if every step succeeded
+        """
+        client = self.client
+        scope = client.cache_scope()
+        ok = True
+        try:
+            for include_processed, include_deleted in self.document_lists:
+                mirrored = client.mirror.load_documents(scope, include_processed, include_deleted)
+                sync = None
+                if mirrored is not None:
+                    documents, synced_at, full_synced_at = mirrored
+                    if time.time() - full_synced_at <= self.full_refresh_seconds:
+                        sync = client.sync_documents(
+                            documents,
+                            since=datetime.fromtimestamp(synced_at),
+                            include_processed=include_processed,
+                            include_deleted=include_deleted,
+                        )
+                if sync is None:
+                    documents = client.get_all_documents(
+                        include_processed=include_processed,
+                        include_deleted=include_deleted,
+                        use_mirror=False,
+                    )
+                    ok = ok and documents is not None
+
+            for path in client._recent_month_paths(self.months_back):
+                if client._find_documents_with_receipt_splits(path, use_cache=False) is None:
+                    ok = False
+
+            self.last_error = None if ok else "Some Flowwer requests failed"
+        except Exception as e:
+            print(f"Local mirror sync failed: {e}")
+            self.last_error = str(e)
+            ok = False
+        self.last_run = time.time()
+        return ok
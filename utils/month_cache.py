@@ -0,0 +1,143 @@
+"""
+Month Partition Cache
+Persistent, compressed on-disk cache for Find API CreationDate-Months results
+"""
+
+import gzip
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from utils.storage import get_data_dir
+
+_MONTH_RE = re.compile(r"(\d{4})-(\d{2})$")
+
+
+class MonthPartitionCache:
+    """
+    One gzip-compressed JSON file per (scope, month)
+
+    Only closed months are cached. The current month and the previous one
+    are always fetched live, because documents are still created, split and
+    re-booked there. Closed months are served from disk until
+    ``closed_month_ttl_days`` has passed or they are invalidated explicitly.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        closed_month_ttl_days: float = 30.0,
+        live_months: int = 2,
+    ):
+        """
+        Args:
+            directory: Cache directory (default: <data dir>/find_months)
+            closed_month_ttl_days: Age after which a closed month is refetched
+            live_months: Number of most recent months never served from cache
+        """
+        self.directory = Path(directory) if directory else get_data_dir("find_months")
+        self.ttl_seconds = closed_month_ttl_days * 86400
+        self.live_months = max(1, live_months)
+
+    @staticmethod
+    def month_of(path: str) -> Optional[date]:
+        """First day of the month a CreationDate-Months/YYYY-MM path refers to"""
+        match = _MONTH_RE.search(path or "")
+        if not match:
+            return None
+        year, month = int(match.group(1)), int(match.group(2))
+        if not 1 <= month <= 12:
+            return None
+        return date(year, month, 1)
+
+    def is_closed(self, path: str, today: Optional[date] = None) -> bool:
+        """True if the month is older than the live window"""
+        month = self.month_of(path)
+        if month is None:
+            return False
+        today = today or date.today()
+        months_ago = (today.year - month.year) * 12 + (today.month - month.month)
+        return months_ago >= self.live_months
+
+    def _file_for(self, scope: str, path: str) -> Path:
+        month = self.month_of(path)
+        return self.directory / scope / f"{month.strftime('%Y-%m')}.json.gz"
+
+    def get(self, scope: str, path: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Cached documents for a closed month, or None on miss/expiry
+
+        Args:
+            scope: Instance/API-key scope (see utils.storage.scope_key)
+            path: Find API path, e.g. CreationDate-Months/2024-03
+        """
+        if not self.is_closed(path):
+            return None
+        file_path = self._file_for(scope, path)
+        try:
+            if time.time() - file_path.stat().st_mtime > self.ttl_seconds:
+                return None
+            with gzip.open(file_path, "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable month cache {file_path}: {e}")
+            return None
+
+    def put(self, scope: str, path: str, documents: List[Dict[str, Any]]) -> None:
+        """Store documents for a closed month (live months are ignored)"""
+        if not self.is_closed(path):
+            return
+        file_path = self._file_for(scope, path)
+        tmp_name = None
+        try:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temp file first so readers never see a partial file
+            fd, tmp_name = tempfile.mkstemp(dir=file_path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                gz.write(json.dumps(documents, separators=(",", ":")).encode("utf-8"))
+            os.replace(tmp_name, file_path)
+        except Exception as e:
+            # The cache never breaks a fetch: drop the partial file and carry on
+            if tmp_name and os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            print(f"Could not write month cache {file_path}: {e}")
+
+    def invalidate(self, scope: Optional[str] = None, path: Optional[str] = None) -> int:
+        """
+        Remove cached months
+
+        Args:
+            scope: Only this scope (default: every scope)
+            path: Only this month path (default: every month)
+
+        Returns:
+            Number of files removed
+        """
+        if not self.directory.exists():
+            return 0
+        scope_dirs = [self.directory / scope] if scope else [
+            d for d in self.directory.iterdir() if d.is_dir()
+        ]
+        pattern = "*.json.gz"
+        if path:
+            month = self.month_of(path)
+            if month is None:
+                return 0
+            pattern = f"{month.strftime('%Y-%m')}.json.gz"
+
+        removed = 0
+        for scope_dir in scope_dirs:
+            for file_path in scope_dir.glob(pattern):
+                try:
+                    file_path.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
@@ -0,0 +1,153 @@
+"""
+Invoice Reconciliation
+DATEV vs Flowwer cross-check as one hash join with vectorized match columns
+"""
+
+import numpy as np
+import pandas as pd
+
+RESULT_COLUMNS = [
+    "Invoice_Number",
+    "Status",
+    "Flowwer_Date",
+    "DATEV_Date",
+    "Date_Match",
+    "Flowwer_CC",
+    "DATEV_CC",
+    "CC_Match",
+    "Buchungstext",
+    "Flowwer_Amount",
+    "DATEV_Amount",
+    "Amount_Match",
+    "Amount_Diff",
+]
+
+# A DATEV invoice whose bookings sum to (almost) zero has been paid
+PAID_THRESHOLD = 0.01
+
+# Candidate score: amount beats date beats cost center
+_SCORE_AMOUNT = 4
+_SCORE_TOTAL_AMOUNT = 3
+_SCORE_DATE = 2
+_SCORE_CC = 1
+# Rank of a candidate that satisfies every check (above any score)
+_RANK_EXACT = 8
+
+
+def _days(values: pd.Series) -> pd.Series:
+    """Calendar day of each timestamp (wall clock, NaT if missing)"""
+    stamps = pd.to_datetime(values, errors="coerce")
+    if getattr(stamps.dt, "tz", None) is not None:
+        stamps = stamps.dt.tz_localize(None)
+    return stamps.dt.normalize()
+
+
+def reconcile_invoices(
+    flowwer_aggregated: pd.DataFrame,
+    excel_aggregated: pd.DataFrame,
+    tolerance: float = 0.01,
+) -> pd.DataFrame:
+    """
+    Match every Flowwer invoice against its DATEV bookings
+
+    Both tables are joined on Invoice_Number once; each (Flowwer invoice,
+    DATEV row) pair becomes a candidate with date, cost-center and amount
+    checks as boolean columns. An amount matches if the DATEV row or the
+    sum of all the invoice's DATEV rows is within ``tolerance`` (absolute
+    values compared). Per invoice the chosen candidate is:
+
+    - the first DATEV row if the bookings sum to zero ("Paid (DATEV)")
+    - otherwise the first row with matching date, cost center and amount ("Match")
+    - otherwise the row with the highest score ("Mismatch"): amount 4
+      (sum only: 3), date 2, cost center 1; ties go to the first row
+
+    Args:
+        flowwer_aggregated: One row per invoice with Invoice_Number,
+                            Invoice_Date, Cost_Center and Amount
+        excel_aggregated: DATEV rows with the same columns and Buchungstext
+        tolerance: Largest amount difference that still counts as a match
+
+    Returns:
+        DataFrame with RESULT_COLUMNS, one row per Flowwer invoice in the
+        input order; invoices without DATEV rows get Status "Not in DATEV"
+    """
+    flowwer = flowwer_aggregated.reset_index(drop=True)
+    excel = excel_aggregated.reset_index(drop=True)
+    if "Buchungstext" not in excel.columns:
+        excel = excel.assign(Buchungstext="")
+
+    left = pd.DataFrame(
+        {
+            "Invoice_Number": flowwer["Invoice_Number"],
+            "f_pos": np.arange(len(flowwer)),
+            "f_day": _days(flowwer["Invoice_Date"]),
+            "f_cc": flowwer["Cost_Center"].astype(str),
+            "f_amount": pd.to_numeric(flowwer["Amount"], errors="coerce"),
+        }
+    )
+    right = pd.DataFrame(
+        {
+            "Invoice_Number": excel["Invoice_Number"],
+            "e_pos": np.arange(len(excel)),
+            "e_day": _days(excel["Invoice_Date"]),
+            "e_cc": excel["Cost_Center"].astype(str),
+            "e_amount": pd.to_numeric(excel["Amount"], errors="coerce"),
+        }
+    )
+    pairs = left.merge(right, on="Invoice_Number", how="inner", sort=False)
+    # Candidates in DATEV order within each invoice, as the first-match rules expect
+    pairs = pairs.sort_values(["f_pos", "e_pos"], kind="stable").reset_index(drop=True)
+
+    total = pairs.groupby("f_pos", sort=False)["e_amount"].transform("sum")
+    f_abs = pairs["f_amount"].abs()
+    amount_diff = (f_abs - pairs["e_amount"].abs()).abs()
+    total_diff = (f_abs - total.abs()).abs()
+
+    amount_match = (amount_diff <= tolerance).to_numpy()
+    total_match = (total_diff <= tolerance).to_numpy()
+    date_match = (pairs["f_day"] == pairs["e_day"]).to_numpy()  # NaT never equal
+    cc_match = (pairs["f_cc"] == pairs["e_cc"]).to_numpy()
+    paid = (total.abs() <= PAID_THRESHOLD).to_numpy()
+    exact = date_match & cc_match & (amount_match | total_match)
+
+    score = (
+        np.where(amount_match, _SCORE_AMOUNT, np.where(total_match, _SCORE_TOTAL_AMOUNT, 0))
+        + _SCORE_DATE * date_match
+        + _SCORE_CC * cc_match
+    )
+    # Paid invoices rank all rows equally, so the first one is chosen
+    pairs["rank"] = np.where(paid, 0, np.where(exact, _RANK_EXACT, score))
+    best = pairs.groupby("f_pos", sort=False)["rank"].idxmax().to_numpy()
+
+    use_total = total_match[best] & ~amount_match[best]
+    chosen = pairs.loc[best]
+    matched = pd.DataFrame(
+        {
+            "f_pos": chosen["f_pos"].to_numpy(),
+            "Status": np.where(paid[best], "Paid (DATEV)", np.where(exact[best], "Match", "Mismatch")),
+            "DATEV_Date": excel["Invoice_Date"].to_numpy()[chosen["e_pos"].to_numpy()],
+            "Date_Match": date_match[best],
+            "DATEV_CC": excel["Cost_Center"].to_numpy()[chosen["e_pos"].to_numpy()],
+            "CC_Match": cc_match[best],
+            "Buchungstext": excel["Buchungstext"].to_numpy()[chosen["e_pos"].to_numpy()],
+            "DATEV_Amount": np.where(use_total, total.to_numpy()[best], chosen["e_amount"].to_numpy()),
+            "Amount_Match": amount_match[best] | total_match[best],
+            "Amount_Diff": np.where(use_total, total_diff.to_numpy()[best], amount_diff.to_numpy()[best]),
+        }
+    )
+
+    results = pd.DataFrame(
+        {
+            "Invoice_Number": flowwer["Invoice_Number"],
+            "Flowwer_Date": flowwer["Invoice_Date"],
+            "Flowwer_CC": flowwer["Cost_Center"],
+            "Flowwer_Amount": flowwer["Amount"],
+        }
+    ).join(matched.set_index("f_pos"))
+
+    missing = results["Status"].isna()
+    results.loc[missing, "Status"] = "Not in DATEV"
+    results.loc[missing, ["DATEV_CC", "Buchungstext"]] = ""
+    for col in ("Date_Match", "CC_Match", "Amount_Match"):
+        results[col] = results[col].fillna(False).astype(bool)
+    return results[RESULT_COLUMNS]
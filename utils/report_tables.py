@@ -0,0 +1,257 @@
+"""
+Normalized Report Tables
+Receipt-split report held as a documents table and a splits table linked by documentId
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+DOCUMENT_KEY = "documentId"
+SPLIT_LIST_KEYS = ("receiptSplits", "documentReceiptSplits")
+
+# Suffix of document columns while they are merged into split columns of the same name
+_DOCUMENT_SUFFIX = "__document"
+
+SplitPredicate = Callable[[Dict[str, Any], Dict[str, Any]], bool]
+
+
+def _is_surrogate(key: Any) -> bool:
+    """True for the negative keys given to documents without an ID"""
+    return isinstance(key, int) and key < 0
+
+
+def _as_value_set(values: Union[None, str, Iterable[Any]]) -> Optional[frozenset]:
+    if values is None or values == "":
+        return None
+    if isinstance(values, (str, int, float)):
+        return frozenset([str(values)])
+    value_set = frozenset(str(v) for v in values)
+    return value_set or None
+
+
+def make_split_filter(
+    cost_centers: Union[None, str, Iterable[Any]] = None,
+    accounts: Union[None, str, Iterable[Any]] = None,
+    company: Optional[str] = None,
+) -> Optional[SplitPredicate]:
+    """
+    Build a predicate(split, document) for the receipt report filters
+
+    Cost centers and accounts may be a single value or any number of values;
+    either way they are matched with one set lookup. Split fields win over
+    document fields, as in the flat report rows.
+
+    Returns:
+        The predicate, or None if no filter is set
+    """
+    cost_center_set = _as_value_set(cost_centers)
+    account_set = _as_value_set(accounts)
+    company_lower = str(company).lower() if company else None
+    if cost_center_set is None and account_set is None and company_lower is None:
+        return None
+
+    def matches(split: Dict[str, Any], doc: Dict[str, Any]) -> bool:
+        if cost_center_set is not None:
+            value = split["costCenter"] if "costCenter" in split else doc.get("costCenter", "")
+            if str(value) not in cost_center_set:
+                return False
+        if account_set is not None:
+            value = split["account"] if "account" in split else doc.get("account", "")
+            if str(value) not in account_set:
+                return False
+        if company_lower is not None:
+            value = split["supplierName"] if "supplierName" in split else doc.get("supplierName", "")
+            if str(value).lower() != company_lower:
+                return False
+        return True
+
+    return matches
+
+
+class NormalizedReport:
+    """
+    Receipt-split report without repeating document headers
+
+    ``documents`` maps documentId to the document fields (without its split
+    list); every entry of ``splits`` is one receipt split carrying that
+    documentId as a foreign key. ``to_frame()`` joins the two only when a
+    flat table is needed, and only with the document columns asked for.
+    Documents without an ID get a negative surrogate key; it links their
+    splits internally and is not shown by ``to_frame()`` or ``rows()``.
+    """
+
+    def __init__(
+        self,
+        documents: Optional[Dict[Any, Dict[str, Any]]] = None,
+        splits: Optional[List[Dict[str, Any]]] = None,
+        first_surrogate: int = -1,
+    ):
+        """
+        Args:
+            documents: Document fields keyed by documentId
+            splits: Split dicts carrying documentId
+            first_surrogate: Key for the next document without an ID; pass on
+                             ``next_surrogate`` when building reports to merge
+        """
+        self.documents: Dict[Any, Dict[str, Any]] = documents if documents is not None else {}
+        self.splits: List[Dict[str, Any]] = splits if splits is not None else []
+        self.next_surrogate = first_surrogate
+        self.failed_paths: List[str] = []
+        self.splits_seen = len(self.splits)
+
+    def __len__(self) -> int:
+        return len(self.splits)
+
+    def __bool__(self) -> bool:
+        return bool(self.splits)
+
+    def add_document(
+        self, doc: Dict[str, Any], predicate: Optional[SplitPredicate] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Add one Find API document and its receipt splits
+
+        Args:
+            doc: Document with its receiptSplits/documentReceiptSplits list
+            predicate: Optional predicate(split, doc); other splits are skipped,
+                       and the document itself if none of its splits match
+
+        Returns:
+            The split dicts that were added (with the foreign key set)
+        """
+        splits = doc.get("receiptSplits") or doc.get("documentReceiptSplits") or []
+        self.splits_seen += len(splits)
+        if predicate is not None:
+            splits = [split for split in splits if predicate(split, doc)]
+            if not splits:
+                return []
+
+        key = doc.get(DOCUMENT_KEY)
+        if key is None:
+            key = self.next_surrogate
+            self.next_surrogate -= 1
+        self.documents[key] = {k: v for k, v in doc.items() if k not in SPLIT_LIST_KEYS}
+
+        added = []
+        for split in splits:
+            if split.get(DOCUMENT_KEY) is None:
+                split = {**split, DOCUMENT_KEY: key}
+            self.splits.append(split)
+            added.append(split)
+        return added
+
+    def filter_splits(self, predicate: Callable[[Dict[str, Any], Dict[str, Any]], bool]) -> "NormalizedReport":
+        """
+        Keep splits for which predicate(split, document) is true
+
+        Documents no longer referenced by any split are dropped as well.
+        """
+        kept = [
+            split
+            for split in self.splits
+            if predicate(split, self.documents.get(split.get(DOCUMENT_KEY), {}))
+        ]
+        keys = {split.get(DOCUMENT_KEY) for split in kept}
+        documents = {k: v for k, v in self.documents.items() if k in keys}
+        filtered = NormalizedReport(documents, kept, self.next_surrogate)
+        filtered.failed_paths = list(self.failed_paths)
+        filtered.splits_seen = self.splits_seen
+        return filtered
+
+    def extend(self, other: "NormalizedReport") -> None:
+        """
+        Append another report (e.g. the next month) to this one
+
+        Surrogate keys of documents without an ID are renumbered, so reports
+        built independently (e.g. in parallel workers) never collide.
+        """
+        remap = {}
+        for key in other.documents:
+            if isinstance(key, int) and key < 0:
+                remap[key] = self.next_surrogate
+                self.next_surrogate -= 1
+        for key, doc in other.documents.items():
+            self.documents[remap.get(key, key)] = doc
+        if remap:
+            self.splits.extend(
+                {**split, DOCUMENT_KEY: remap[split[DOCUMENT_KEY]]}
+                if split.get(DOCUMENT_KEY) in remap
+                else split
+                for split in other.splits
+            )
+        else:
+            self.splits.extend(other.splits)
+        self.failed_paths.extend(other.failed_paths)
+        self.splits_seen += other.splits_seen
+
+    def filter_cost_centers(self, cost_centers: Iterable[str]) -> "NormalizedReport":
+        """Keep splits whose costCenter is one of ``cost_centers``"""
+        predicate = make_split_filter(cost_centers=list(cost_centers))
+        return self.filter_splits(predicate) if predicate else self
+
+    def documents_frame(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Documents table indexed by documentId"""
+        df = pd.DataFrame.from_dict(self.documents, orient="index")
+        df = df.drop(columns=[DOCUMENT_KEY], errors="ignore")
+        df.index.name = DOCUMENT_KEY
+        if columns is not None:
+            df = df[[c for c in columns if c in df.columns]]
+        return df
+
+    def splits_frame(self) -> pd.DataFrame:
+        """Splits table with the documentId foreign key"""
+        return pd.DataFrame(self.splits)
+
+    def to_frame(self, document_columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Join splits with their document fields
+
+        Args:
+            document_columns: Document fields to attach (default: all). Splits
+                              that define a field themselves keep their value,
+                              the others get the document's.
+
+        Returns:
+            One row per split, like pd.DataFrame(report) of the flat report
+        """
+        splits = self.splits_frame()
+        if splits.empty:
+            return splits
+        documents = self.documents_frame(document_columns)
+        shared = [c for c in documents.columns if c in splits.columns]
+        joined = splits.join(documents, on=DOCUMENT_KEY, rsuffix=_DOCUMENT_SUFFIX)
+        for col in shared:
+            # A split that does not define a field shows its document's value
+            defined = np.fromiter((col in split for split in self.splits), dtype=bool, count=len(self.splits))
+            document_col = col + _DOCUMENT_SUFFIX
+            if not defined.all():
+                joined[col] = joined[col].where(defined, joined[document_col])
+            joined = joined.drop(columns=[document_col])
+        surrogate = np.fromiter(
+            (_is_surrogate(split.get(DOCUMENT_KEY)) for split in self.splits), dtype=bool, count=len(self.splits)
+        )
+        if surrogate.any():
+            # Documents without an ID keep a missing documentId, as in the flat rows
+            joined[DOCUMENT_KEY] = joined[DOCUMENT_KEY].mask(surrogate)
+        # Document fields first, as in the flat report rows
+        ordered = [DOCUMENT_KEY] + list(documents.columns)
+        ordered += [c for c in joined.columns if c not in ordered]
+        return joined[ordered]
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Flat rows ({**document, **split}) for callers that need dicts"""
+        rows = []
+        for split in self.splits:
+            key = split.get(DOCUMENT_KEY)
+            document = self.documents.get(key, {})
+            row = {**document, **split}
+            if _is_surrogate(key):
+                # Surrogate keys stay internal; show the document's own (missing) ID
+                if DOCUMENT_KEY in document:
+                    row[DOCUMENT_KEY] = document[DOCUMENT_KEY]
+                else:
+                    del row[DOCUMENT_KEY]
+            rows.append(row)
+        return rows
@@ -0,0 +1,80 @@
+"""
+Single-Flight Request Coalescing
+Let concurrent identical calls share one execution and its result
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """One in-flight execution that any number of callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running block and receive the same result (or exception). Once
+    it finishes the key is forgotten, so this is deduplication, not caching.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.shared_count = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Run ``func`` once per key across concurrent callers
+
+        Args:
+            key: Identity of the call (e.g. method, URL and params)
+            func: Zero-argument callable performing the work
+
+        Returns:
+            The result of the single execution
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared_count += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        """Number of keys currently executing"""
+        with self._lock:
+            return len(self._calls)
+
+
+# Process-wide instance shared by every client (and so every Streamlit session)
+shared_flights = SingleFlight()
@@ -0,0 +1,339 @@
+"""
+Receipt-Split Warehouse
+Month-partitioned Parquet history of Find API receipt splits with typed columns
+"""
+
+import concurrent.futures
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from utils.month_cache import MonthPartitionCache
+from utils.storage import get_data_dir
+
+try:
+    import pyarrow.parquet as pq
+
+    PARQUET_AVAILABLE = True
+except ImportError:
+    pq = None
+    PARQUET_AVAILABLE = False
+
+SPLIT_LIST_KEYS = ("receiptSplits", "documentReceiptSplits")
+
+# Low-cardinality text stored as categoricals (dictionary-encoded in Parquet)
+DIMENSION_COLUMNS = (
+    "costCenter",
+    "costUnit",
+    "account",
+    "supplierName",
+    "companyName",
+    "documentType",
+    "documentKind",
+    "currencyCode",
+    "currentStage",
+    "flowName",
+    "paymentState",
+)
+
+DATE_COLUMNS = (
+    "invoiceDate",
+    "dueDate",
+    "paymentDate",
+    "discountPeriodEnd",
+    "serviceStartDate",
+    "serviceEndDate",
+    "creationTimestampUtc",
+    "stageTimestamp",
+)
+
+ID_COLUMNS = ("documentId", "flowId", "companyId", "supplierId")
+
+
+def flatten_splits(documents: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """One row per receipt split with its parent document's fields (as in MonthScan.rows)"""
+    rows = []
+    for doc in documents:
+        base_doc = {k: v for k, v in doc.items() if k not in SPLIT_LIST_KEYS}
+        splits = doc.get("receiptSplits") or doc.get("documentReceiptSplits") or []
+        for split in splits:
+            rows.append({**base_doc, **split})
+    return rows
+
+
+def to_typed_frame(rows: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Build a DataFrame with storage-friendly column types
+
+    Dimensions become categoricals, known date fields datetimes, IDs nullable
+    integers and other numbers float64. Nested values are kept as JSON text.
+    """
+    df = pd.DataFrame(rows)
+    for col in df.columns:
+        series = df[col]
+        if col in DATE_COLUMNS:
+            df[col] = pd.to_datetime(series, errors="coerce", utc=True).dt.tz_convert(None)
+        elif col in ID_COLUMNS:
+            df[col] = pd.to_numeric(series, errors="coerce").astype("Int64")
+        elif col in DIMENSION_COLUMNS:
+            df[col] = series.map(lambda v: None if v is None else str(v)).astype("category")
+        elif series.dtype == object:
+            values = series.dropna()
+            if values.map(lambda v: isinstance(v, (dict, list))).any():
+                df[col] = series.map(
+                    lambda v: json.dumps(v) if isinstance(v, (dict, list)) else v
+                ).astype("string")
+            elif values.map(lambda v: isinstance(v, bool)).all() and len(values):
+                df[col] = series.astype("boolean")
+            elif values.map(lambda v: isinstance(v, (int, float)) and not isinstance(v, bool)).all() and len(values):
+                df[col] = pd.to_numeric(series, errors="coerce").astype("float64")
+            else:
+                df[col] = series.map(lambda v: None if v is None else str(v)).astype("string")
+        elif pd.api.types.is_integer_dtype(series) and col not in ID_COLUMNS:
+            df[col] = series.astype("float64")
+    return df
+
+
+class SplitWarehouse:
+    """
+    Receipt splits stored as one Parquet file per (scope, month)
+
+    Queries read only the month partitions of the requested range and only
+    the requested columns; a cost-center set is pushed down as a row filter.
+    The live months (current and previous) are rewritten when older than
+    ``live_max_age`` seconds; closed months follow the month cache policy and
+    are fetched again after ``closed_month_ttl_days``, so late edits and
+    re-staged splits show up eventually.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        live_max_age: float = 900.0,
+        live_months: int = 2,
+        closed_month_ttl_days: float = 30.0,
+    ):
+        """
+        Args:
+            directory: Warehouse root (default: <data dir>/split_warehouse)
+            live_max_age: Seconds before a live month partition is refreshed
+            live_months: Number of most recent months treated as live
+            closed_month_ttl_days: Age after which a closed month is refetched
+        """
+        if not PARQUET_AVAILABLE:
+            raise ImportError("The split warehouse needs pyarrow (pip install pyarrow)")
+        self.directory = Path(directory) if directory else get_data_dir("split_warehouse")
+        self.live_max_age = live_max_age
+        self._months = MonthPartitionCache(
+            directory=self.directory,
+            closed_month_ttl_days=closed_month_ttl_days,
+            live_months=live_months,
+        )
+
+    def _partition(self, scope: str, path: str) -> Optional[Path]:
+        month = MonthPartitionCache.month_of(path)
+        if month is None:
+            return None
+        return self.directory / scope / f"month={month.strftime('%Y-%m')}" / "splits.parquet"
+
+    def needs_refresh(self, scope: str, path: str) -> bool:
+        """True if the month is missing, live and older than live_max_age, or closed and past its TTL"""
+        file_path = self._partition(scope, path)
+        if file_path is None:
+            return False
+        try:
+            age = time.time() - file_path.stat().st_mtime
+        except FileNotFoundError:
+            return True
+        if self._months.is_closed(path):
+            return age > self._months.ttl_seconds
+        return age > self.live_max_age
+
+    def write_month(self, scope: str, path: str, documents: List[Dict[str, Any]]) -> int:
+        """
+        Replace one month partition with the splits of its Find API documents
+
+        Returns:
+            Number of split rows written
+        """
+        file_path = self._partition(scope, path)
+        if file_path is None:
+            return 0
+        df = to_typed_frame(flatten_splits(documents))
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file first so readers never see a partial file
+        fd, tmp_name = tempfile.mkstemp(dir=file_path.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            df.to_parquet(tmp_name, index=False, engine="pyarrow")
+            os.replace(tmp_name, file_path)
+        except Exception:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+        return len(df)
+
+    def query(
+        self,
+        scope: str,
+        paths: List[str],
+        cost_centers: Optional[Iterable[str]] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Read split rows from the given month partitions
+
+        Args:
+            scope: Instance/API-key scope (see utils.storage.scope_key)
+            paths: CreationDate-Months/YYYY-MM paths to read (others are pruned)
+            cost_centers: Only rows with one of these cost centers
+            columns: Only these columns (missing ones are skipped)
+
+        Returns:
+            DataFrame of matching rows (empty if nothing is stored)
+        """
+        wanted = {str(cc) for cc in cost_centers} if cost_centers else None
+        frames = []
+        for path in paths:
+            file_path = self._partition(scope, path)
+            if file_path is None or not file_path.exists():
+                continue
+            schema_names = pq.read_schema(file_path).names
+            read_columns = [c for c in columns if c in schema_names] if columns else None
+            filters = None
+            if wanted is not None:
+                if "costCenter" not in schema_names:
+                    continue
+                filters = [("costCenter", "in", sorted(wanted))]
+            frames.append(
+                pd.read_parquet(
+                    file_path, engine="pyarrow", columns=read_columns, filters=filters
+                )
+            )
+
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame(columns=columns or [])
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        # Categories differ per partition, so concat falls back to object; filtered
+        # reads keep the full dictionary, so drop categories without rows
+        for col in DIMENSION_COLUMNS:
+            if col in df.columns:
+                if df[col].dtype != "category":
+                    df[col] = df[col].astype("category")
+                df[col] = df[col].cat.remove_unused_categories()
+        return df
+
+    def load(
+        self,
+        client,
+        min_date: str,
+        max_date: str,
+        cost_centers: Optional[Iterable[str]] = None,
+        columns: Optional[List[str]] = None,
+        progress_callback: Optional[Any] = None,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Query a date range, first fetching months that are missing or stale
+
+        Args:
+            client: FlowwerAPIClient used for missing months
+            min_date: Start date (ISO string)
+            max_date: End date (ISO string)
+            cost_centers: Only rows with one of these cost centers
+            columns: Only these columns
+            progress_callback: Optional callback accepting (percentage: float, text: str)
+
+        Returns:
+            DataFrame of split rows (attrs["failed_paths"] lists months that
+            could not be loaded) or None if the range is invalid
+        """
+        if not client.api_key:
+            print("No API key set. Please set api_key or call authenticate().")
+            return None
+
+        paths = client._build_month_paths(min_date, max_date)
+        if not paths:
+            return None
+
+        scope = client.cache_scope()
+        stale = [path for path in paths if self.needs_refresh(scope, path)]
+        if stale:
+            executor = client._get_executor()
+            future_to_path = {
+                executor.submit(client._find_documents_with_receipt_splits, path): path
+                for path in stale
+            }
+            failed = []
+            for done, future in enumerate(
+                concurrent.futures.as_completed(future_to_path), start=1
+            ):
+                path = future_to_path[future]
+                try:
+                    docs = future.result()
+                except Exception as exc:
+                    print(f"Path {path} generated an exception: {exc}")
+                    docs = None
+                if docs is None:
+                    failed.append(path)
+                else:
+                    try:
+                        self.write_month(scope, path, docs)
+                    except Exception as exc:
+                        print(f"Could not write warehouse partition {path}: {exc}")
+                if progress_callback:
+                    progress_callback(done / len(stale), f"Fetched {done}/{len(stale)} months")
+            if failed:
+                print(f"Warehouse could not refresh {len(failed)} month(s): {sorted(failed)}")
+        else:
+            failed = []
+
+        df = self.query(scope, paths, cost_centers=cost_centers, columns=columns)
+        # Months that could not be fetched and have no older partition are missing
+        df.attrs["failed_paths"] = [
+            path for path in failed if not self._partition(scope, path).exists()
+        ]
+        return df
+
+    def invalidate(self, scope: Optional[str] = None) -> int:
+        """
+        Remove stored partitions
+
+        Args:
+            scope: Only this scope (default: every scope)
+
+        Returns:
+            Number of partitions removed
+        """
+        if not self.directory.exists():
+            return 0
+        pattern = f"{scope}/month=*/splits.parquet" if scope else "*/month=*/splits.parquet"
+        removed = 0
+        for file_path in self.directory.glob(pattern):
+            try:
+                file_path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+_default_warehouse: Optional[SplitWarehouse] = None
+_default_lock = threading.Lock()
+
+
+def get_split_warehouse() -> Optional[SplitWarehouse]:
+    """Process-wide warehouse, or None when pyarrow is not installed"""
+    global _default_warehouse
+    if not PARQUET_AVAILABLE:
+        return None
+    with _default_lock:
+        if _default_warehouse is None:
+            _default_warehouse = SplitWarehouse()
+        return _default_warehouse
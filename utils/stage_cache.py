@@ -0,0 +1,116 @@
+"""
+Stage Cache
+Results of a multi-stage pipeline reused until the fingerprint of a stage's inputs changes
+"""
+
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+import pandas as pd
+
+_frame_hashes: "OrderedDict[int, tuple]" = OrderedDict()
+_frame_hashes_lock = threading.Lock()
+_MAX_FRAMES = 8
+
+
+def _hash_frame(df: pd.DataFrame) -> str:
+    """Content hash of a frame (values, index and column names)"""
+    digest = hashlib.sha256()
+    digest.update(repr(list(df.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df.index).to_numpy().tobytes())
+    for col in df.columns:
+        series = df[col]
+        try:
+            hashed = pd.util.hash_pandas_object(series, index=False)
+        except TypeError:
+            # Unhashable cells (dicts, lists) are hashed by their text
+            hashed = pd.util.hash_pandas_object(series.astype(str), index=False)
+        digest.update(hashed.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Content hash of a DataFrame, computed once per frame object
+
+    Frames kept in session state are the same object on every rerun, so
+    they are recognised by identity and shape and only hashed when first
+    seen; a few recent frames are kept.
+    """
+    key = id(df)
+    with _frame_hashes_lock:
+        cached = _frame_hashes.get(key)
+        if cached is not None and cached[0]() is df and cached[1] == df.shape:
+            _frame_hashes.move_to_end(key)
+            return cached[2]
+
+    value = _hash_frame(df)
+    with _frame_hashes_lock:
+        _frame_hashes[key] = (weakref.ref(df), df.shape, value)
+        _frame_hashes.move_to_end(key)
+        while len(_frame_hashes) > _MAX_FRAMES:
+            _frame_hashes.popitem(last=False)
+    return value
+
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Stable key for a stage's inputs
+
+    Args:
+        *parts: DataFrames (hashed by content), upstream stage keys and
+                parameters (by repr)
+
+    Returns:
+        Short hex digest
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        text = frame_fingerprint(part) if isinstance(part, pd.DataFrame) else repr(part)
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:16]
+
+
+class StageCache:
+    """
+    Latest result of each pipeline stage with the key it was computed for
+
+    A stage is recomputed only when its key differs from the stored one.
+    Keys of later stages are built from the keys of the stages they read
+    (see fingerprint()), so a changed parameter invalidates exactly the
+    stages downstream of it.
+    """
+
+    def __init__(self):
+        self._results: Dict[str, Tuple[str, Any]] = {}
+
+    def run(self, stage: str, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return the stored result of ``stage`` if it was computed for ``key``,
+        otherwise compute and store it
+
+        Args:
+            stage: Stage name
+            key: Fingerprint of the stage's inputs
+            compute: Called without arguments to produce the result
+
+        Returns:
+            The stage result
+        """
+        stored = self._results.get(stage)
+        if stored is not None and stored[0] == key:
+            return stored[1]
+        result = compute()
+        self._results[stage] = (key, result)
+        return result
+
+    def invalidate(self, *stages: str) -> None:
+        """Drop the given stages (all stages if none are given)"""
+        if not stages:
+            self._results.clear()
+        for stage in stages:
+            self._results.pop(stage, None)
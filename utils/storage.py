@@ -0,0 +1,39 @@
+"""
+Local Storage Utilities
+Resolve the on-disk data directory used by persistent caches
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+DEFAULT_DATA_DIR = Path(__file__).resolve().parent.parent / ".enprom_data"
+
+
+def get_data_dir(*parts: str) -> Path:
+    """
+    Return (and create) a directory inside the application data directory
+
+    The root defaults to ``.enprom_data`` next to the app and can be moved
+    with the ENPROM_DATA_DIR environment variable.
+
+    Args:
+        *parts: Sub-directory names below the data root
+
+    Returns:
+        Path to the existing directory
+    """
+    root = Path(os.getenv("ENPROM_DATA_DIR") or DEFAULT_DATA_DIR)
+    directory = root.joinpath(*parts)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def scope_key(*values: str) -> str:
+    """
+    Short stable hash used to keep data of different instances/API keys apart
+
+    The raw API key never appears in file names.
+    """
+    joined = "|".join(str(v or "") for v in values)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()[:16]